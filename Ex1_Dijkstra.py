@@ -1,17 +1,28 @@
 import heapq
+from array import array
+
+from busca_comum import (ArvoreCaminhos, IndicePontosInteresse as IndicePontosInteresseComum, area_busca,
+                         caminhos_alternativos, reconstruir_caminho)
 
 class Grafo:
     """ Representação de um grafo para modelar a logística de entregas. """
 
     def __init__(self):
         self.vertices = {}
+        self.indices = {}  # bairro -> posição nos arrays das buscas
+        self.nomes = []  # posição -> bairro
+
+    def _registrar_bairro(self, bairro: str):
+        """ Cria o bairro, se ainda não existir, e lhe atribui uma posição nos arrays das buscas. """
+        if bairro not in self.vertices:
+            self.vertices[bairro] = []
+            self.indices[bairro] = len(self.nomes)
+            self.nomes.append(bairro)
 
     def adicionar_aresta(self, origem: str, destino: str, distancia: float):
         """ Adiciona uma aresta bidirecional entre dois bairros. """
-        if origem not in self.vertices:
-            self.vertices[origem] = []
-        if destino not in self.vertices:
-            self.vertices[destino] = []
+        self._registrar_bairro(origem)
+        self._registrar_bairro(destino)
 
         self.vertices[origem].append((destino, distancia))
         self.vertices[destino].append((origem, distancia))  # Grafo não-direcionado
@@ -21,44 +32,275 @@ class Grafo:
         Aplica o algoritmo de Dijkstra para encontrar a menor distância
         do centro de distribuição (origem) para todos os bairros.
         """
-        distancias = {bairro: float('inf') for bairro in self.vertices}
-        distancias[origem] = 0
-        caminho_anterior = {bairro: None for bairro in self.vertices}
+        area = self._buscar(origem)
+        distancias = {}
+        caminho_anterior = {}
+        for bairro, indice in self.indices.items():
+            if area.alcancado(indice):
+                distancias[bairro] = area.distancias[indice]
+                anterior = area.anteriores[indice]
+                caminho_anterior[bairro] = self.nomes[anterior] if anterior >= 0 else None
+            else:
+                distancias[bairro] = float('inf')
+                caminho_anterior[bairro] = None
 
-        fila_prioridade = [(0, origem)]  # (distância acumulada, bairro)
+        return distancias, caminho_anterior
+
+    def _buscar(self, origem: str, destino: str = None, ordem=None):
+        """
+        Dijkstra sobre a área de trabalho da thread, parando assim que o destino (se houver)
+        é fixado; com `ordem`, anota nela as posições na ordem em que são fixadas. Retorna a
+        área: as posições alcançadas guardam a distância e o anterior.
+        """
+        indices = self.indices
+        nomes = self.nomes
+        area = area_busca()
+        area.reiniciar(len(nomes))
+        distancias = area.distancias
+        anteriores = area.anteriores
+        carimbos = area.carimbos
+        geracao = area.geracao
+
+        indice_origem = indices[origem]
+        indice_destino = indices[destino] if destino is not None else -1
+        distancias[indice_origem] = 0
+        anteriores[indice_origem] = -1
+        carimbos[indice_origem] = geracao
+
+        fila_prioridade = [(0, indice_origem)]  # (distância acumulada, posição do bairro)
 
         while fila_prioridade:
-            distancia_atual, bairro_atual = heapq.heappop(fila_prioridade)
+            distancia_atual, indice_atual = heapq.heappop(fila_prioridade)
 
             # Se a distância atual é maior que a armazenada, ignore (otimização)
-            if distancia_atual > distancias[bairro_atual]:
+            if distancia_atual > distancias[indice_atual]:
                 continue
+            if ordem is not None:
+                ordem.append(indice_atual)
+            if indice_atual == indice_destino:
+                break  # Destino fixado: o restante do grafo não interessa
 
-            for vizinho, peso in self.vertices[bairro_atual]:
+            for vizinho, peso in self.vertices[nomes[indice_atual]]:
+                indice_vizinho = indices[vizinho]
                 distancia_nova = distancia_atual + peso
-                if distancia_nova < distancias[vizinho]:
-                    distancias[vizinho] = distancia_nova
-                    caminho_anterior[vizinho] = bairro_atual
-                    heapq.heappush(fila_prioridade, (distancia_nova, vizinho))
+                if carimbos[indice_vizinho] != geracao or distancia_nova < distancias[indice_vizinho]:
+                    distancias[indice_vizinho] = distancia_nova
+                    anteriores[indice_vizinho] = indice_atual
+                    carimbos[indice_vizinho] = geracao
+                    heapq.heappush(fila_prioridade, (distancia_nova, indice_vizinho))
 
-        return distancias, caminho_anterior
+        return area
+
+    def dijkstra_multiplas_origens(self, depositos):
+        """
+        Dijkstra de múltiplas origens (diagrama de Voronoi na rede): a fila começa com todos os
+        centros de distribuição, e cada bairro fica com o centro mais próximo em uma única busca.
+
+        Retorna (bairros, donos, distancias, anteriores), alinhados pela ordem de `self.nomes`:
+        `donos[i]` é a posição em `depositos` do centro mais próximo do bairro i (-1 se nenhum
+        o alcança) e `anteriores[i]` é o índice do bairro anterior no caminho (-1 se não houver).
+        A busca roda na área de trabalho da thread; os arrays retornados são cópias próprias.
+        """
+        indices = self.indices
+        nomes = self.nomes
+        area = area_busca()
+        area.reiniciar(len(nomes))
+        distancias = area.distancias
+        anteriores = area.anteriores
+        carimbos = area.carimbos
+        geracao = area.geracao
+        donos = array('i', [-1]) * len(nomes)
+
+        fila_prioridade = []
+        for posicao, deposito in enumerate(depositos):
+            indice = indices[deposito]
+            if carimbos[indice] != geracao:
+                distancias[indice] = 0
+                anteriores[indice] = -1
+                carimbos[indice] = geracao
+                donos[indice] = posicao
+                fila_prioridade.append((0, indice))
+        heapq.heapify(fila_prioridade)
+
+        while fila_prioridade:
+            distancia_atual, indice_atual = heapq.heappop(fila_prioridade)
+
+            if distancia_atual > distancias[indice_atual]:
+                continue
+
+            for vizinho, peso in self.vertices[nomes[indice_atual]]:
+                indice_vizinho = indices[vizinho]
+                distancia_nova = distancia_atual + peso
+                if carimbos[indice_vizinho] != geracao or distancia_nova < distancias[indice_vizinho]:
+                    distancias[indice_vizinho] = distancia_nova
+                    anteriores[indice_vizinho] = indice_atual
+                    carimbos[indice_vizinho] = geracao
+                    donos[indice_vizinho] = donos[indice_atual]
+                    heapq.heappush(fila_prioridade, (distancia_nova, indice_vizinho))
+
+        alcancados = [carimbos[indice] == geracao for indice in range(len(nomes))]
+        distancias = array('d', [distancias[indice] if alcancado else float('inf')
+                                 for indice, alcancado in enumerate(alcancados)])
+        anteriores = array('i', [anteriores[indice] if alcancado else -1 for indice, alcancado in enumerate(alcancados)])
+        return list(nomes), donos, distancias, anteriores
+
+    def depositos_mais_proximos(self, bairro: str, depositos, k: int):
+        """
+        Retorna os k centros de distribuição mais próximos do bairro, como [(centro, distância)].
+        A busca é incremental e para assim que k centros são fixados, sem percorrer o grafo todo.
+        """
+        indices = self.indices
+        nomes = self.nomes
+        depositos = {indices[deposito] for deposito in depositos if deposito in indices}
+        encontrados = []
+        area = area_busca()
+        area.reiniciar(len(nomes))
+        distancias = area.distancias
+        carimbos = area.carimbos
+        geracao = area.geracao
+        indice_origem = indices[bairro]
+        distancias[indice_origem] = 0
+        carimbos[indice_origem] = geracao
+        fila_prioridade = [(0, indice_origem)]
+
+        while fila_prioridade and len(encontrados) < k:
+            distancia_atual, indice_atual = heapq.heappop(fila_prioridade)
+            if distancia_atual > distancias[indice_atual]:
+                continue
+            if indice_atual in depositos:
+                encontrados.append((nomes[indice_atual], distancia_atual))
+
+            for vizinho, peso in self.vertices[nomes[indice_atual]]:
+                distancia_nova = distancia_atual + peso
+                indice_vizinho = indices[vizinho]
+                if carimbos[indice_vizinho] != geracao or distancia_nova < distancias[indice_vizinho]:
+                    distancias[indice_vizinho] = distancia_nova
+                    carimbos[indice_vizinho] = geracao
+                    heapq.heappush(fila_prioridade, (distancia_nova, indice_vizinho))
+
+        return encontrados
+
+    def arvore_caminhos(self, origem: str):
+        """
+        Calcula a árvore de menores caminhos a partir da origem e a exporta em arrays compactos
+        (`ArvoreCaminhos`), de onde se extraem os caminhos até quaisquer destinos.
+        """
+        ordem = array('i')
+        area = self._buscar(origem, ordem=ordem)
+        return ArvoreCaminhos.da_area(self.nomes, self.indices, area, ordem)
 
     def menor_caminho(self, origem: str, destino: str):
         """
         Reconstrói o menor caminho do centro de distribuição até um bairro específico.
         """
-        distancias, caminho_anterior = self.dijkstra(origem)
+        area = self._buscar(origem, destino)
+        indice_destino = self.indices[destino]
+
+        if not area.alcancado(indice_destino):
+            return f"Não há caminho entre {origem} e {destino}."
+
+        caminho = reconstruir_caminho(self.nomes, area.anteriores, indice_destino)
 
-        if distancias[destino] == float('inf'):
+        return caminho, area.distancias[indice_destino]
+
+    def caminhos_alternativos(self, origem: str, destino: str, quantidade: int = 3, esticamento: float = 0.25,
+                               compartilhamento: float = 0.8, otimalidade_local: float = 0.25,
+                               penalidade: float = 0.5, tentativas: int = 10):
+        """
+        Retorna até `quantidade` caminhos significativamente diferentes entre dois bairros, como
+        [(caminho, distância)] em ordem crescente de distância. Uma alternativa só é aceita se
+        for no máximo (1 + esticamento) vezes mais longa que o menor caminho, se as arestas que
+        compartilha com os caminhos já escolhidos não somarem mais que `compartilhamento` vezes
+        a menor distância e se for localmente ótima em trechos de `otimalidade_local` vezes a
+        menor distância.
+
+        As candidatas vêm dos platôs (cadeias de arestas presentes tanto na árvore de menores
+        caminhos a partir da origem quanto na árvore até o destino), com duas árvores e um
+        processamento linear; se faltarem caminhos, o método de penalidade alonga as arestas já
+        usadas e repete a busca, até `tentativas` vezes.
+        """
+        indices = self.indices
+        nomes = self.nomes
+        alternativas = caminhos_alternativos(
+            self.arvore_caminhos(origem), self.arvore_caminhos(destino),  # Malha não-direcionada: árvore até o destino
+            lambda indice: ((indices[vizinho], distancia) for vizinho, distancia in self.vertices[nomes[indice]]),
+            quantidade, esticamento, compartilhamento, otimalidade_local, penalidade, tentativas)
+        if alternativas is None:
             return f"Não há caminho entre {origem} e {destino}."
+        return alternativas
+
+    def sessao_busca(self, origem: str):
+        """
+        Abre uma sessão de busca a partir da origem, para consultar vários destinos em
+        sequência sem refazer o Dijkstra a cada consulta.
+        """
+        return SessaoBusca(self, origem)
+
+class SessaoBusca:
+    """
+    Sessão de busca a partir de um centro de distribuição, que guarda a fila de prioridade,
+    as distâncias e os caminhos anteriores entre as consultas.
+
+    Cada consulta retoma a busca de onde a anterior parou e só fixa bairros até alcançar o
+    destino pedido; se ele já foi fixado, a resposta é imediata. Assim, k consultas seguidas
+    a partir da mesma origem custam no máximo um Dijkstra completo.
+    """
+
+    def __init__(self, grafo: Grafo, origem: str):
+        self.grafo = grafo
+        self.origem = origem
+        self.distancias = {origem: 0}
+        self.caminho_anterior = {origem: None}
+        self.fixados = set()
+        self.fila_prioridade = [(0, origem)]  # (distância acumulada, bairro)
+
+    def _fixar_ate(self, destino: str):
+        """ Continua o Dijkstra até fixar o destino (ou esgotar a fila). """
+        distancias = self.distancias
+        fila_prioridade = self.fila_prioridade
+
+        while destino not in self.fixados and fila_prioridade:
+            distancia_atual, bairro_atual = heapq.heappop(fila_prioridade)
+            if bairro_atual in self.fixados:
+                continue
+            self.fixados.add(bairro_atual)
+
+            for vizinho, peso in self.grafo.vertices[bairro_atual]:
+                distancia_nova = distancia_atual + peso
+                if distancia_nova < distancias.get(vizinho, float('inf')):
+                    distancias[vizinho] = distancia_nova
+                    self.caminho_anterior[vizinho] = bairro_atual
+                    heapq.heappush(fila_prioridade, (distancia_nova, vizinho))
+
+    def distancia(self, destino: str):
+        """ Retorna a menor distância da origem até o destino (infinito se não houver caminho). """
+        self._fixar_ate(destino)
+        if destino not in self.fixados:
+            return float('inf')
+        return self.distancias[destino]
+
+    def menor_caminho(self, destino: str):
+        """ Reconstrói o menor caminho da origem até o destino, como em `Grafo.menor_caminho`. """
+        if self.distancia(destino) == float('inf'):
+            return f"Não há caminho entre {self.origem} e {destino}."
 
         caminho = []
         bairro_atual = destino
-        while bairro_atual:
-            caminho.insert(0, bairro_atual)
-            bairro_atual = caminho_anterior[bairro_atual]
+        while bairro_atual is not None:
+            caminho.append(bairro_atual)
+            bairro_atual = self.caminho_anterior[bairro_atual]
+        caminho.reverse()
 
-        return caminho, distancias[destino]
+        return caminho, self.distancias[destino]
+
+class IndicePontosInteresse(IndicePontosInteresseComum):
+    """
+    Índice dos pontos de interesse (por exemplo, centros de distribuição) mais próximos de cada
+    bairro, pela distância das ruas.
+    """
+
+    def __init__(self, grafo: Grafo, pontos, k_maximo: int):
+        super().__init__(grafo.vertices, grafo.vertices.__getitem__, pontos, k_maximo)
 
 # Teste do Algoritmo
 if __name__ == "__main__":
@@ -87,3 +329,35 @@ if __name__ == "__main__":
 
     print(f"\n🛣 **Menor caminho de {origem} até {destino}:** {caminho}")
     print(f"📏 **Distância total:** {distancia_total} km")
+
+    # Centro de distribuição mais próximo de cada bairro, com dois centros em uma única busca
+    depositos = ["Centro", "Bairro D"]
+    bairros, donos, distancias_depositos, _ = grafo.dijkstra_multiplas_origens(depositos)
+
+    print("\n🏭 **Centro de distribuição mais próximo de cada bairro:**")
+    for bairro, dono, distancia in zip(bairros, donos, distancias_depositos):
+        print(f"➡️ {bairro}: {depositos[dono]} ({distancia} km)")
+
+    # Os 2 centros mais próximos do Bairro C, por busca incremental e pelo índice pré-computado
+    print(f"\n📦 **Centros mais próximos do Bairro C:** {grafo.depositos_mais_proximos('Bairro C', depositos, 2)}")
+    indice = IndicePontosInteresse(grafo, depositos, k_maximo=2)
+    print(f"🗂 **Pelo índice:** {indice.consultar('Bairro C', 2)}")
+
+    # Consultas seguidas a partir do Centro retomam a mesma busca
+    sessao = grafo.sessao_busca("Centro")
+    print("\n🧭 **Sessão de busca a partir do Centro:**")
+    for bairro in ["Bairro B", "Bairro D", "Bairro A"]:
+        print(f"➡️ {bairro}: {sessao.distancia(bairro)} km ({len(sessao.fixados)} bairros fixados)")
+    print(f"🛣 **Caminho até o Bairro C:** {sessao.menor_caminho('Bairro C')}")
+
+    # Árvore de menores caminhos exportada em arrays: todos os caminhos saem de uma única busca
+    arvore = grafo.arvore_caminhos("Centro")
+    print("\n🌳 **Caminhos a partir do Centro (árvore exportada):**")
+    for destino_arvore, caminho_arvore in arvore.caminhos():
+        print(f"➡️ {destino_arvore}: {caminho_arvore}")
+
+    # Caminhos alternativos significativamente diferentes entre o Centro e o Bairro D
+    print("\n🗺 **Caminhos alternativos do Centro até o Bairro D:**")
+    for caminho_alternativo, distancia_alternativa in grafo.caminhos_alternativos("Centro", "Bairro D", esticamento=0.5,
+                                                                                 otimalidade_local=0):
+        print(f"➡️ {distancia_alternativa} km: {caminho_alternativo}")
@@ -1,63 +1,1966 @@
+import csv
 import heapq
+import io
+import json
+import math
+import os
+import zipfile
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Optional
+
+from busca_comum import ArvoreCaminhos as ArvoreCaminhosComum, area_busca, buscar_isocrona, reconstruir_caminho
 
 class Grafo:
     """ Representação de um grafo para modelar o sistema de roteamento de ônibus. """
 
     def __init__(self):
         self.vertices = {}
+        # Funções de tempo de percurso por horário (lineares por partes e FIFO). Os pontos de
+        # quebra de todas as funções ficam em dois arrays compartilhados, e a função f ocupa
+        # [inicio_funcoes[f], fim_funcoes[f]) neles. Cada aresta guarda o índice da sua função
+        # (-1 se usa só o tempo médio) num array paralelo à adjacência do bairro.
+        self.horarios_quebra = array('d')
+        self.tempos_quebra = array('d')
+        self.inicio_funcoes = array('i')
+        self.fim_funcoes = array('i')
+        self.referencias_funcoes = array('i')  # arestas que usam cada função (0: função livre)
+        self.funcoes_arestas = []  # posição do bairro -> array('i') com a função de cada aresta
+        self._funcoes_livres = []  # índices de funções sem arestas, reaproveitados
+        self._pontos_livres = 0  # pontos de quebra de funções liberadas, recuperados na compactação
+        # Amostras de tempo de percurso (cenários correlacionados: a amostra i de todas as
+        # arestas vem do mesmo dia/observação) e caminhos candidatos reaproveitados por consulta
+        self.amostras_tempo = {}  # (origem, destino) -> array('d') com as amostras
+        self.numero_amostras = 0
+        # Caches das consultas por percentil, válidos até o grafo mudar
+        self._caminhos_candidatos = {}  # (origem, destino) -> conjunto de caminhos
+        self._amostras_ordenadas = {}  # (origem, destino) -> amostras da aresta em ordem crescente
+        self._totais_caminhos = {}  # caminho -> tempos totais por cenário, em ordem crescente
+        self.indices = {}  # bairro -> posição nos arrays das buscas
+        self.nomes = []  # posição -> bairro
+
+    def _registrar_bairro(self, bairro: str):
+        """ Cria o bairro, se ainda não existir, e lhe atribui uma posição nos arrays das buscas. """
+        if bairro not in self.vertices:
+            self.vertices[bairro] = []
+            self.funcoes_arestas.append(array('i'))
+            self.indices[bairro] = len(self.nomes)
+            self.nomes.append(bairro)
 
     def adicionar_aresta(self, origem: str, destino: str, tempo: float):
         """ Adiciona uma aresta bidirecional representando o tempo médio de deslocamento entre dois bairros. """
-        if origem not in self.vertices:
-            self.vertices[origem] = []
-        if destino not in self.vertices:
-            self.vertices[destino] = []
+        self._registrar_bairro(origem)
+        self._registrar_bairro(destino)
 
         self.vertices[origem].append((destino, tempo))
         self.vertices[destino].append((origem, tempo))  # Grafo não-direcionado
+        self.funcoes_arestas[self.indices[origem]].append(-1)
+        self.funcoes_arestas[self.indices[destino]].append(-1)
+        self._invalidar_amostras()
+
+    def adicionar_aresta_dependente_tempo(self, origem: str, destino: str, horarios, tempos, bidirecional: bool = True):
+        """
+        Adiciona uma aresta cujo tempo de deslocamento varia com o horário de partida.
+
+        `horarios` (minutos desde a meia-noite, estritamente crescentes) e `tempos` (minutos,
+        não negativos) definem uma função linear por partes, constante antes do primeiro e depois do último
+        ponto. A função precisa ser FIFO: partir mais tarde nunca faz chegar mais cedo, ou seja,
+        a inclinação entre pontos consecutivos não pode ser menor que -1. O tempo médio dos
+        pontos também é registrado como peso comum, para que `dijkstra` continue funcionando.
+        Com `bidirecional=False`, a aresta vale apenas no sentido origem -> destino. A função
+        pertence só a esta aresta (arestas paralelas comuns mantêm o seu tempo); adicionar outra
+        função para o mesmo par substitui a anterior e o seu tempo médio, e os pontos da anterior
+        são reaproveitados.
+        """
+        horarios = [float(horario) for horario in horarios]
+        tempos = [float(tempo) for tempo in tempos]
+        if not horarios or len(horarios) != len(tempos):
+            raise ValueError("horarios e tempos devem ter o mesmo tamanho, com ao menos um ponto.")
+        if min(tempos) < 0:
+            raise ValueError(f"Função de {origem} para {destino} tem tempo de percurso negativo.")
+        for i in range(1, len(horarios)):
+            intervalo = horarios[i] - horarios[i - 1]
+            if intervalo <= 0:
+                raise ValueError("Os horários devem ser estritamente crescentes.")
+            if tempos[i] - tempos[i - 1] < -intervalo:
+                raise ValueError(f"Função de {origem} para {destino} não é FIFO entre {horarios[i - 1]} e {horarios[i]}.")
+
+        funcao = self._nova_funcao(horarios, tempos)
+        tempo_medio = sum(tempos) / len(tempos)
+        self._registrar_bairro(origem)
+        self._registrar_bairro(destino)
+        sentidos = [(origem, destino), (destino, origem)] if bidirecional else [(origem, destino)]
+        for de, para in sentidos:  # Mesma função nos dois sentidos
+            adjacencia = self.vertices[de]
+            funcoes = self.funcoes_arestas[self.indices[de]]
+            posicao = next((p for p, (vizinho, _) in enumerate(adjacencia)
+                            if vizinho == para and funcoes[p] != -1), len(adjacencia))
+            if posicao == len(adjacencia):
+                adjacencia.append((para, tempo_medio))
+                funcoes.append(funcao)
+            else:
+                adjacencia[posicao] = (para, tempo_medio)
+                self._liberar_funcao(funcoes[posicao])
+                funcoes[posicao] = funcao
+            self.referencias_funcoes[funcao] += 1
+        self._invalidar_amostras()
+
+    def _nova_funcao(self, horarios, tempos):
+        """
+        Grava os pontos de quebra de uma função nos arrays compartilhados e retorna o seu índice,
+        reaproveitando o índice de uma função liberada. Quando metade dos pontos pertence a
+        funções liberadas, os arrays são compactados antes.
+        """
+        if self._pontos_livres * 2 > len(self.horarios_quebra):
+            self._compactar_funcoes()
+        if self._funcoes_livres:
+            funcao = self._funcoes_livres.pop()
+        else:
+            funcao = len(self.inicio_funcoes)
+            self.inicio_funcoes.append(0)
+            self.fim_funcoes.append(0)
+            self.referencias_funcoes.append(0)
+        self.inicio_funcoes[funcao] = len(self.horarios_quebra)
+        self.horarios_quebra.extend(horarios)
+        self.tempos_quebra.extend(tempos)
+        self.fim_funcoes[funcao] = len(self.horarios_quebra)
+        return funcao
+
+    def _liberar_funcao(self, funcao: int):
+        """ Desconta uma aresta da função; sem arestas, a função e os seus pontos ficam livres. """
+        self.referencias_funcoes[funcao] -= 1
+        if self.referencias_funcoes[funcao] == 0:
+            self._pontos_livres += self.fim_funcoes[funcao] - self.inicio_funcoes[funcao]
+            self.inicio_funcoes[funcao] = self.fim_funcoes[funcao] = 0
+            self._funcoes_livres.append(funcao)
+
+    def _compactar_funcoes(self):
+        """ Regrava os pontos de quebra só das funções em uso, descartando os das liberadas. """
+        horarios = array('d')
+        tempos = array('d')
+        for funcao in range(len(self.inicio_funcoes)):
+            if self.referencias_funcoes[funcao] > 0:
+                inicio = self.inicio_funcoes[funcao]
+                fim = self.fim_funcoes[funcao]
+                self.inicio_funcoes[funcao] = len(horarios)
+                horarios.extend(self.horarios_quebra[inicio:fim])
+                tempos.extend(self.tempos_quebra[inicio:fim])
+                self.fim_funcoes[funcao] = len(horarios)
+        self.horarios_quebra = horarios
+        self.tempos_quebra = tempos
+        self._pontos_livres = 0
+
+    def tempo_percurso(self, origem: str, destino: str, horario: float):
+        """
+        Retorna o tempo de deslocamento de origem para destino partindo no horário informado
+        (o da aresta mais rápida, se houver arestas paralelas).
+        """
+        tempos = []
+        if origem in self.indices:
+            funcoes = self.funcoes_arestas[self.indices[origem]]
+            for posicao, (vizinho, peso) in enumerate(self.vertices[origem]):
+                if vizinho == destino:
+                    funcao = funcoes[posicao]
+                    tempos.append(self._avaliar_funcao(self.inicio_funcoes[funcao], self.fim_funcoes[funcao], horario)
+                                  if funcao != -1 else peso)
+
+        if not tempos:
+            return f"Não há trecho direto entre {origem} e {destino}."
+        return min(tempos)
+
+    def _avaliar_funcao(self, inicio: int, fim: int, horario: float):
+        """ Avalia por busca binária a função guardada em [inicio, fim) dos arrays de quebra. """
+        horarios = self.horarios_quebra
+        tempos = self.tempos_quebra
+        posicao = bisect_right(horarios, horario, inicio, fim)
+        if posicao == inicio:
+            return tempos[inicio]
+        if posicao == fim:
+            return tempos[fim - 1]
+
+        horario_anterior = horarios[posicao - 1]
+        tempo_anterior = tempos[posicao - 1]
+        inclinacao = (tempos[posicao] - tempo_anterior) / (horarios[posicao] - horario_anterior)
+        return tempo_anterior + inclinacao * (horario - horario_anterior)
+
+    def dijkstra_dependente_tempo(self, origem: str, partida: float):
+        """
+        Dijkstra dependente do tempo: calcula o horário de chegada mais cedo em cada bairro
+        saindo da origem no horário `partida`. Arestas sem função usam o tempo médio.
+        Como as funções são FIFO, o primeiro rótulo fixado em cada bairro é ótimo.
+        """
+        area = self._buscar_dependente_tempo(origem, partida)
+        chegadas = {}
+        caminho_anterior = {}
+        for bairro, indice in self.indices.items():
+            if area.alcancado(indice):
+                chegadas[bairro] = area.distancias[indice]
+                anterior = area.anteriores[indice]
+                caminho_anterior[bairro] = self.nomes[anterior] if anterior >= 0 else None
+            else:
+                chegadas[bairro] = float('inf')
+                caminho_anterior[bairro] = None
+
+        return chegadas, caminho_anterior
+
+    def _buscar_dependente_tempo(self, origem: str, partida: float, destino: str = None):
+        """
+        Dijkstra dependente do tempo sobre a área de trabalho da thread, parando assim que o
+        destino (se houver) é fixado. Retorna a área: as posições alcançadas guardam o horário
+        de chegada e o anterior.
+        """
+        indices = self.indices
+        nomes = self.nomes
+        area = area_busca()
+        area.reiniciar(len(nomes))
+        chegadas = area.distancias
+        anteriores = area.anteriores
+        carimbos = area.carimbos
+        geracao = area.geracao
+
+        indice_origem = indices[origem]
+        indice_destino = indices[destino] if destino is not None else -1
+        chegadas[indice_origem] = partida
+        anteriores[indice_origem] = -1
+        carimbos[indice_origem] = geracao
+
+        funcoes_arestas = self.funcoes_arestas
+        inicio_funcoes = self.inicio_funcoes
+        fim_funcoes = self.fim_funcoes
+        avaliar_funcao = self._avaliar_funcao
+        fila_prioridade = [(partida, indice_origem)]  # (horário de chegada, posição)
+
+        while fila_prioridade:
+            chegada_atual, indice_atual = heapq.heappop(fila_prioridade)
+
+            if chegada_atual > chegadas[indice_atual]:
+                continue
+            if indice_atual == indice_destino:
+                break  # Destino fixado: o restante da rede não interessa
+
+            funcoes = funcoes_arestas[indice_atual]
+            for posicao, (vizinho, peso) in enumerate(self.vertices[nomes[indice_atual]]):
+                funcao = funcoes[posicao]
+                if funcao != -1:
+                    peso = avaliar_funcao(inicio_funcoes[funcao], fim_funcoes[funcao], chegada_atual)
+                nova_chegada = chegada_atual + peso
+                indice_vizinho = indices[vizinho]
+                if carimbos[indice_vizinho] != geracao or nova_chegada < chegadas[indice_vizinho]:
+                    chegadas[indice_vizinho] = nova_chegada
+                    anteriores[indice_vizinho] = indice_atual
+                    carimbos[indice_vizinho] = geracao
+                    heapq.heappush(fila_prioridade, (nova_chegada, indice_vizinho))
+
+        return area
+
+    def menor_caminho_dependente_tempo(self, origem: str, destino: str, partida: float):
+        """
+        Retorna o trajeto mais rápido saindo da origem no horário `partida` e a duração total.
+        """
+        area = self._buscar_dependente_tempo(origem, partida, destino)
+        indice_destino = self.indices[destino]
+
+        if not area.alcancado(indice_destino):
+            return f"Não há trajeto entre {origem} e {destino}."
+
+        caminho = reconstruir_caminho(self.nomes, area.anteriores, indice_destino)
+
+        return caminho, area.distancias[indice_destino] - partida
 
     def dijkstra(self, origem: str):
         """
         Aplica o algoritmo de Dijkstra para encontrar o menor tempo de deslocamento
         entre o bairro de origem e os demais bairros da cidade.
         """
-        tempos = {bairro: float('inf') for bairro in self.vertices}
-        tempos[origem] = 0
-        caminho_anterior = {bairro: None for bairro in self.vertices}
+        area = self._buscar(origem)
+        tempos = {}
+        caminho_anterior = {}
+        for bairro, indice in self.indices.items():
+            if area.alcancado(indice):
+                tempos[bairro] = area.distancias[indice]
+                anterior = area.anteriores[indice]
+                caminho_anterior[bairro] = self.nomes[anterior] if anterior >= 0 else None
+            else:
+                tempos[bairro] = float('inf')
+                caminho_anterior[bairro] = None
+
+        return tempos, caminho_anterior
+
+    def _buscar(self, origem: str, destino: str = None, ordem=None):
+        """
+        Dijkstra sobre a área de trabalho da thread, parando assim que o destino (se houver)
+        é fixado; com `ordem`, anota nela as posições na ordem em que são fixadas. Retorna a
+        área: as posições alcançadas guardam o tempo e o anterior.
+        """
+        indices = self.indices
+        nomes = self.nomes
+        area = area_busca()
+        area.reiniciar(len(nomes))
+        distancias = area.distancias
+        anteriores = area.anteriores
+        carimbos = area.carimbos
+        geracao = area.geracao
+
+        indice_origem = indices[origem]
+        indice_destino = indices[destino] if destino is not None else -1
+        distancias[indice_origem] = 0
+        anteriores[indice_origem] = -1
+        carimbos[indice_origem] = geracao
 
-        fila_prioridade = [(0, origem)]  # (tempo acumulado, bairro)
+        fila_prioridade = [(0, indice_origem)]  # (tempo acumulado, posição)
 
         while fila_prioridade:
-            tempo_atual, bairro_atual = heapq.heappop(fila_prioridade)
+            tempo_atual, indice_atual = heapq.heappop(fila_prioridade)
 
-            if tempo_atual > tempos[bairro_atual]:
+            if tempo_atual > distancias[indice_atual]:
                 continue
+            if ordem is not None:
+                ordem.append(indice_atual)
+            if indice_atual == indice_destino:
+                break  # Destino fixado: o restante da rede não interessa
 
-            for vizinho, peso in self.vertices[bairro_atual]:
+            for vizinho, peso in self.vertices[nomes[indice_atual]]:
+                indice_vizinho = indices[vizinho]
                 novo_tempo = tempo_atual + peso
-                if novo_tempo < tempos[vizinho]:
-                    tempos[vizinho] = novo_tempo
-                    caminho_anterior[vizinho] = bairro_atual
-                    heapq.heappush(fila_prioridade, (novo_tempo, vizinho))
+                if carimbos[indice_vizinho] != geracao or novo_tempo < distancias[indice_vizinho]:
+                    distancias[indice_vizinho] = novo_tempo
+                    anteriores[indice_vizinho] = indice_atual
+                    carimbos[indice_vizinho] = geracao
+                    heapq.heappush(fila_prioridade, (novo_tempo, indice_vizinho))
 
-        return tempos, caminho_anterior
+        return area
+
+    def arvore_caminhos(self, origem: str):
+        """
+        Calcula a árvore de menores caminhos a partir da origem e a exporta em arrays compactos
+        (`ArvoreCaminhos`), de onde se extraem os caminhos até quaisquer destinos.
+        """
+        ordem = array('i')
+        area = self._buscar(origem, ordem=ordem)
+        return ArvoreCaminhos.da_area(self.nomes, self.indices, area, ordem)
 
     def menor_caminho(self, origem: str, destino: str):
         """
         Retorna o menor caminho em tempo entre dois bairros e a duração total.
         """
-        tempos, caminho_anterior = self.dijkstra(origem)
+        area = self._buscar(origem, destino)
+        indice_destino = self.indices[destino]
+
+        if not area.alcancado(indice_destino):
+            return f"Não há trajeto entre {origem} e {destino}."
+
+        caminho = reconstruir_caminho(self.nomes, area.anteriores, indice_destino)
+
+        return caminho, area.distancias[indice_destino]
+
+    def isocrona(self, origem: str, limite, partida: float = None):
+        """
+        Busca limitada a partir da origem: para assim que o menor tempo na fila passa do limite.
+
+        `limite` pode ser um número ou uma lista de faixas (por exemplo, [10, 20, 30]) calculadas
+        na mesma busca. Retorna (alcancados, tempos, faixas, fronteiras): os bairros alcançados
+        em ordem de fixação, seus tempos, o índice da menor faixa que contém cada um e, para cada
+        faixa, as arestas (de, para) que saem de dentro dela. Com `partida`, usa as funções de
+        tempo por horário; sem ela, o tempo médio de cada aresta. Uma lista de faixas vazia gera
+        ValueError.
+        """
+        indices = self.indices
+        nomes = self.nomes
+
+        def arcos(indice, horario):
+            funcoes = self.funcoes_arestas[indice]
+            for posicao, (vizinho, peso) in enumerate(self.vertices[nomes[indice]]):
+                funcao = funcoes[posicao]
+                if partida is not None and funcao != -1:
+                    peso = self._avaliar_funcao(self.inicio_funcoes[funcao], self.fim_funcoes[funcao], horario)
+                yield indices[vizinho], peso
+
+        alcancados, tempos, faixas, fronteiras = buscar_isocrona(len(nomes), arcos, indices[origem], limite,
+                                                                 partida if partida is not None else 0)
+        fronteiras = [[(nomes[de], nomes[para]) for de, para in fronteira] for fronteira in fronteiras]
+        return [nomes[indice] for indice in alcancados], tempos, faixas, fronteiras
+
+    def adicionar_amostras_tempo(self, origem: str, destino: str, amostras):
+        """
+        Associa à aresta (nos dois sentidos) uma distribuição amostrada de tempos de percurso.
+        Todas as arestas devem ter o mesmo número de amostras; arestas sem amostras usam o
+        tempo médio em todos os cenários.
+        """
+        amostras = array('d', amostras)
+        if not amostras:
+            raise ValueError("É preciso informar ao menos uma amostra.")
+        if self.numero_amostras and len(amostras) != self.numero_amostras:
+            raise ValueError(f"As arestas já usam {self.numero_amostras} amostras.")
+        if destino not in {vizinho for vizinho, _ in self.vertices.get(origem, [])}:
+            self.adicionar_aresta(origem, destino, sum(amostras) / len(amostras))
+
+        self.numero_amostras = len(amostras)
+        self.amostras_tempo[(origem, destino)] = amostras
+        self.amostras_tempo[(destino, origem)] = amostras
+        self._invalidar_amostras()
+
+    def _invalidar_amostras(self):
+        """ Descarta os caches das consultas por percentil depois de uma mudança no grafo. """
+        self._caminhos_candidatos.clear()
+        self._amostras_ordenadas.clear()
+        self._totais_caminhos.clear()
+
+    def _caminho_por_pesos(self, origem: str, destino: str, peso_aresta):
+        """ Dijkstra com o peso de cada aresta dado por peso_aresta(origem, destino, tempo médio). """
+        indices = self.indices
+        nomes = self.nomes
+        area = area_busca()
+        area.reiniciar(len(nomes))
+        tempos = area.distancias
+        anteriores = area.anteriores
+        carimbos = area.carimbos
+        geracao = area.geracao
+
+        indice_origem = indices[origem]
+        indice_destino = indices[destino]
+        tempos[indice_origem] = 0
+        anteriores[indice_origem] = -1
+        carimbos[indice_origem] = geracao
+        fila_prioridade = [(0, indice_origem)]
+
+        while fila_prioridade:
+            tempo_atual, indice_atual = heapq.heappop(fila_prioridade)
+            if tempo_atual > tempos[indice_atual]:
+                continue
+            if indice_atual == indice_destino:
+                return tuple(reconstruir_caminho(nomes, anteriores, indice_destino))
+
+            bairro_atual = nomes[indice_atual]
+            for vizinho, peso in self.vertices[bairro_atual]:
+                novo_tempo = tempo_atual + peso_aresta(bairro_atual, vizinho, peso)
+                indice_vizinho = indices[vizinho]
+                if carimbos[indice_vizinho] != geracao or novo_tempo < tempos[indice_vizinho]:
+                    tempos[indice_vizinho] = novo_tempo
+                    anteriores[indice_vizinho] = indice_atual
+                    carimbos[indice_vizinho] = geracao
+                    heapq.heappush(fila_prioridade, (novo_tempo, indice_vizinho))
+
+        return None
+
+    def _amostras_caminho(self, caminho):
+        """
+        Soma, cenário a cenário, as amostras das arestas do caminho e retorna os totais em ordem
+        crescente. As somas vão para um único array; as arestas sem amostras, que valem o mesmo
+        em todos os cenários, entram numa parcela constante somada no fim. O resultado fica em
+        cache até o grafo mudar.
+        """
+        totais = self._totais_caminhos.get(caminho)
+        if totais is not None:
+            return totais
+
+        totais = array('d', [0.0]) * self.numero_amostras
+        constante = 0.0
+        cenarios = range(self.numero_amostras)
+        for de, para in zip(caminho, caminho[1:]):
+            amostras = self.amostras_tempo.get((de, para))
+            if amostras is not None:
+                for cenario in cenarios:
+                    totais[cenario] += amostras[cenario]
+            else:
+                constante += min(peso for vizinho, peso in self.vertices[de] if vizinho == para)
+        totais = array('d', sorted(total + constante for total in totais))
+        self._totais_caminhos[caminho] = totais
+        return totais
+
+    def _percentil_aresta(self, par, posicao_percentil):
+        """ Amostra da aresta na posição do percentil, com as amostras ordenadas uma única vez. """
+        ordenadas = self._amostras_ordenadas.get(par)
+        if ordenadas is None:
+            ordenadas = self._amostras_ordenadas[par] = array('d', sorted(self.amostras_tempo[par]))
+        return ordenadas[posicao_percentil(len(ordenadas))]
+
+    def menor_caminho_percentil(self, origem: str, destino: str, percentil: float = 85, cenarios: int = 16):
+        """
+        Retorna o trajeto cujo tempo total tem o menor percentil (por padrão, p85) e esse tempo.
+
+        Os candidatos são os caminhos mínimos pelo tempo médio, pelo percentil de cada aresta e
+        por `cenarios` amostras espaçadas; cada candidato é avaliado somando os vetores de
+        amostras das suas arestas, o que preserva a correlação entre arestas do mesmo cenário.
+        Os candidatos, os totais ordenados de cada um e as amostras ordenadas de cada aresta
+        ficam guardados e são reaproveitados por consultas seguintes, inclusive com outro
+        percentil, até o grafo mudar.
+        """
+        if origem not in self.vertices or destino not in self.vertices:
+            return f"Não há trajeto entre {origem} e {destino}."
+        if not self.numero_amostras:
+            return self.menor_caminho(origem, destino)
+
+        def posicao_percentil(quantidade):
+            return max(0, min(quantidade - 1, math.ceil(percentil / 100 * quantidade) - 1))
+
+        chave = (origem, destino)
+        if chave not in self._caminhos_candidatos:
+            candidatos = set()
+            candidatos.add(self._caminho_por_pesos(origem, destino, lambda de, para, peso: peso))
+
+            percentis_aresta = {par: self._percentil_aresta(par, posicao_percentil) for par in self.amostras_tempo}
+            candidatos.add(self._caminho_por_pesos(
+                origem, destino, lambda de, para, peso: percentis_aresta.get((de, para), peso)))
+
+            passo = max(1, self.numero_amostras // cenarios)
+            for cenario in range(0, self.numero_amostras, passo):
+                candidatos.add(self._caminho_por_pesos(
+                    origem, destino,
+                    lambda de, para, peso: self.amostras_tempo[(de, para)][cenario] if (de, para) in self.amostras_tempo else peso))
+            candidatos.discard(None)
+            self._caminhos_candidatos[chave] = candidatos
+
+        melhor_caminho = None
+        melhor_tempo = float('inf')
+        for caminho in self._caminhos_candidatos[chave]:
+            totais = self._amostras_caminho(caminho)
+            tempo = totais[posicao_percentil(len(totais))]
+            if tempo < melhor_tempo:
+                melhor_caminho, melhor_tempo = list(caminho), tempo
+
+        if melhor_caminho is None:
+            return f"Não há trajeto entre {origem} e {destino}."
+        return melhor_caminho, melhor_tempo
+
+class ArvoreCaminhos(ArvoreCaminhosComum):
+    """ Árvore de menores caminhos entre bairros, em que o valor acumulado é o tempo. """
+
+    def tempo(self, destino: str):
+        """ Retorna o tempo mínimo da origem até o destino (infinito se não for alcançado). """
+        return self.distancias[self.indices[destino]]
+
+class QuadroHorarios:
+    """
+    Quadro de horários (linhas, viagens e horários de parada) guardado em arrays planos.
+
+    As viagens são registradas com `adicionar_viagem` e agrupadas em rotas: viagens com a mesma
+    sequência de paradas que não se ultrapassam. Na compilação, cada rota ocupa um bloco
+    contínuo de `chegadas`/`partidas` (viagem por viagem, parada por parada), e cada parada
+    aponta para as rotas que a atendem em uma estrutura CSR.
+    """
+
+    def __init__(self):
+        self.paradas = []  # índice -> nome da parada
+        self.indice_parada = {}  # nome da parada -> índice
+        self._viagens = {}  # sequência de paradas -> [(partidas, chegadas, identificador)]
+        self._compilado = False
+
+    def adicionar_parada(self, nome: str):
+        """ Registra uma parada (se ainda não existir) e retorna seu índice. """
+        if nome not in self.indice_parada:
+            self.indice_parada[nome] = len(self.paradas)
+            self.paradas.append(nome)
+        return self.indice_parada[nome]
+
+    def adicionar_viagem(self, paradas, chegadas, partidas=None, identificador=None):
+        """
+        Adiciona uma viagem que passa por `paradas` nos horários informados (minutos).
+        Sem `partidas`, considera-se que o ônibus parte no mesmo horário em que chega.
+        """
+        if partidas is None:
+            partidas = chegadas
+        if len(paradas) < 2 or not len(paradas) == len(chegadas) == len(partidas):
+            raise ValueError("Uma viagem precisa de ao menos duas paradas e um horário para cada uma.")
+
+        sequencia = tuple(self.adicionar_parada(parada) for parada in paradas)
+        if identificador is None:
+            identificador = f"viagem {sum(len(v) for v in self._viagens.values())}"
+        self._viagens.setdefault(sequencia, []).append(
+            (tuple(float(h) for h in partidas), tuple(float(h) for h in chegadas), identificador))
+        self._compilado = False
+
+    @classmethod
+    def de_grafo(cls, grafo, inicio: float = 0, fim: float = 1440, intervalo: float = 10, linhas=None):
+        """
+        Converte um `Grafo` em quadro de horários, para que redes já modeladas continuem valendo.
+
+        Cada linha (lista de bairros adjacentes no grafo) ganha viagens nos dois sentidos a cada
+        `intervalo` minutos entre `inicio` e `fim`. Sem `linhas`, cada rua vira uma linha própria.
+        Os tempos entre paradas vêm de `grafo.tempo_percurso`, respeitando funções por horário.
+        """
+        quadro = cls()
+        if linhas is None:
+            linhas = []
+            for origem, vizinhos in grafo.vertices.items():
+                for destino, _ in vizinhos:
+                    linhas.append([origem, destino])  # Cada sentido já aparece na adjacência
+            sentidos = (False,)
+        else:
+            sentidos = (False, True)
+
+        for numero, linha in enumerate(linhas):
+            for invertida in sentidos:
+                paradas = list(reversed(linha)) if invertida else list(linha)
+                saida = inicio
+                while saida <= fim:
+                    horarios = [saida]
+                    for anterior, proxima in zip(paradas, paradas[1:]):
+                        tempo = grafo.tempo_percurso(anterior, proxima, horarios[-1])
+                        if isinstance(tempo, str):
+                            raise ValueError(tempo)
+                        horarios.append(horarios[-1] + tempo)
+                    quadro.adicionar_viagem(paradas, horarios,
+                                            identificador=f"linha {numero}{' volta' if invertida else ''} {saida:g}")
+                    saida += intervalo
+        return quadro
+
+    def compilar(self):
+        """ Gera os arrays planos das rotas; é chamado automaticamente pelas consultas. """
+        if self._compilado:
+            return
+
+        rotas = []  # (sequência, viagens ordenadas pela partida na primeira parada)
+        for sequencia, viagens in self._viagens.items():
+            grupos = []
+            for viagem in sorted(viagens, key=lambda v: v[0][0]):
+                # Cada viagem entra na primeira rota cuja última viagem ela não ultrapassa
+                for grupo in grupos:
+                    ultima = grupo[-1]
+                    if all(a >= b for a, b in zip(viagem[0], ultima[0])) and \
+                            all(a >= b for a, b in zip(viagem[1], ultima[1])):
+                        grupo.append(viagem)
+                        break
+                else:
+                    grupos.append([viagem])
+            rotas.extend((sequencia, grupo) for grupo in grupos)
+
+        self.inicio_paradas_rota = array('i', [0])
+        self.paradas_rota = array('i')
+        self.inicio_viagens_rota = array('i', [0])
+        self.inicio_horarios_rota = array('i', [0])
+        self.partidas = array('d')
+        self.chegadas = array('d')
+        self.identificadores_viagem = []
+        rotas_parada = [[] for _ in self.paradas]
+
+        for rota, (sequencia, viagens) in enumerate(rotas):
+            for posicao, parada in enumerate(sequencia):
+                rotas_parada[parada].append((rota, posicao))
+            self.paradas_rota.extend(sequencia)
+            self.inicio_paradas_rota.append(len(self.paradas_rota))
+            for partidas, chegadas, identificador in viagens:
+                self.partidas.extend(partidas)
+                self.chegadas.extend(chegadas)
+                self.identificadores_viagem.append(identificador)
+            self.inicio_viagens_rota.append(len(self.identificadores_viagem))
+            self.inicio_horarios_rota.append(len(self.partidas))
+
+        self.inicio_rotas_parada = array('i', [0])
+        self.rotas_parada = array('i')
+        self.posicoes_parada = array('i')
+        for atendimentos in rotas_parada:
+            for rota, posicao in atendimentos:
+                self.rotas_parada.append(rota)
+                self.posicoes_parada.append(posicao)
+            self.inicio_rotas_parada.append(len(self.rotas_parada))
+
+        self._compilado = True
+
+class Raptor:
+    """
+    Motor de roteamento por rodadas (RAPTOR) sobre um `QuadroHorarios`.
+
+    A rodada k calcula a chegada mais cedo em cada parada usando até k viagens, percorrendo
+    uma única vez cada rota que passa por uma parada melhorada na rodada anterior. Não há
+    fila de prioridade: o custo por rodada é linear no tamanho das rotas percorridas.
+    """
+
+    def __init__(self, quadro: QuadroHorarios):
+        self.quadro = quadro
+
+    def _primeira_viagem(self, rota: int, posicao: int, horario: float):
+        """ Busca binária da primeira viagem da rota que parte da posição no horário ou depois. """
+        quadro = self.quadro
+        numero_paradas = quadro.inicio_paradas_rota[rota + 1] - quadro.inicio_paradas_rota[rota]
+        base = quadro.inicio_horarios_rota[rota] + posicao
+        numero_viagens = quadro.inicio_viagens_rota[rota + 1] - quadro.inicio_viagens_rota[rota]
+        baixo = 0
+        alto = numero_viagens
+        partidas = quadro.partidas
+        while baixo < alto:
+            meio = (baixo + alto) // 2
+            if partidas[base + meio * numero_paradas] < horario:
+                baixo = meio + 1
+            else:
+                alto = meio
+        return baixo if baixo < numero_viagens else -1
+
+    def rodadas(self, fontes, max_rodadas: int, destino: int = -1, caminhadas=None, penalidade: float = 0,
+                tempo_maximo_caminhada: float = float('inf')):
+        """
+        Executa as rodadas a partir de `fontes` ({índice da parada: horário}).
+
+        Retorna (chegadas, anteriores): `chegadas[k][p]` é a chegada mais cedo em p com até k
+        viagens e `anteriores[k]` guarda, para as paradas melhoradas na rodada k, a perna
+        (parada de embarque, rota, viagem na rota, posição de embarque, posição de desembarque)
+        ou, se a parada foi alcançada a pé, apenas (parada de onde se caminhou,).
+        Com `destino`, rótulos que não melhoram a chegada no destino são podados.
+
+        `caminhadas` são ligações a pé entre paradas em arrays CSR (inicio, destinos, tempos),
+        aplicadas depois das rotas em cada rodada; as mais longas que `tempo_maximo_caminhada`
+        são ignoradas. `penalidade` é somada ao horário de chegada antes de cada baldeação.
+        """
+        quadro = self.quadro
+        quadro.compilar()
+        paradas_rota = quadro.paradas_rota
+        inicio_paradas_rota = quadro.inicio_paradas_rota
+        inicio_horarios_rota = quadro.inicio_horarios_rota
+        partidas = quadro.partidas
+        chegadas_viagem = quadro.chegadas
+
+        infinito = float('inf')
+        melhor = [infinito] * len(quadro.paradas)
+        rodada_atual = [infinito] * len(quadro.paradas)
+        for parada, horario in fontes.items():
+            rodada_atual[parada] = min(rodada_atual[parada], horario)
+            melhor[parada] = rodada_atual[parada]
+        chegadas = [rodada_atual]
+        anteriores = [{}]
+        marcadas = set(fontes)
+
+        for rodada in range(1, max_rodadas + 1):
+            folga = penalidade if rodada > 1 else 0
+            # Rotas a percorrer, cada uma a partir da primeira parada marcada
+            fila_rotas = {}
+            for parada in marcadas:
+                for i in range(quadro.inicio_rotas_parada[parada], quadro.inicio_rotas_parada[parada + 1]):
+                    rota = quadro.rotas_parada[i]
+                    posicao = quadro.posicoes_parada[i]
+                    if posicao < fila_rotas.get(rota, posicao + 1):
+                        fila_rotas[rota] = posicao
+
+            rodada_anterior = rodada_atual
+            rodada_atual = list(rodada_anterior)
+            melhorias = {}
+            marcadas = set()
+
+            for rota, posicao_inicial in fila_rotas.items():
+                inicio = inicio_paradas_rota[rota]
+                numero_paradas = inicio_paradas_rota[rota + 1] - inicio
+                base = inicio_horarios_rota[rota]
+                viagem = -1
+                embarque = None  # Parada onde se embarcou na viagem atual
+                posicao_embarque = -1
+                for posicao in range(posicao_inicial, numero_paradas):
+                    parada = paradas_rota[inicio + posicao]
+                    if embarque is not None:
+                        chegada = chegadas_viagem[base + viagem * numero_paradas + posicao]
+                        limite = melhor[parada] if destino < 0 else min(melhor[parada], melhor[destino])
+                        if chegada < limite:
+                            rodada_atual[parada] = chegada
+                            melhor[parada] = chegada
+                            melhorias[parada] = (embarque, rota, viagem, posicao_embarque, posicao)
+                            marcadas.add(parada)
+                    # Embarca em uma viagem mais cedo se a parada foi alcançada a tempo
+                    horario = rodada_anterior[parada] + folga
+                    if horario < infinito and (viagem == -1 or horario <= partidas[base + viagem * numero_paradas + posicao]):
+                        nova_viagem = self._primeira_viagem(rota, posicao, horario)
+                        if nova_viagem != -1 and (viagem == -1 or nova_viagem < viagem):
+                            viagem = nova_viagem
+                            embarque = parada
+                            posicao_embarque = posicao
+
+            # Caminhadas a partir das paradas alcançadas de ônibus nesta rodada
+            if caminhadas is not None:
+                inicio_caminhadas, destinos_caminhadas, tempos_caminhadas = caminhadas
+                for parada in list(marcadas):
+                    horario = rodada_atual[parada]
+                    for i in range(inicio_caminhadas[parada], inicio_caminhadas[parada + 1]):
+                        if tempos_caminhadas[i] > tempo_maximo_caminhada:
+                            continue
+                        vizinha = destinos_caminhadas[i]
+                        chegada = horario + tempos_caminhadas[i]
+                        limite = melhor[vizinha] if destino < 0 else min(melhor[vizinha], melhor[destino])
+                        if chegada < limite:
+                            rodada_atual[vizinha] = chegada
+                            melhor[vizinha] = chegada
+                            melhorias[vizinha] = (parada,)
+                            marcadas.add(vizinha)
+
+            chegadas.append(rodada_atual)
+            anteriores.append(melhorias)
+            if not marcadas:
+                break
+
+        return chegadas, anteriores
+
+    def reconstruir_jornada(self, chegadas, anteriores, destino: int, rodada: int):
+        """
+        Reconstrói as pernas da jornada que chega ao destino usando até `rodada` viagens.
+        Cada perna é (embarque, desembarque, identificador da viagem ou "a pé", partida, chegada).
+        """
+        quadro = self.quadro
+        pernas = []
+        parada = destino
+        while rodada > 0:
+            if parada not in anteriores[rodada]:
+                rodada -= 1
+                continue
+            if len(anteriores[rodada][parada]) == 1:
+                # Caminhada feita na mesma rodada, logo depois de descer do ônibus
+                anterior = anteriores[rodada][parada][0]
+                pernas.append((quadro.paradas[anterior], quadro.paradas[parada], "a pé",
+                               chegadas[rodada][anterior], chegadas[rodada][parada]))
+                parada = anterior
+                continue
+            embarque, rota, viagem, posicao_embarque, posicao = anteriores[rodada][parada]
+            numero_paradas = quadro.inicio_paradas_rota[rota + 1] - quadro.inicio_paradas_rota[rota]
+            base = quadro.inicio_horarios_rota[rota] + viagem * numero_paradas
+            pernas.append((quadro.paradas[embarque], quadro.paradas[parada],
+                           quadro.identificadores_viagem[quadro.inicio_viagens_rota[rota] + viagem],
+                           quadro.partidas[base + posicao_embarque], quadro.chegadas[base + posicao]))
+            parada = embarque
+            rodada -= 1
+        pernas.reverse()
+        return pernas
 
-        if tempos[destino] == float('inf'):
+    def chegada_mais_cedo(self, origem: str, destino: str, partida: float, max_transferencias: int = 4):
+        """
+        Retorna o horário de chegada mais cedo saindo da origem em `partida` com no máximo
+        `max_transferencias` baldeações, junto com as pernas da jornada de menos viagens
+        que atinge esse horário.
+        """
+        quadro = self.quadro
+        if origem not in quadro.indice_parada or destino not in quadro.indice_parada:
+            return f"Não há trajeto entre {origem} e {destino}."
+
+        indice_destino = quadro.indice_parada[destino]
+        chegadas, anteriores = self.rodadas({quadro.indice_parada[origem]: partida},
+                                            max_transferencias + 1, indice_destino)
+        chegada = chegadas[-1][indice_destino]
+        if chegada == float('inf'):
             return f"Não há trajeto entre {origem} e {destino}."
 
-        caminho = []
-        bairro_atual = destino
-        while bairro_atual:
-            caminho.insert(0, bairro_atual)
-            bairro_atual = caminho_anterior[bairro_atual]
+        rodada = next(k for k, rodada in enumerate(chegadas) if rodada[indice_destino] == chegada)
+        return chegada, self.reconstruir_jornada(chegadas, anteriores, indice_destino, rodada)
+
+class RedeMultimodal:
+    """
+    Roteamento combinado a pé + ônibus.
+
+    A camada a pé é um `Grafo` com distâncias em metros, cujos vértices incluem as paradas do
+    quadro de horários (mesmos nomes). A caminhada entra só no primeiro e no último trecho, por
+    buscas limitadas a partir da origem e do destino, e nas baldeações, por ligações entre
+    paradas pré-computadas. A parte de ônibus usa RAPTOR, o que evita multiplicar o espaço de
+    estados por todos os vértices da camada a pé.
+    """
+
+    def __init__(self, quadro: QuadroHorarios, caminhada: Grafo, velocidade_caminhada: float = 80,
+                 penalidade_baldeacao: float = 2):
+        """ `velocidade_caminhada` em metros por minuto; `penalidade_baldeacao` em minutos. """
+        self.quadro = quadro
+        self.caminhada = caminhada
+        self.velocidade_caminhada = velocidade_caminhada
+        self.penalidade_baldeacao = penalidade_baldeacao
+        self.raptor = Raptor(quadro)
+        self.caminhadas = None  # (inicio, destinos, distâncias) por parada, em arrays CSR
+        self.distancia_caminhadas = 0  # limite em metros usado no pré-cálculo das ligações
+
+    def precomputar_caminhadas(self, distancia_maxima: float):
+        """
+        Calcula as ligações a pé entre paradas de até `distancia_maxima` metros em uma única
+        busca limitada de múltiplas origens: a fila começa com todas as paradas e cada rótulo
+        carrega a parada de onde saiu, de modo que cada vértice é fixado uma vez por origem.
+        Consultas com limites menores reaproveitam as ligações, filtrando as mais longas.
+        """
+        quadro = self.quadro
+        fixados = {}  # vértice -> paradas de origem já fixadas nele
+        ligacoes = [[] for _ in quadro.paradas]
+        fila_prioridade = [(0, indice, parada) for parada, indice in quadro.indice_parada.items()
+                           if parada in self.caminhada.vertices]
+        heapq.heapify(fila_prioridade)
+
+        while fila_prioridade:
+            distancia, fonte, vertice = heapq.heappop(fila_prioridade)
+            origens_fixadas = fixados.setdefault(vertice, set())
+            if fonte in origens_fixadas:
+                continue
+            origens_fixadas.add(fonte)
+
+            indice = quadro.indice_parada.get(vertice)
+            if indice is not None and indice != fonte:
+                ligacoes[fonte].append((indice, distancia))
+
+            for vizinho, metros in self.caminhada.vertices[vertice]:
+                nova_distancia = distancia + metros
+                if nova_distancia <= distancia_maxima and fonte not in fixados.get(vizinho, ()):
+                    heapq.heappush(fila_prioridade, (nova_distancia, fonte, vizinho))
+
+        inicio = array('i', [0])
+        destinos = array('i')
+        distancias = array('d')
+        for lista in ligacoes:
+            for destino, distancia in lista:
+                destinos.append(destino)
+                distancias.append(distancia)
+            inicio.append(len(destinos))
+        self.caminhadas = (inicio, destinos, distancias)
+        self.distancia_caminhadas = distancia_maxima
+
+    def _paradas_proximas(self, local: str, distancia_maxima: float):
+        """
+        Paradas a até `distancia_maxima` metros do local, com o tempo de caminhada até elas, e
+        a distância a pé até cada vértice alcançado nessa mesma busca: (proximas, distancias).
+        """
+        indice_parada = self.quadro.indice_parada
+        proximas = {}
+        distancias_caminhada = {}
+        if local in indice_parada:
+            proximas[indice_parada[local]] = 0
+        if local in self.caminhada.vertices:
+            alcancados, distancias, _, _ = self.caminhada.isocrona(local, distancia_maxima)
+            distancias_caminhada = dict(zip(alcancados, distancias))
+            for vertice, distancia in distancias_caminhada.items():
+                if vertice in indice_parada:
+                    proximas.setdefault(indice_parada[vertice], distancia / self.velocidade_caminhada)
+        return proximas, distancias_caminhada
+
+    def menor_trajeto(self, origem: str, destino: str, partida: float, distancia_maxima_caminhada: float = 1000,
+                      max_transferencias: int = 4):
+        """
+        Retorna (chegada, pernas) do trajeto que chega mais cedo, caminhando no máximo
+        `distancia_maxima_caminhada` metros em cada trecho a pé. As ligações entre paradas são
+        pré-computadas na primeira consulta e refeitas quando uma consulta pede um limite maior
+        que o usado no pré-cálculo.
+        """
+        quadro = self.quadro
+        quadro.compilar()
+        if self.caminhadas is None or distancia_maxima_caminhada > self.distancia_caminhadas:
+            self.precomputar_caminhadas(distancia_maxima_caminhada)
+
+        acessos, distancias_origem = self._paradas_proximas(origem, distancia_maxima_caminhada)
+        saidas, _ = self._paradas_proximas(destino, distancia_maxima_caminhada)
+        melhor_chegada = float('inf')
+        melhor_pernas = None
+
+        # Trajeto todo a pé, pela mesma busca que encontrou as paradas próximas da origem
+        if destino in distancias_origem:
+            melhor_chegada = partida + distancias_origem[destino] / self.velocidade_caminhada
+            melhor_pernas = [(origem, destino, "a pé", partida, melhor_chegada)]
+
+        inicio, destinos, distancias = self.caminhadas
+        tempos = array('d', (distancia / self.velocidade_caminhada for distancia in distancias))
+        chegadas, anteriores = self.raptor.rodadas(
+            {parada: partida + tempo for parada, tempo in acessos.items()}, max_transferencias + 1,
+            caminhadas=(inicio, destinos, tempos), penalidade=self.penalidade_baldeacao,
+            tempo_maximo_caminhada=distancia_maxima_caminhada / self.velocidade_caminhada)
+
+        melhor_saida = None
+        for rodada in range(1, len(chegadas)):
+            for parada, tempo in saidas.items():
+                if chegadas[rodada][parada] >= chegadas[0][parada]:
+                    continue  # Parada só alcançada a pé, sem nenhuma viagem
+                if chegadas[rodada][parada] + tempo < melhor_chegada:
+                    melhor_chegada = chegadas[rodada][parada] + tempo
+                    melhor_saida = (parada, rodada)
+
+        if melhor_saida is not None:
+            parada, rodada = melhor_saida
+            melhor_pernas = self.raptor.reconstruir_jornada(chegadas, anteriores, parada, rodada)
+            embarque = quadro.indice_parada[melhor_pernas[0][0]]
+            if quadro.paradas[embarque] != origem:
+                melhor_pernas.insert(0, (origem, quadro.paradas[embarque], "a pé", partida,
+                                         partida + acessos[embarque]))
+            if quadro.paradas[parada] != destino:
+                melhor_pernas.append((quadro.paradas[parada], destino, "a pé", chegadas[rodada][parada],
+                                      melhor_chegada))
+
+        if melhor_pernas is None:
+            return f"Não há trajeto entre {origem} e {destino}."
+        return melhor_chegada, melhor_pernas
+
+class PadroesBaldeacao:
+    """
+    Índice de padrões de baldeação (transfer patterns) sobre um `QuadroHorarios`.
+
+    Na pré-computação, cada parada de origem é consultada com RAPTOR em todos os seus horários
+    de partida, e as sequências de paradas de baldeação das jornadas ótimas (origem, baldeações,
+    destino) são guardadas em uma árvore de prefixos por origem, em arrays de parada e de pai.
+    Uma consulta avalia apenas esses padrões, trecho a trecho, pela tabela de conexões diretas
+    (rotas que ligam duas paradas sem baldeação), sem nenhuma busca no grafo.
+    """
+
+    def __init__(self, quadro: QuadroHorarios):
+        self.quadro = quadro
+        self.raptor = Raptor(quadro)
+        self.padroes = {}  # parada de origem -> (paradas dos nós, pais dos nós, {destino: nós finais})
+        self.diretas = {}  # (parada, parada) -> [(rota, posição de embarque, posição de desembarque)]
+
+    def precomputar(self, max_transferencias: int = 4, inicio: float = 0, fim: float = 1440):
+        """ Calcula os padrões de todas as origens para partidas entre `inicio` e `fim`. """
+        quadro = self.quadro
+        quadro.compilar()
+        for origem in range(len(quadro.paradas)):
+            paradas_no = array('i', [origem])
+            pais_no = array('i', [-1])
+            filhos = {}  # (nó pai, parada) -> nó
+            finais = {}
+
+            for partida in self._partidas(origem, inicio, fim):
+                chegadas, anteriores = self.raptor.rodadas({origem: partida}, max_transferencias + 1)
+                for destino in range(len(quadro.paradas)):
+                    for rodada in range(1, len(chegadas)):
+                        # Só as rodadas que melhoram o destino geram jornadas de Pareto
+                        if chegadas[rodada][destino] >= chegadas[rodada - 1][destino]:
+                            continue
+                        no = 0
+                        for perna in self.raptor.reconstruir_jornada(chegadas, anteriores, destino, rodada):
+                            parada = quadro.indice_parada[perna[1]]
+                            if (no, parada) not in filhos:
+                                filhos[(no, parada)] = len(paradas_no)
+                                paradas_no.append(parada)
+                                pais_no.append(no)
+                            no = filhos[(no, parada)]
+                        if no not in finais.setdefault(destino, []):
+                            finais[destino].append(no)
+
+            self.padroes[origem] = (paradas_no, pais_no, finais)
+        self._montar_diretas()
+
+    def _partidas(self, parada: int, inicio: float, fim: float):
+        """ Horários distintos de partida de viagens na parada dentro da janela. """
+        quadro = self.quadro
+        horarios = set()
+        for i in range(quadro.inicio_rotas_parada[parada], quadro.inicio_rotas_parada[parada + 1]):
+            rota = quadro.rotas_parada[i]
+            numero_paradas = quadro.inicio_paradas_rota[rota + 1] - quadro.inicio_paradas_rota[rota]
+            if quadro.posicoes_parada[i] == numero_paradas - 1:
+                continue  # Última parada da rota: nenhuma viagem parte dali
+            base = quadro.inicio_horarios_rota[rota] + quadro.posicoes_parada[i]
+            for viagem in range(quadro.inicio_viagens_rota[rota + 1] - quadro.inicio_viagens_rota[rota]):
+                horario = quadro.partidas[base + viagem * numero_paradas]
+                if inicio <= horario <= fim:
+                    horarios.add(horario)
+        return sorted(horarios)
+
+    def _montar_diretas(self):
+        """ Monta a tabela de conexões diretas para os pares de paradas usados pelos padrões. """
+        quadro = self.quadro
+        quadro.compilar()
+        pares = set()
+        for paradas_no, pais_no, _ in self.padroes.values():
+            for no in range(1, len(paradas_no)):
+                pares.add((paradas_no[pais_no[no]], paradas_no[no]))
+
+        self.diretas = {}
+        for embarque, desembarque in pares:
+            conexoes = []
+            for i in range(quadro.inicio_rotas_parada[embarque], quadro.inicio_rotas_parada[embarque + 1]):
+                rota = quadro.rotas_parada[i]
+                inicio = quadro.inicio_paradas_rota[rota]
+                fim = quadro.inicio_paradas_rota[rota + 1]
+                for posicao in range(quadro.posicoes_parada[i] + 1, fim - inicio):
+                    if quadro.paradas_rota[inicio + posicao] == desembarque:
+                        conexoes.append((rota, quadro.posicoes_parada[i], posicao))
+                        break
+            self.diretas[(embarque, desembarque)] = conexoes
 
-        return caminho, tempos[destino]
+    def _chegada_direta(self, embarque: int, desembarque: int, horario: float):
+        """ Chegada mais cedo em `desembarque` com uma única viagem saindo de `embarque` após `horario`. """
+        quadro = self.quadro
+        melhor = float('inf')
+        for rota, posicao_embarque, posicao in self.diretas.get((embarque, desembarque), ()):
+            viagem = self.raptor._primeira_viagem(rota, posicao_embarque, horario)
+            if viagem != -1:
+                numero_paradas = quadro.inicio_paradas_rota[rota + 1] - quadro.inicio_paradas_rota[rota]
+                chegada = quadro.chegadas[quadro.inicio_horarios_rota[rota] + viagem * numero_paradas + posicao]
+                melhor = min(melhor, chegada)
+        return melhor
+
+    def consultar(self, origem: str, destino: str, partida: float):
+        """
+        Retorna (chegada mais cedo, paradas do padrão usado) avaliando só os padrões da origem
+        para o destino. Prefixos comuns entre padrões são avaliados uma única vez.
+        """
+        quadro = self.quadro
+        indice_origem = quadro.indice_parada.get(origem)
+        indice_destino = quadro.indice_parada.get(destino)
+        if indice_origem not in self.padroes or indice_destino not in self.padroes[indice_origem][2]:
+            return f"Não há trajeto entre {origem} e {destino}."
+
+        paradas_no, pais_no, finais = self.padroes[indice_origem]
+        chegadas_no = {0: partida}
+
+        def chegada(no):
+            if no not in chegadas_no:
+                anterior = pais_no[no]
+                chegadas_no[no] = self._chegada_direta(paradas_no[anterior], paradas_no[no], chegada(anterior))
+            return chegadas_no[no]
+
+        melhor_no = min(finais[indice_destino], key=chegada)
+        if chegada(melhor_no) == float('inf'):
+            return f"Não há trajeto entre {origem} e {destino}."
+
+        padrao = []
+        no = melhor_no
+        while no != -1:
+            padrao.append(quadro.paradas[paradas_no[no]])
+            no = pais_no[no]
+        padrao.reverse()
+        return chegada(melhor_no), padrao
+
+    def salvar(self, caminho: str):
+        """ Grava os padrões em JSON; as conexões diretas são refeitas a partir do quadro. """
+        dados = {
+            "paradas": self.quadro.paradas,
+            "padroes": {
+                str(origem): {"paradas": list(paradas_no), "pais": list(pais_no),
+                              "finais": {str(destino): nos for destino, nos in finais.items()}}
+                for origem, (paradas_no, pais_no, finais) in self.padroes.items()
+            },
+        }
+        with open(caminho, "w", encoding="utf-8") as arquivo:
+            json.dump(dados, arquivo)
+
+    @classmethod
+    def carregar(cls, caminho: str, quadro: QuadroHorarios):
+        """ Lê padrões gravados por `salvar` para o mesmo quadro de horários. """
+        with open(caminho, encoding="utf-8") as arquivo:
+            dados = json.load(arquivo)
+        if dados["paradas"] != quadro.paradas:
+            raise ValueError("Os padrões foram gerados para outro quadro de horários.")
+
+        indice = cls(quadro)
+        for origem, padrao in dados["padroes"].items():
+            indice.padroes[int(origem)] = (array('i', padrao["paradas"]), array('i', padrao["pais"]),
+                                           {int(destino): nos for destino, nos in padrao["finais"].items()})
+        indice._montar_diretas()
+        return indice
+
+class MotorCSA:
+    """
+    Motor de varredura de conexões (Connection Scan Algorithm).
+
+    Cada conexão é um trecho de uma viagem entre duas paradas consecutivas. As conexões ficam
+    em arrays paralelos ordenados pelo horário de partida, e as consultas fazem uma única
+    varredura linear sobre eles, sem fila de prioridade. Para simular uma nova linha basta
+    inserir suas conexões mantendo a ordenação.
+    """
+
+    def __init__(self):
+        self.paradas = []  # índice -> nome da parada
+        self.indice_parada = {}  # nome da parada -> índice
+        self.identificadores_viagem = []  # índice da viagem -> identificador
+        self.partidas = array('d')
+        self.chegadas = array('d')
+        self.origens = array('i')
+        self.destinos = array('i')
+        self.viagens = array('i')
+
+    @classmethod
+    def de_quadro(cls, quadro: QuadroHorarios):
+        """ Gera as conexões de todas as viagens de um `QuadroHorarios`. """
+        quadro.compilar()
+        motor = cls()
+        conexoes = []
+        for rota in range(len(quadro.inicio_paradas_rota) - 1):
+            inicio = quadro.inicio_paradas_rota[rota]
+            numero_paradas = quadro.inicio_paradas_rota[rota + 1] - inicio
+            paradas = [motor._indice(quadro.paradas[p]) for p in quadro.paradas_rota[inicio:inicio + numero_paradas]]
+            for viagem in range(quadro.inicio_viagens_rota[rota], quadro.inicio_viagens_rota[rota + 1]):
+                base = quadro.inicio_horarios_rota[rota] + (viagem - quadro.inicio_viagens_rota[rota]) * numero_paradas
+                indice_viagem = len(motor.identificadores_viagem)
+                motor.identificadores_viagem.append(quadro.identificadores_viagem[viagem])
+                for posicao in range(numero_paradas - 1):
+                    conexoes.append((quadro.partidas[base + posicao], quadro.chegadas[base + posicao + 1],
+                                     paradas[posicao], paradas[posicao + 1], indice_viagem))
+
+        conexoes.sort()
+        for partida, chegada, origem, destino, viagem in conexoes:
+            motor.partidas.append(partida)
+            motor.chegadas.append(chegada)
+            motor.origens.append(origem)
+            motor.destinos.append(destino)
+            motor.viagens.append(viagem)
+        return motor
+
+    def _indice(self, parada: str):
+        if parada not in self.indice_parada:
+            self.indice_parada[parada] = len(self.paradas)
+            self.paradas.append(parada)
+        return self.indice_parada[parada]
+
+    def adicionar_viagem(self, paradas, chegadas, partidas=None, identificador=None):
+        """
+        Insere as conexões de uma nova viagem (por exemplo, de uma linha em planejamento)
+        nas posições corretas dos arrays ordenados.
+        """
+        if partidas is None:
+            partidas = chegadas
+        if len(paradas) < 2 or not len(paradas) == len(chegadas) == len(partidas):
+            raise ValueError("Uma viagem precisa de ao menos duas paradas e um horário para cada uma.")
+
+        viagem = len(self.identificadores_viagem)
+        self.identificadores_viagem.append(identificador if identificador is not None else f"viagem {viagem}")
+        for posicao in range(len(paradas) - 1):
+            partida = float(partidas[posicao])
+            indice = bisect_right(self.partidas, partida)
+            self.partidas.insert(indice, partida)
+            self.chegadas.insert(indice, float(chegadas[posicao + 1]))
+            self.origens.insert(indice, self._indice(paradas[posicao]))
+            self.destinos.insert(indice, self._indice(paradas[posicao + 1]))
+            self.viagens.insert(indice, viagem)
+
+    def chegada_mais_cedo(self, origem: str, destino: str, partida: float):
+        """
+        Retorna o horário de chegada mais cedo saindo da origem em `partida` e as pernas da
+        jornada (embarque, desembarque, viagem, partida, chegada).
+        """
+        if origem not in self.indice_parada or destino not in self.indice_parada:
+            return f"Não há trajeto entre {origem} e {destino}."
+
+        indice_origem = self.indice_parada[origem]
+        indice_destino = self.indice_parada[destino]
+        infinito = float('inf')
+        chegada_parada = [infinito] * len(self.paradas)
+        chegada_parada[indice_origem] = partida
+        embarque_viagem = [-1] * len(self.identificadores_viagem)  # conexão em que se embarcou
+        entrada_parada = [None] * len(self.paradas)  # (conexão de embarque, conexão de chegada)
+
+        partidas = self.partidas
+        chegadas = self.chegadas
+        origens = self.origens
+        destinos = self.destinos
+        viagens = self.viagens
+
+        for conexao in range(bisect_left(partidas, partida), len(partidas)):
+            horario = partidas[conexao]
+            if horario >= chegada_parada[indice_destino]:
+                break  # Nenhuma conexão posterior melhora o destino
+            viagem = viagens[conexao]
+            if embarque_viagem[viagem] == -1:
+                if chegada_parada[origens[conexao]] > horario:
+                    continue
+                embarque_viagem[viagem] = conexao
+            if chegadas[conexao] < chegada_parada[destinos[conexao]]:
+                chegada_parada[destinos[conexao]] = chegadas[conexao]
+                entrada_parada[destinos[conexao]] = (embarque_viagem[viagem], conexao)
+
+        if chegada_parada[indice_destino] == infinito:
+            return f"Não há trajeto entre {origem} e {destino}."
+
+        pernas = []
+        parada = indice_destino
+        while parada != indice_origem:
+            embarque, desembarque = entrada_parada[parada]
+            pernas.append((self.paradas[origens[embarque]], self.paradas[parada],
+                           self.identificadores_viagem[viagens[embarque]], partidas[embarque], chegadas[desembarque]))
+            parada = origens[embarque]
+        pernas.reverse()
+        return chegada_parada[indice_destino], pernas
+
+    def partida_mais_tarde(self, origem: str, destino: str, chegada_limite: float):
+        """
+        Retorna o horário mais tarde em que se pode sair da origem e ainda chegar ao destino
+        até `chegada_limite`, varrendo as conexões em ordem decrescente de partida.
+        """
+        if origem not in self.indice_parada or destino not in self.indice_parada:
+            return f"Não há trajeto entre {origem} e {destino}."
+
+        indice_origem = self.indice_parada[origem]
+        infinito = float('inf')
+        saida_parada = [-infinito] * len(self.paradas)  # saída mais tarde que ainda chega a tempo
+        saida_parada[self.indice_parada[destino]] = chegada_limite
+        viagem_util = bytearray(len(self.identificadores_viagem))  # a viagem leva ao destino a tempo
+
+        partidas = self.partidas
+        chegadas = self.chegadas
+        origens = self.origens
+        destinos = self.destinos
+        viagens = self.viagens
+
+        for conexao in range(bisect_right(partidas, chegada_limite) - 1, -1, -1):
+            horario = partidas[conexao]
+            if horario <= saida_parada[indice_origem]:
+                break  # Nenhuma conexão anterior melhora a origem
+            viagem = viagens[conexao]
+            if viagem_util[viagem] or chegadas[conexao] <= saida_parada[destinos[conexao]]:
+                viagem_util[viagem] = 1
+                if horario > saida_parada[origens[conexao]]:
+                    saida_parada[origens[conexao]] = horario
+
+        if saida_parada[indice_origem] == -infinito:
+            return f"Não há trajeto entre {origem} e {destino}."
+        return saida_parada[indice_origem]
+
+    def perfil(self, origem: str, destino: str, inicio: float, fim: float):
+        """
+        Consulta de perfil: calcula, em uma única varredura reversa das conexões, o conjunto de
+        Pareto de pares (partida, chegada) da origem ao destino para partidas entre `inicio` e
+        `fim`. Retorna uma `FuncaoPerfil` que pode ser avaliada em qualquer horário de partida.
+        """
+        if origem not in self.indice_parada or destino not in self.indice_parada:
+            return f"Não há trajeto entre {origem} e {destino}."
+
+        indice_origem = self.indice_parada[origem]
+        indice_destino = self.indice_parada[destino]
+        infinito = float('inf')
+        # Pares de Pareto por parada, anexados em ordem decrescente de partida e de chegada; as
+        # partidas são guardadas negativas, crescentes, para a busca binária das baldeações
+        partidas_parada = [[] for _ in self.paradas]
+        chegadas_parada = [[] for _ in self.paradas]
+        chegada_viagem = [infinito] * len(self.identificadores_viagem)  # chegada ficando no ônibus
+
+        partidas = self.partidas
+        chegadas = self.chegadas
+        origens = self.origens
+        destinos = self.destinos
+        viagens = self.viagens
+
+        for conexao in range(len(partidas) - 1, bisect_left(partidas, inicio) - 1, -1):
+            horario = partidas[conexao]
+            chegada = chegadas[conexao]
+            proxima = destinos[conexao]
+            viagem = viagens[conexao]
+
+            melhor = chegada if proxima == indice_destino else chegada_viagem[viagem]
+            # Baldeação na próxima parada: menor chegada entre os pares que partem depois (o último
+            # anexado com partida >= chegada, ou seja, com -partida <= -chegada)
+            posicao = bisect_right(partidas_parada[proxima], -chegada) - 1
+            if posicao >= 0 and chegadas_parada[proxima][posicao] < melhor:
+                melhor = chegadas_parada[proxima][posicao]
+
+            if melhor == infinito:
+                continue
+            if melhor < chegada_viagem[viagem]:
+                chegada_viagem[viagem] = melhor
+
+            parada = origens[conexao]
+            if not chegadas_parada[parada] or melhor < chegadas_parada[parada][-1]:
+                if partidas_parada[parada] and partidas_parada[parada][-1] == -horario:
+                    partidas_parada[parada].pop()
+                    chegadas_parada[parada].pop()
+                partidas_parada[parada].append(-horario)
+                chegadas_parada[parada].append(melhor)
+
+        # Mantém também o primeiro par depois de `fim`, que atende quem sai no fim da janela
+        saidas = [-partida for partida in reversed(partidas_parada[indice_origem])]
+        quantidade = min(bisect_right(saidas, fim) + 1, len(saidas))
+        return FuncaoPerfil(saidas[:quantidade], chegadas_parada[indice_origem][::-1][:quantidade])
+
+class FuncaoPerfil:
+    """
+    Função degrau com os pares de Pareto (partida, chegada) de uma consulta de perfil.
+    Para um horário de saída, a chegada ótima é a do primeiro par que parte nesse horário ou depois.
+    """
+
+    def __init__(self, partidas, chegadas):
+        self.partidas = array('d', partidas)
+        self.chegadas = array('d', chegadas)
+
+    def __len__(self):
+        return len(self.partidas)
+
+    def avaliar(self, horario: float):
+        """ Retorna o horário de chegada mais cedo saindo no horário informado. """
+        posicao = bisect_left(self.partidas, horario)
+        return self.chegadas[posicao] if posicao < len(self.partidas) else float('inf')
+
+    def duracao(self, horario: float):
+        """ Retorna o tempo total de viagem (espera incluída) saindo no horário informado. """
+        return self.avaliar(horario) - horario
+
+class AvaliadorLinhas:
+    """
+    Avalia linhas candidatas (conjuntos de arestas novas) pela variação do tempo total de
+    viagem ponderado por uma matriz de demanda origem-destino.
+
+    As árvores de menor tempo de todas as origens são calculadas uma única vez. Como arestas
+    novas só podem diminuir tempos, cada candidata é avaliada reparando apenas a região que
+    elas melhoram: a busca parte das extremidades das arestas novas e guarda as melhorias em
+    um dicionário à parte, sem copiar as árvores da linha de base.
+    """
+
+    def __init__(self, grafo: Grafo, demanda):
+        """ `demanda` é um dicionário {(origem, destino): quantidade de viagens}. """
+        self.grafo = grafo
+        self.destinos_origem = {}  # origem -> {destino: quantidade}
+        for (origem, destino), quantidade in demanda.items():
+            self.destinos_origem.setdefault(origem, {})[destino] = quantidade
+        self.arvores = {origem: grafo.dijkstra(origem)[0] for origem in self.destinos_origem}
+
+    def tempo_total(self):
+        """ Tempo total ponderado da linha de base, considerando os pares com trajeto. """
+        total = 0
+        for origem, destinos in self.destinos_origem.items():
+            tempos = self.arvores[origem]
+            for destino, quantidade in destinos.items():
+                if tempos.get(destino, float('inf')) < float('inf'):
+                    total += quantidade * tempos[destino]
+        return total
+
+    def avaliar(self, candidata):
+        """
+        Retorna (variação do tempo total ponderado, pares novos) ao acrescentar as arestas
+        bidirecionais `candidata` = [(origem, destino, tempo), ...] ao grafo.
+        A variação é negativa quando a linha reduz o tempo total. Pares sem trajeto na linha de
+        base que passam a ter um não entram na soma e são contados em `pares novos`.
+        """
+        arestas_novas = {}
+        for origem, destino, tempo in candidata:
+            arestas_novas.setdefault(origem, []).append((destino, tempo))
+            arestas_novas.setdefault(destino, []).append((origem, tempo))
+
+        infinito = float('inf')
+        vertices = self.grafo.vertices
+        variacao = 0
+        pares_novos = 0
+
+        for origem, destinos in self.destinos_origem.items():
+            base = self.arvores[origem]
+            melhorias = {}
+            fila_prioridade = []
+
+            # Sementes: extremidades que as arestas novas melhoram diretamente
+            for bairro, adjacentes in arestas_novas.items():
+                tempo_bairro = base.get(bairro, infinito)
+                if tempo_bairro == infinito:
+                    continue
+                for vizinho, tempo in adjacentes:
+                    novo_tempo = tempo_bairro + tempo
+                    if novo_tempo < melhorias.get(vizinho, base.get(vizinho, infinito)):
+                        melhorias[vizinho] = novo_tempo
+                        heapq.heappush(fila_prioridade, (novo_tempo, vizinho))
+
+            while fila_prioridade:
+                tempo_atual, bairro_atual = heapq.heappop(fila_prioridade)
+                if tempo_atual > melhorias[bairro_atual]:
+                    continue
+                for adjacentes in (vertices.get(bairro_atual, ()), arestas_novas.get(bairro_atual, ())):
+                    for vizinho, peso in adjacentes:
+                        novo_tempo = tempo_atual + peso
+                        if novo_tempo < melhorias.get(vizinho, base.get(vizinho, infinito)):
+                            melhorias[vizinho] = novo_tempo
+                            heapq.heappush(fila_prioridade, (novo_tempo, vizinho))
+
+            for bairro in melhorias.keys() & destinos.keys():
+                if base.get(bairro, infinito) == infinito:
+                    pares_novos += 1
+                else:
+                    variacao += destinos[bairro] * (melhorias[bairro] - base[bairro])
+
+        return variacao, pares_novos
+
+    def avaliar_varias(self, candidatas, processos: int = None):
+        """
+        Avalia várias candidatas em processos paralelos e retorna os resultados na mesma ordem.
+        Cada processo recebe o avaliador (com as árvores da linha de base) uma única vez.
+        Com `processos=1`, a avaliação é feita no próprio processo.
+        """
+        if processos == 1:
+            return [self.avaliar(candidata) for candidata in candidatas]
+        with ProcessPoolExecutor(max_workers=processos, initializer=_iniciar_avaliador, initargs=(self,)) as executor:
+            return list(executor.map(_avaliar_candidata, candidatas))
+
+_avaliador_processo = None
+
+def _iniciar_avaliador(avaliador: AvaliadorLinhas):
+    global _avaliador_processo
+    _avaliador_processo = avaliador
+
+def _avaliar_candidata(candidata):
+    return _avaliador_processo.avaliar(candidata)
+
+def _arvore_csr(inicio, cabecas, custos, origem: int):
+    """
+    Dijkstra sobre arrays CSR (arcos de cada vértice em `inicio[v]:inicio[v + 1]`).
+    Retorna (distâncias, arco anterior de cada vértice, ordem de fixação).
+    """
+    infinito = float('inf')
+    distancias = [infinito] * (len(inicio) - 1)
+    arco_anterior = [-1] * (len(inicio) - 1)
+    ordem = []
+    distancias[origem] = 0
+    fila_prioridade = [(0, origem)]
+
+    while fila_prioridade:
+        distancia_atual, vertice = heapq.heappop(fila_prioridade)
+        if distancia_atual > distancias[vertice]:
+            continue
+        ordem.append(vertice)
+        for arco in range(inicio[vertice], inicio[vertice + 1]):
+            vizinho = cabecas[arco]
+            nova_distancia = distancia_atual + custos[arco]
+            if nova_distancia < distancias[vizinho]:
+                distancias[vizinho] = nova_distancia
+                arco_anterior[vizinho] = arco
+                heapq.heappush(fila_prioridade, (nova_distancia, vizinho))
+
+    return distancias, arco_anterior, ordem
+
+class AtribuicaoTrafego:
+    """
+    Atribuição de tráfego sobre um `Grafo`: carrega uma matriz de demanda origem-destino nas
+    árvores de menor tempo (tudo ou nada) e itera Frank-Wolfe com funções de congestionamento
+    BPR, t = t0 * (1 + alfa * (fluxo / capacidade) ** beta), até o equilíbrio do usuário.
+
+    Cada sentido de aresta vira um arco em arrays CSR. Cada iteração é um lote de buscas de
+    uma origem para todos os vértices sobre esses arrays, que pode ser dividido entre processos.
+    """
+
+    def __init__(self, grafo: Grafo, demanda, capacidades=None, capacidade_padrao: float = 1000,
+                 alfa: float = 0.15, beta: float = 4):
+        """
+        `demanda` é um dicionário {(origem, destino): viagens} e `capacidades`, opcional,
+        {(origem, destino): capacidade} por sentido de aresta.
+        """
+        capacidades = capacidades or {}
+        self.bairros = list(grafo.vertices)
+        indices = {bairro: i for i, bairro in enumerate(self.bairros)}
+
+        self.inicio = array('i', [0])
+        self.caudas = array('i')
+        self.cabecas = array('i')
+        self.tempos_livres = array('d')
+        self.capacidades = array('d')
+        for bairro in self.bairros:
+            for vizinho, tempo in grafo.vertices[bairro]:
+                self.caudas.append(indices[bairro])
+                self.cabecas.append(indices[vizinho])
+                self.tempos_livres.append(tempo)
+                self.capacidades.append(capacidades.get((bairro, vizinho), capacidade_padrao))
+            self.inicio.append(len(self.cabecas))
+
+        self.demanda_origem = {}  # índice da origem -> [(índice do destino, viagens)]
+        for (origem, destino), viagens in demanda.items():
+            self.demanda_origem.setdefault(indices[origem], []).append((indices[destino], viagens))
+        self.alfa = alfa
+        self.beta = beta
+        self.fluxos = None
+        self.gap_relativo = None
+        self.demanda_sem_trajeto = 0  # viagens cujo destino não é alcançável a partir da origem
+
+    def custos(self, fluxos):
+        """ Tempos BPR de cada arco para os fluxos informados. """
+        alfa = self.alfa
+        beta = self.beta
+        return array('d', (t0 * (1 + alfa * (x / c) ** beta)
+                           for t0, x, c in zip(self.tempos_livres, fluxos, self.capacidades)))
+
+    def _abrir_processos(self, processos: int):
+        """
+        Cria o conjunto de processos das cargas em paralelo, cada um recebendo a atribuição (a
+        rede em CSR e a demanda) uma única vez; retorna None se a carga for feita neste processo.
+        """
+        if processos == 1 or len(self.demanda_origem) < 2:
+            return None
+        return ProcessPoolExecutor(max_workers=processos or os.cpu_count() or 1,
+                                   initializer=_iniciar_atribuicao, initargs=(self,))
+
+    def tudo_ou_nada(self, custos, processos: int = 1, executor=None):
+        """
+        Carrega toda a demanda nas árvores de menor custo e retorna o fluxo em cada arco. As
+        viagens sem trajeto ficam de fora e são somadas em `demanda_sem_trajeto`. Com `executor`
+        (de `_abrir_processos`), reaproveita processos já criados, como faz `resolver`.
+        """
+        origens = list(self.demanda_origem)
+        if executor is None:
+            executor = self._abrir_processos(processos)
+            if executor is None:
+                fluxos, self.demanda_sem_trajeto = _carregar_origens(self, custos, origens)
+                return fluxos
+            with executor:
+                return self.tudo_ou_nada(custos, processos, executor)
+
+        processos = processos or os.cpu_count() or 1
+        lotes = [origens[i::processos] for i in range(processos)]
+        fluxos = array('d', bytes(8 * len(self.cabecas)))
+        self.demanda_sem_trajeto = 0
+        for parcial, sem_trajeto in executor.map(_carregar_lote, [(custos, lote) for lote in lotes if lote]):
+            for arco, fluxo in enumerate(parcial):
+                fluxos[arco] += fluxo
+            self.demanda_sem_trajeto += sem_trajeto
+        return fluxos
+
+    def _derivada_beckmann(self, fluxos, direcao, passo: float):
+        """ Derivada da função de Beckmann ao longo de fluxos + passo * direcao. """
+        custos = self.custos([x + passo * d for x, d in zip(fluxos, direcao)])
+        return sum(d * t for d, t in zip(direcao, custos))
+
+    def resolver(self, iteracoes: int = 50, tolerancia: float = 1e-4, processos: int = 1):
+        """
+        Itera Frank-Wolfe até o gap relativo ficar abaixo de `tolerancia` ou esgotar as
+        iterações. O passo é escolhido por bisseção sobre a derivada da função de Beckmann.
+        Retorna {(origem, destino): fluxo} por sentido de aresta; as viagens sem trajeto ficam
+        em `demanda_sem_trajeto`. Os processos são criados uma única vez para todas as iterações.
+        """
+        executor = self._abrir_processos(processos)
+        try:
+            return self._iterar_frank_wolfe(iteracoes, tolerancia, processos, executor)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    def _iterar_frank_wolfe(self, iteracoes: int, tolerancia: float, processos: int, executor):
+        """ Laço de Frank-Wolfe de `resolver`, com as cargas tudo ou nada no `executor` (se houver). """
+        fluxos = self.tudo_ou_nada(self.tempos_livres, processos, executor)
+        for _ in range(iteracoes):
+            custos = self.custos(fluxos)
+            auxiliar = self.tudo_ou_nada(custos, processos, executor)
+
+            custo_atual = sum(t * x for t, x in zip(custos, fluxos))
+            custo_auxiliar = sum(t * y for t, y in zip(custos, auxiliar))
+            self.gap_relativo = (custo_atual - custo_auxiliar) / custo_atual if custo_atual > 0 else 0
+            if self.gap_relativo < tolerancia:
+                break
+
+            direcao = [y - x for x, y in zip(fluxos, auxiliar)]
+            baixo, alto = 0.0, 1.0
+            if self._derivada_beckmann(fluxos, direcao, 1.0) <= 0:
+                baixo = 1.0
+            else:
+                for _ in range(30):
+                    meio = (baixo + alto) / 2
+                    if self._derivada_beckmann(fluxos, direcao, meio) > 0:
+                        alto = meio
+                    else:
+                        baixo = meio
+            fluxos = array('d', (x + baixo * d for x, d in zip(fluxos, direcao)))
+
+        self.fluxos = fluxos
+        return {(self.bairros[self.caudas[arco]], self.bairros[self.cabecas[arco]]): fluxo
+                for arco, fluxo in enumerate(fluxos)}
+
+def _carregar_origens(atribuicao: AtribuicaoTrafego, custos, origens):
+    """
+    Soma, em um array por arco, a carga tudo ou nada das origens informadas. Retorna
+    (fluxos, viagens sem trajeto).
+    """
+    fluxos = array('d', bytes(8 * len(atribuicao.cabecas)))
+    caudas = atribuicao.caudas
+    sem_trajeto = 0
+    for origem in origens:
+        distancias, arco_anterior, ordem = _arvore_csr(atribuicao.inicio, atribuicao.cabecas, custos, origem)
+        carga = [0.0] * len(arco_anterior)
+        for destino, viagens in atribuicao.demanda_origem[origem]:
+            if distancias[destino] == float('inf'):
+                sem_trajeto += viagens
+                continue
+            carga[destino] += viagens
+        # Percorre a árvore das folhas para a raiz acumulando a carga nos arcos anteriores
+        for vertice in reversed(ordem):
+            arco = arco_anterior[vertice]
+            if arco != -1 and carga[vertice]:
+                fluxos[arco] += carga[vertice]
+                carga[caudas[arco]] += carga[vertice]
+    return fluxos, sem_trajeto
+
+_atribuicao_processo = None
+
+def _iniciar_atribuicao(atribuicao: AtribuicaoTrafego):
+    global _atribuicao_processo
+    _atribuicao_processo = atribuicao
+
+def _carregar_lote(tarefa):
+    custos, origens = tarefa
+    return _carregar_origens(_atribuicao_processo, custos, origens)
+
+class RedeFrequencias:
+    """
+    Rede de linhas operadas por intervalo (headway) em vez de quadro de horários.
+
+    Segue o modelo de Spiess e Florian: cada linha tem um nó próprio em cada parada; o arco de
+    embarque (parada -> nó da linha) tem a frequência da linha, o arco de viagem liga nós
+    consecutivos da linha e o arco de desembarque volta à parada. Arcos de viagem, desembarque
+    e caminhada não têm espera (frequência infinita). Os arcos ficam em arrays paralelos.
+    """
+
+    def __init__(self, alfa: float = 1.0):
+        """
+        `alfa` define a espera média como alfa / frequência combinada das linhas atrativas:
+        1.0 para chegadas aleatórias (exponenciais) e 0.5 para intervalos regulares.
+        """
+        self.alfa = alfa
+        self.nos = []  # índice do nó -> nome da parada ou (linha, parada)
+        self.indice_parada = {}
+        self.caudas = array('i')
+        self.cabecas = array('i')
+        self.custos = array('d')
+        self.frequencias = array('d')
+        self.linhas_arco = []  # nome da linha nos arcos de embarque e de viagem, None nos demais
+        self._entrada = None  # CSR de arcos de entrada, gerado sob demanda
+
+    def _parada(self, nome: str):
+        if nome not in self.indice_parada:
+            self.indice_parada[nome] = len(self.nos)
+            self.nos.append(nome)
+        return self.indice_parada[nome]
+
+    def _arco(self, cauda: int, cabeca: int, custo: float, frequencia: float, linha=None):
+        self.caudas.append(cauda)
+        self.cabecas.append(cabeca)
+        self.custos.append(custo)
+        self.frequencias.append(frequencia)
+        self.linhas_arco.append(linha)
+        self._entrada = None
+
+    def adicionar_linha(self, nome: str, paradas, tempos, intervalo: float):
+        """
+        Adiciona uma linha (em um sentido) que percorre `paradas` com `tempos[k]` minutos entre
+        a parada k e a k + 1, passando a cada `intervalo` minutos.
+        """
+        if len(paradas) < 2 or len(tempos) != len(paradas) - 1:
+            raise ValueError("Uma linha precisa de ao menos duas paradas e um tempo entre cada par.")
+        if not intervalo > 0:
+            raise ValueError("O intervalo entre passagens da linha precisa ser positivo.")
+
+        infinito = float('inf')
+        no_anterior = None
+        for posicao, parada in enumerate(paradas):
+            indice = self._parada(parada)
+            no_linha = len(self.nos)
+            self.nos.append((nome, parada))
+            if posicao < len(paradas) - 1:
+                self._arco(indice, no_linha, 0, 1 / intervalo, nome)  # Embarque
+            if posicao > 0:
+                self._arco(no_linha, indice, 0, infinito)  # Desembarque
+                self._arco(no_anterior, no_linha, tempos[posicao - 1], infinito, nome)  # Viagem
+            no_anterior = no_linha
+
+    def adicionar_caminhada(self, origem: str, destino: str, tempo: float):
+        """ Adiciona uma ligação a pé, nos dois sentidos, entre duas paradas. """
+        self._arco(self._parada(origem), self._parada(destino), tempo, float('inf'))
+        self._arco(self._parada(destino), self._parada(origem), tempo, float('inf'))
+
+    def estrategia_otima(self, destino: str):
+        """
+        Calcula a estratégia ótima (hiperpath) de todas as paradas até o destino.
+
+        Os arcos são processados em ordem crescente de u[cabeça] + custo, por rótulos corrigidos:
+        ao aceitar um arco com frequência, o tempo esperado da cauda vira a média ponderada pelas
+        frequências das linhas atrativas mais a espera alfa / frequência combinada. Quando um arco
+        de um nó é retirado da fila, o rótulo da cabeça já não pode mais diminuir.
+        """
+        if destino not in self.indice_parada:
+            return f"A parada {destino} não existe na rede."
+
+        if self._entrada is None:
+            inicio = [0] * (len(self.nos) + 1)
+            for cabeca in self.cabecas:
+                inicio[cabeca + 1] += 1
+            for no in range(len(self.nos)):
+                inicio[no + 1] += inicio[no]
+            arcos = [0] * len(self.cabecas)
+            proxima = list(inicio)
+            for arco, cabeca in enumerate(self.cabecas):
+                arcos[proxima[cabeca]] = arco
+                proxima[cabeca] += 1
+            self._entrada = (array('i', inicio), array('i', arcos))
+        inicio_entrada, arcos_entrada = self._entrada
+
+        infinito = float('inf')
+        tempos = [infinito] * len(self.nos)
+        frequencias_no = [0.0] * len(self.nos)
+        numeradores = [self.alfa] * len(self.nos)  # alfa + soma de f_a * (u_j + c_a)
+        arco_sem_espera = [-1] * len(self.nos)
+        atrativos = bytearray(len(self.cabecas))
+        processados = bytearray(len(self.cabecas))
+
+        indice_destino = self.indice_parada[destino]
+        tempos[indice_destino] = 0
+        fila_prioridade = [(self.custos[arco], arco)
+                           for arco in arcos_entrada[inicio_entrada[indice_destino]:inicio_entrada[indice_destino + 1]]]
+        heapq.heapify(fila_prioridade)
+
+        while fila_prioridade:
+            chave, arco = heapq.heappop(fila_prioridade)
+            cabeca = self.cabecas[arco]
+            if processados[arco] or chave != tempos[cabeca] + self.custos[arco]:
+                continue  # Arco já aceito ou entrada desatualizada
+            processados[arco] = 1
+
+            cauda = self.caudas[arco]
+            if cauda == indice_destino or chave >= tempos[cauda]:
+                continue
+            frequencia = self.frequencias[arco]
+            if frequencia == infinito:
+                tempos[cauda] = chave
+                frequencias_no[cauda] = infinito
+                arco_sem_espera[cauda] = arco
+            else:
+                numeradores[cauda] += frequencia * chave
+                frequencias_no[cauda] += frequencia
+                tempos[cauda] = numeradores[cauda] / frequencias_no[cauda]
+            atrativos[arco] = 1
+
+            for entrada in arcos_entrada[inicio_entrada[cauda]:inicio_entrada[cauda + 1]]:
+                if not processados[entrada]:
+                    heapq.heappush(fila_prioridade, (tempos[cauda] + self.custos[entrada], entrada))
+
+        return EstrategiaOtima(self, destino, tempos, frequencias_no, arco_sem_espera, atrativos)
+
+class EstrategiaOtima:
+    """ Resultado de `RedeFrequencias.estrategia_otima`: tempos esperados e arcos atrativos. """
+
+    def __init__(self, rede: RedeFrequencias, destino: str, tempos, frequencias_no, arco_sem_espera, atrativos):
+        self.rede = rede
+        self.destino = destino
+        self.tempos = tempos
+        self.frequencias_no = frequencias_no
+        self.arco_sem_espera = arco_sem_espera
+        self.saidas = {}  # nó -> arcos atrativos que saem dele
+        for arco, atrativo in enumerate(atrativos):
+            if atrativo:
+                self.saidas.setdefault(rede.caudas[arco], []).append(arco)
+
+    def _divisao(self, no: int):
+        """ Arcos atrativos que saem do nó, com a fração dos passageiros que segue cada um. """
+        if self.arco_sem_espera[no] != -1:
+            return [(self.arco_sem_espera[no], 1.0)]
+        frequencias = self.rede.frequencias
+        return [(arco, frequencias[arco] / self.frequencias_no[no]) for arco in self.saidas.get(no, [])]
+
+    def tempo_esperado(self, parada: str):
+        """ Tempo esperado (espera incluída) da parada até o destino. """
+        return self.tempos[self.rede.indice_parada[parada]]
+
+    def linhas_atrativas(self, parada: str):
+        """ Linhas que vale a pena embarcar na parada e a probabilidade de embarcar em cada uma. """
+        rede = self.rede
+        return [(rede.linhas_arco[arco], fracao) for arco, fracao in self._divisao(rede.indice_parada[parada])
+                if rede.linhas_arco[arco] is not None]
+
+    def carregar(self, demanda):
+        """
+        Distribui a demanda {parada de origem: passageiros} pela estratégia e retorna o volume
+        em cada trecho de linha, {(linha, de, para): passageiros}. Os nós são percorridos em
+        ordem decrescente de tempo esperado, dividindo o volume pelas frações de embarque.
+        """
+        rede = self.rede
+        volumes_no = [0.0] * len(rede.nos)
+        for parada, passageiros in demanda.items():
+            volumes_no[rede.indice_parada[parada]] += passageiros
+
+        volumes = {}
+        alcancaveis = [no for no in range(len(rede.nos)) if self.tempos[no] < float('inf')]
+        # Em caso de empate, o nó da linha vem antes da parada onde desembarca (arco de custo 0)
+        for no in sorted(alcancaveis, key=lambda no: (self.tempos[no], isinstance(rede.nos[no], tuple)), reverse=True):
+            if not volumes_no[no]:
+                continue
+            for arco, fracao in self._divisao(no):
+                volume = volumes_no[no] * fracao
+                volumes_no[rede.cabecas[arco]] += volume
+                if rede.linhas_arco[arco] is not None and rede.frequencias[arco] == float('inf'):
+                    linha, de = rede.nos[rede.caudas[arco]]
+                    chave = (linha, de, rede.nos[rede.cabecas[arco]][1])
+                    volumes[chave] = volumes.get(chave, 0) + volume
+        return volumes
+
+def _ler_csv_gtfs(arquivo_zip, nome: str):
+    """ Gera as linhas de um arquivo do feed GTFS como dicionários, lendo o arquivo em fluxo. """
+    with arquivo_zip.open(nome) as bruto:
+        yield from csv.DictReader(io.TextIOWrapper(bruto, encoding='utf-8-sig', newline=''))
+
+def _horario_gtfs(texto: str):
+    """ Converte HH:MM:SS (as horas podem passar de 24) em minutos desde a meia-noite. """
+    horas, minutos, segundos = texto.strip().split(':')
+    return int(horas) * 60 + int(minutos) + int(segundos) / 60
+
+def _servicos_ativos(arquivo_zip, data: date):
+    """ Retorna os service_id que operam na data, segundo calendar.txt e calendar_dates.txt. """
+    nomes = set(arquivo_zip.namelist())
+    dias_semana = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+    texto_data = data.strftime('%Y%m%d')
+    servicos = set()
+
+    if 'calendar.txt' in nomes:
+        for linha in _ler_csv_gtfs(arquivo_zip, 'calendar.txt'):
+            if linha['start_date'] <= texto_data <= linha['end_date'] and linha[dias_semana[data.weekday()]] == '1':
+                servicos.add(linha['service_id'])
+    if 'calendar_dates.txt' in nomes:
+        for linha in _ler_csv_gtfs(arquivo_zip, 'calendar_dates.txt'):
+            if linha['date'] == texto_data:
+                if linha['exception_type'] == '1':
+                    servicos.add(linha['service_id'])
+                else:
+                    servicos.discard(linha['service_id'])
+    return servicos
+
+def ler_viagens_gtfs(caminho: str, data: Optional[date] = None):
+    """
+    Percorre um feed GTFS compactado e gera, viagem a viagem,
+    (identificador, paradas, chegadas, partidas), com horários em minutos.
+
+    `stop_times.txt` é lido em fluxo, sem carregá-lo inteiro na memória; para isso as linhas
+    de uma mesma viagem precisam estar contíguas, como os produtores de feeds fazem na prática.
+    Com `data`, só entram as viagens cujos serviços operam naquele dia.
+    """
+    with zipfile.ZipFile(caminho) as arquivo_zip:
+        servicos = _servicos_ativos(arquivo_zip, data) if data is not None else None
+        nomes_linha = {}
+        for linha in _ler_csv_gtfs(arquivo_zip, 'routes.txt'):
+            nomes_linha[linha['route_id']] = linha.get('route_short_name') or linha.get('route_long_name') or linha['route_id']
+        linhas_viagem = {}
+        for linha in _ler_csv_gtfs(arquivo_zip, 'trips.txt'):
+            if servicos is None or linha['service_id'] in servicos:
+                linhas_viagem[linha['trip_id']] = nomes_linha.get(linha['route_id'], linha['route_id'])
+
+        viagens_lidas = set()
+        viagem_atual = None
+        horarios = []
+
+        def viagem_completa():
+            horarios.sort()
+            return (f"{linhas_viagem[viagem_atual]} {viagem_atual}", [h[1] for h in horarios],
+                    [h[2] for h in horarios], [h[3] for h in horarios])
+
+        for linha in _ler_csv_gtfs(arquivo_zip, 'stop_times.txt'):
+            viagem = linha['trip_id']
+            if viagem != viagem_atual:
+                if viagem_atual in linhas_viagem and len(horarios) > 1:
+                    yield viagem_completa()
+                if viagem in viagens_lidas:
+                    raise ValueError(f"stop_times.txt precisa ter as linhas da viagem {viagem} contíguas.")
+                viagens_lidas.add(viagem)
+                viagem_atual = viagem
+                horarios = []
+            if viagem not in linhas_viagem or not linha['arrival_time'].strip():
+                continue  # Viagem fora do calendário ou parada sem horário (interpolada)
+            horarios.append((int(linha['stop_sequence']), linha['stop_id'],
+                             _horario_gtfs(linha['arrival_time']), _horario_gtfs(linha['departure_time'])))
+
+        if viagem_atual in linhas_viagem and len(horarios) > 1:
+            yield viagem_completa()
+
+def importar_gtfs_quadro(caminho: str, data: Optional[date] = None):
+    """ Monta um `QuadroHorarios` (paradas identificadas pelo stop_id) a partir de um feed GTFS. """
+    quadro = QuadroHorarios()
+    for identificador, paradas, chegadas, partidas in ler_viagens_gtfs(caminho, data):
+        quadro.adicionar_viagem(paradas, chegadas, partidas, identificador)
+    return quadro
+
+def importar_gtfs_grafo(caminho: str, data: Optional[date] = None, intervalo: float = 60):
+    """
+    Monta um `Grafo` dependente do tempo a partir de um feed GTFS.
+
+    Cada par de paradas consecutivas vira uma aresta direcionada cujo tempo, em cada faixa de
+    `intervalo` minutos, é a média dos tempos de viagem observados nas partidas daquela faixa.
+    Os pontos ficam no centro das faixas e são ajustados, se preciso, para manter a função FIFO.
+    """
+    acumulados = {}  # (origem, destino) -> {faixa: [soma dos tempos, quantidade]}
+    for _, paradas, chegadas, partidas in ler_viagens_gtfs(caminho, data):
+        for i in range(len(paradas) - 1):
+            faixas = acumulados.setdefault((paradas[i], paradas[i + 1]), {})
+            acumulado = faixas.setdefault(int(partidas[i] // intervalo), [0.0, 0])
+            acumulado[0] += chegadas[i + 1] - partidas[i]
+            acumulado[1] += 1
+
+    grafo = Grafo()
+    for (origem, destino), faixas in acumulados.items():
+        horarios = []
+        tempos = []
+        for faixa in sorted(faixas):
+            soma, quantidade = faixas[faixa]
+            horario = (faixa + 0.5) * intervalo
+            tempo = soma / quantidade
+            if tempos and tempo < tempos[-1] - (horario - horarios[-1]):
+                tempo = tempos[-1] - (horario - horarios[-1])  # Mantém a função FIFO
+            horarios.append(horario)
+            tempos.append(tempo)
+        grafo.adicionar_aresta_dependente_tempo(origem, destino, horarios, tempos, bidirecional=False)
+    return grafo
 
 # Teste do Algoritmo
 if __name__ == "__main__":
@@ -84,3 +1987,96 @@ if __name__ == "__main__":
 
     print(f"\n🚌 **Menor trajeto de {origem} até {destino}:** {caminho}")
     print(f"⏱ **Tempo total de deslocamento:** {tempo_total} minutos")
+
+    # Bairros alcançáveis em até 10 e 15 minutos, calculados em uma única busca
+    limites = [10, 15]
+    alcancados, tempos_isocrona, faixas, fronteiras = grafo.isocrona(origem, limites)
+    for indice, limite in enumerate(limites):
+        dentro = [bairro for bairro, faixa in zip(alcancados, faixas) if faixa <= indice]
+        print(f"\n🗺 **Até {limite} minutos:** {dentro} (arestas de saída: {fronteiras[indice]})")
+
+    # Tempo de deslocamento variando com o horário (pico da manhã entre 7h e 9h)
+    grafo.adicionar_aresta_dependente_tempo("Bairro A", "Bairro F", [360, 450, 540], [6, 25, 6])
+    grafo.adicionar_aresta_dependente_tempo("Bairro F", "Bairro E", [360, 450, 540], [6, 15, 6])
+    for partida in (360, 450):
+        caminho, duracao = grafo.menor_caminho_dependente_tempo(origem, destino, partida)
+        print(f"\n🕖 **Saindo às {partida // 60:02d}:{partida % 60:02d}:** {caminho} ({duracao:.1f} minutos)")
+
+    # Quadro de horários gerado a partir do grafo: uma linha passando por A, C, D e outra por C, E
+    quadro = QuadroHorarios.de_grafo(grafo, inicio=360, fim=480, intervalo=15,
+                                     linhas=[["Bairro A", "Bairro C", "Bairro D"], ["Bairro C", "Bairro E"]])
+    chegada, jornada = Raptor(quadro).chegada_mais_cedo(origem, destino, 370, max_transferencias=2)
+    print(f"\n🚏 **RAPTOR saindo às 06:10:** chegada às {int(chegada) // 60:02d}:{int(chegada) % 60:02d}")
+    for embarque, desembarque, viagem, saida, chegada_perna in jornada:
+        print(f"➡️ {viagem}: {embarque} ({saida:g}) → {desembarque} ({chegada_perna:g})")
+
+    # Padrões de baldeação pré-computados: a consulta só avalia as sequências de baldeação ótimas
+    padroes = PadroesBaldeacao(quadro)
+    padroes.precomputar(max_transferencias=2, inicio=360, fim=480)
+    chegada, padrao = padroes.consultar(origem, destino, 370)
+    print(f"🧭 **Padrão de baldeação:** {padrao} (chegada em {chegada:g} min)")
+
+    # Mesma consulta pela varredura de conexões, antes e depois de simular uma linha nova
+    motor = MotorCSA.de_quadro(quadro)
+    print(f"\n🔎 **CSA saindo às 06:10:** chegada em {motor.chegada_mais_cedo(origem, destino, 370)[0]:g} min")
+    motor.adicionar_viagem(["Bairro A", "Bairro E"], [372, 384], identificador="linha expressa")
+    print(f"🆕 **Com a linha expressa:** chegada em {motor.chegada_mais_cedo(origem, destino, 370)[0]:g} min")
+    print(f"⏰ **Saída mais tarde para chegar até 07:00:** {motor.partida_mais_tarde(origem, destino, 420):g} min")
+
+    # Perfil: melhor chegada para qualquer saída entre 06:00 e 07:00, em uma única varredura
+    funcao = motor.perfil(origem, destino, 360, 420)
+    print(f"\n📈 **Partidas ótimas entre 06:00 e 07:00:** {list(zip(funcao.partidas, funcao.chegadas))}")
+    print(f"⏱ **Saindo às 06:20:** {funcao.duracao(380):g} minutos até {destino}")
+
+    # Avaliação de linhas candidatas pela variação do tempo total ponderado pela demanda
+    demanda = {("Bairro A", "Bairro E"): 120, ("Bairro B", "Bairro E"): 80, ("Bairro A", "Bairro D"): 60}
+    avaliador = AvaliadorLinhas(grafo, demanda)
+    candidatas = [[("Bairro A", "Bairro D", 8)], [("Bairro B", "Bairro E", 6)]]
+    print(f"\n📊 **Tempo total atual:** {avaliador.tempo_total():g} minutos")
+    for candidata, (variacao, _) in zip(candidatas, avaliador.avaliar_varias(candidatas, processos=2)):
+        print(f"➡️ {candidata}: {variacao:+g} minutos")
+
+    # Atribuição de tráfego: equilíbrio do usuário com congestionamento BPR
+    atribuicao = AtribuicaoTrafego(grafo, demanda, capacidade_padrao=100)
+    fluxos = atribuicao.resolver(iteracoes=100)
+    print(f"\n🚦 **Fluxos no equilíbrio (gap relativo {atribuicao.gap_relativo:.1e}):**")
+    for (de, para), fluxo in fluxos.items():
+        if fluxo > 0.5:
+            print(f"➡️ {de} → {para}: {fluxo:.0f} viagens")
+    if atribuicao.demanda_sem_trajeto:
+        print(f"⚠️ **Viagens sem trajeto:** {atribuicao.demanda_sem_trajeto:g}")
+
+    # Roteamento por confiabilidade: o trajeto por F é mais rápido em média, mas tem cauda longa
+    confiavel = Grafo()
+    confiavel.adicionar_amostras_tempo("Bairro A", "Bairro F", [8] * 16 + [40] * 4)
+    confiavel.adicionar_amostras_tempo("Bairro F", "Bairro E", [5] * 20)
+    confiavel.adicionar_amostras_tempo("Bairro A", "Bairro C", [14, 15, 16, 15] * 5)
+    confiavel.adicionar_amostras_tempo("Bairro C", "Bairro E", [5] * 20)
+    print(f"\n🎲 **Menor tempo médio:** {confiavel.menor_caminho(origem, destino)}")
+    print(f"🛡 **Menor tempo no percentil 85:** {confiavel.menor_caminho_percentil(origem, destino, 85)}")
+
+    # Linhas por frequência: estratégia ótima considerando a espera pela primeira linha atrativa
+    rede = RedeFrequencias()
+    rede.adicionar_linha("Tronco", ["Bairro A", "Bairro C", "Bairro E"], [15, 5], intervalo=6)
+    rede.adicionar_linha("Expressa", ["Bairro A", "Bairro E"], [12], intervalo=20)
+    estrategia = rede.estrategia_otima(destino)
+    print(f"\n🔁 **Tempo esperado de {origem} até {destino}:** {estrategia.tempo_esperado(origem):.1f} minutos")
+    for linha, probabilidade in estrategia.linhas_atrativas(origem):
+        print(f"➡️ {linha}: embarca em {probabilidade:.0%} das vezes")
+
+    # Trajeto a pé + ônibus: caminhada só no início, no fim e nas baldeações entre paradas próximas
+    ruas = Grafo()
+    ruas.adicionar_aresta("Casa", "Bairro A", 300)
+    ruas.adicionar_aresta("Bairro E", "Trabalho", 450)
+    ruas.adicionar_aresta("Casa", "Trabalho", 4000)
+    multimodal = RedeMultimodal(quadro, ruas)
+    chegada, pernas = multimodal.menor_trajeto("Casa", "Trabalho", 365, distancia_maxima_caminhada=800)
+    print(f"\n🚶 **Casa → Trabalho a pé + ônibus:** chegada em {chegada:g} min")
+    for de, para, modo, saida, chegada_perna in pernas:
+        print(f"➡️ {modo}: {de} ({saida:g}) → {para} ({chegada_perna:g})")
+
+    # Árvore de menores caminhos exportada em arrays: todos os caminhos saem de uma única busca
+    arvore = grafo.arvore_caminhos("Bairro A")
+    print("\n🌳 **Caminhos a partir do Bairro A (árvore exportada):**")
+    for destino_arvore, caminho_arvore in arvore.caminhos():
+        print(f"➡️ {destino_arvore}: {caminho_arvore}")
@@ -1,17 +1,27 @@
 import heapq
+from array import array
+
+from busca_comum import ArvoreCaminhos, area_busca, reconstruir_caminho
 
 class RedeAerea:
     """ Representação da rede de aeroportos e distâncias diretas entre eles. """
 
     def __init__(self):
         self.aeroportos = {}
+        self.indices = {}  # aeroporto -> posição nos arrays das buscas
+        self.nomes = []  # posição -> aeroporto
+
+    def _registrar_aeroporto(self, aeroporto: str):
+        """ Cria o aeroporto, se ainda não existir, e lhe atribui uma posição nos arrays das buscas. """
+        if aeroporto not in self.aeroportos:
+            self.aeroportos[aeroporto] = []
+            self.indices[aeroporto] = len(self.nomes)
+            self.nomes.append(aeroporto)
 
     def adicionar_rota(self, origem: str, destino: str, distancia: float):
         """ Adiciona uma conexão direta entre dois aeroportos. """
-        if origem not in self.aeroportos:
-            self.aeroportos[origem] = []
-        if destino not in self.aeroportos:
-            self.aeroportos[destino] = []
+        self._registrar_aeroporto(origem)
+        self._registrar_aeroporto(destino)
 
         self.aeroportos[origem].append((destino, distancia))
         self.aeroportos[destino].append((origem, distancia))  # Grafo não-direcionado
@@ -21,43 +31,86 @@ class RedeAerea:
         Aplica o Algoritmo de Dijkstra para encontrar a menor distância
         entre o aeroporto de origem e os demais da rede.
         """
-        distancias = {aeroporto: float('inf') for aeroporto in self.aeroportos}
-        distancias[origem] = 0
-        caminho_anterior = {aeroporto: None for aeroporto in self.aeroportos}
+        area = self._buscar(origem)
+        distancias = {}
+        caminho_anterior = {}
+        for aeroporto, indice in self.indices.items():
+            if area.alcancado(indice):
+                distancias[aeroporto] = area.distancias[indice]
+                anterior = area.anteriores[indice]
+                caminho_anterior[aeroporto] = self.nomes[anterior] if anterior >= 0 else None
+            else:
+                distancias[aeroporto] = float('inf')
+                caminho_anterior[aeroporto] = None
+
+        return distancias, caminho_anterior
 
-        fila_prioridade = [(0, origem)]  # (distância acumulada, aeroporto)
+    def _buscar(self, origem: str, destino: str = None, ordem=None):
+        """
+        Dijkstra sobre a área de trabalho da thread, parando assim que o destino (se houver)
+        é fixado; com `ordem`, anota nela as posições na ordem em que são fixadas. Retorna a
+        área: as posições alcançadas guardam a distância e o anterior.
+        """
+        indices = self.indices
+        nomes = self.nomes
+        area = area_busca()
+        area.reiniciar(len(nomes))
+        distancias = area.distancias
+        anteriores = area.anteriores
+        carimbos = area.carimbos
+        geracao = area.geracao
+
+        indice_origem = indices[origem]
+        indice_destino = indices[destino] if destino is not None else -1
+        distancias[indice_origem] = 0
+        anteriores[indice_origem] = -1
+        carimbos[indice_origem] = geracao
+
+        fila_prioridade = [(0, indice_origem)]  # (distância acumulada, posição)
 
         while fila_prioridade:
-            distancia_atual, aeroporto_atual = heapq.heappop(fila_prioridade)
+            distancia_atual, indice_atual = heapq.heappop(fila_prioridade)
 
-            if distancia_atual > distancias[aeroporto_atual]:
+            if distancia_atual > distancias[indice_atual]:
                 continue
+            if ordem is not None:
+                ordem.append(indice_atual)
+            if indice_atual == indice_destino:
+                break  # Destino fixado: o restante da rede não interessa
 
-            for vizinho, peso in self.aeroportos[aeroporto_atual]:
+            for vizinho, peso in self.aeroportos[nomes[indice_atual]]:
+                indice_vizinho = indices[vizinho]
                 nova_distancia = distancia_atual + peso
-                if nova_distancia < distancias[vizinho]:
-                    distancias[vizinho] = nova_distancia
-                    caminho_anterior[vizinho] = aeroporto_atual
-                    heapq.heappush(fila_prioridade, (nova_distancia, vizinho))
+                if carimbos[indice_vizinho] != geracao or nova_distancia < distancias[indice_vizinho]:
+                    distancias[indice_vizinho] = nova_distancia
+                    anteriores[indice_vizinho] = indice_atual
+                    carimbos[indice_vizinho] = geracao
+                    heapq.heappush(fila_prioridade, (nova_distancia, indice_vizinho))
 
-        return distancias, caminho_anterior
+        return area
+
+    def arvore_caminhos(self, origem: str):
+        """
+        Calcula a árvore de menores caminhos a partir da origem e a exporta em arrays compactos
+        (`ArvoreCaminhos`), de onde se extraem os caminhos até quaisquer destinos.
+        """
+        ordem = array('i')
+        area = self._buscar(origem, ordem=ordem)
+        return ArvoreCaminhos.da_area(self.nomes, self.indices, area, ordem)
 
     def menor_rota(self, origem: str, destino: str):
         """
         Retorna o menor caminho entre dois aeroportos e a distância total.
         """
-        distancias, caminho_anterior = self.dijkstra(origem)
+        area = self._buscar(origem, destino)
+        indice_destino = self.indices[destino]
 
-        if distancias[destino] == float('inf'):
+        if not area.alcancado(indice_destino):
             return f"Não há rota entre {origem} e {destino}."
 
-        caminho = []
-        aeroporto_atual = destino
-        while aeroporto_atual:
-            caminho.insert(0, aeroporto_atual)
-            aeroporto_atual = caminho_anterior[aeroporto_atual]
+        caminho = reconstruir_caminho(self.nomes, area.anteriores, indice_destino)
 
-        return caminho, distancias[destino]
+        return caminho, area.distancias[indice_destino]
 
 # Teste do Algoritmo
 if __name__ == "__main__":
@@ -84,3 +137,9 @@ if __name__ == "__main__":
 
     print(f"\n✈️ **Melhor rota de {origem} até {destino}:** {caminho}")
     print(f"📏 **Distância total:** {distancia_total} km")
+
+    # Árvore de menores caminhos exportada em arrays: todos os caminhos saem de uma única busca
+    arvore = rede.arvore_caminhos("GRU")
+    print("\n🌳 **Caminhos a partir de GRU (árvore exportada):**")
+    for destino_arvore, caminho_arvore in arvore.caminhos():
+        print(f"➡️ {destino_arvore}: {caminho_arvore}")
@@ -1,76 +1,839 @@
 import heapq
+from array import array
+from bisect import bisect_left, bisect_right
+
+from busca_comum import (ArvoreCaminhos as ArvoreCaminhosComum, TabelaArestas, area_busca, caminhos_alternativos,
+                         reconstruir_caminho)
+
+# Restrições das estradas (bits): a estrada fica fechada ao veículo cujo perfil tiver algum bit
+# em comum com as suas restrições
+RESTRICAO_ALTURA = 1
+RESTRICAO_PESO = 2
+RESTRICAO_CARGA_PERIGOSA = 4
 
 class MalhaRodoviaria:
     """ Representação da rede de transporte rodoviário entre cidades. """
 
     def __init__(self):
-        self.cidades = {}
+        self.indices = {}  # cidade -> posição nos arrays das buscas
+        self.nomes = []  # posição -> cidade
+        # Estradas em estrutura de arrays: cada métrica (custo, pedágio, distância...) é uma
+        # coluna da tabela, e as buscas percorrem a visão CSR da métrica pedida. A capacidade
+        # omitida é ilimitada, e não zero, para não fechar a estrada no fluxo de cargas
+        self.estradas = TabelaArestas({"custo": 0.0, "capacidade": float('inf')})
+        self.restricoes_estradas = array('i')  # bits RESTRICAO_* de cada estrada
+        self._perfis_preparados = set()  # perfis de veículo com visão CSR própria
+
+    @property
+    def cidades(self):
+        """ Lista de adjacência {cidade: [(vizinha, custo)]} montada a partir das estradas, só para leitura. """
+        return self.estradas.adjacencias(self.nomes, ["custo"])
 
-    def adicionar_estrada(self, origem: str, destino: str, custo: float):
-        """ Adiciona uma conexão entre duas cidades com um custo associado. """
-        if origem not in self.cidades:
-            self.cidades[origem] = []
-        if destino not in self.cidades:
-            self.cidades[destino] = []
+    def _registrar_cidade(self, cidade: str):
+        """ Cria a cidade, se ainda não existir, e lhe atribui uma posição nos arrays das buscas. """
+        if cidade not in self.indices:
+            self.indices[cidade] = len(self.nomes)
+            self.nomes.append(cidade)
 
-        self.cidades[origem].append((destino, custo))
-        self.cidades[destino].append((origem, custo))  # Grafo não-direcionado
+    def adicionar_estrada(self, origem: str, destino: str, custo: float, restricoes: int = 0, **metricas):
+        """
+        Adiciona uma conexão entre duas cidades com um custo associado. Outras métricas da
+        estrada (por exemplo `pedagio=...`, `combustivel=...`) podem ser informadas por nome;
+        uma métrica omitida, ou nova para as estradas anteriores, fica com o seu valor padrão (0,
+        ou infinito para `capacidade`).
+        `restricoes` combina os bits RESTRICAO_* que fecham a estrada a certos veículos; por ser
+        parâmetro próprio, esse nome não pode ser usado como métrica.
+        """
+        self._registrar_cidade(origem)
+        self._registrar_cidade(destino)
+
+        self.estradas.adicionar(self.indices[origem], self.indices[destino], custo=custo, **metricas)
+        self.restricoes_estradas.append(restricoes)
+
+    def preparar_perfil(self, perfil: int):
+        """
+        Pré-calcula uma visão CSR só com as estradas abertas ao perfil de veículo, para perfis
+        frequentes: as consultas com esse perfil deixam de percorrer os arcos fechados. A visão
+        é refeita automaticamente quando a malha muda.
+        """
+        self._perfis_preparados.add(perfil)
+        self._csr("custo", perfil)
 
-    def dijkstra(self, origem: str):
+    def pesos_metrica(self, metrica="custo"):
+        """
+        Retorna o peso de cada estrada para a métrica pedida: o nome de uma métrica ou uma
+        combinação linear {nome: coeficiente}, calculada coluna a coluna de uma só vez.
+        """
+        return self.estradas.pesos(metrica)
+
+    def _csr(self, metrica="custo", perfil: int = 0):
+        """
+        Visão CSR da malha para a métrica: (inicio, cabecas, pesos, estradas), em que os arcos
+        que saem da posição u ocupam [inicio[u], inicio[u + 1]) e estradas[arco] é a estrada de
+        cada arco. Para um perfil preparado com `preparar_perfil`, a visão já exclui as estradas
+        fechadas a ele; nos demais casos, quem percorre os arcos testa as restrições da estrada.
+        """
+        vista = perfil if perfil in self._perfis_preparados else 0
+        restricoes = self.restricoes_estradas
+        return self.estradas.csr(len(self.nomes), metrica, vista, lambda estrada: not restricoes[estrada] & vista)
+
+    def dijkstra(self, origem: str, metrica="custo", perfil: int = 0):
         """
         Aplica o Algoritmo de Dijkstra para encontrar o menor custo
         entre a cidade de origem e as demais.
         """
-        custos = {cidade: float('inf') for cidade in self.cidades}
-        custos[origem] = 0
-        caminho_anterior = {cidade: None for cidade in self.cidades}
+        area = self._buscar(origem, metrica=metrica, perfil=perfil)
+        custos = {}
+        caminho_anterior = {}
+        for cidade, indice in self.indices.items():
+            if area.alcancado(indice):
+                custos[cidade] = area.distancias[indice]
+                anterior = area.anteriores[indice]
+                caminho_anterior[cidade] = self.nomes[anterior] if anterior >= 0 else None
+            else:
+                custos[cidade] = float('inf')
+                caminho_anterior[cidade] = None
+
+        return custos, caminho_anterior
+
+    def _buscar(self, origem: str, destino: str = None, ordem=None, metrica="custo", perfil: int = 0):
+        """
+        Dijkstra sobre a visão CSR da métrica e a área de trabalho da thread, parando assim que
+        o destino (se houver) é fixado; com `ordem`, anota nela as posições na ordem em que são
+        fixadas. Estradas fechadas ao `perfil` do veículo são ignoradas. Retorna a área: as
+        posições alcançadas guardam o custo e o anterior.
+        """
+        indices = self.indices
+        nomes = self.nomes
+        inicio, cabecas, pesos, estradas = self._csr(metrica, perfil)
+        restricoes = self.restricoes_estradas
+        area = area_busca()
+        area.reiniciar(len(nomes))
+        distancias = area.distancias
+        anteriores = area.anteriores
+        carimbos = area.carimbos
+        geracao = area.geracao
 
-        fila_prioridade = [(0, origem)]  # (custo acumulado, cidade)
+        indice_origem = indices[origem]
+        indice_destino = indices[destino] if destino is not None else -1
+        distancias[indice_origem] = 0
+        anteriores[indice_origem] = -1
+        carimbos[indice_origem] = geracao
+
+        fila_prioridade = [(0, indice_origem)]  # (custo acumulado, posição)
 
         while fila_prioridade:
-            custo_atual, cidade_atual = heapq.heappop(fila_prioridade)
+            custo_atual, indice_atual = heapq.heappop(fila_prioridade)
 
-            if custo_atual > custos[cidade_atual]:
+            if custo_atual > distancias[indice_atual]:
                 continue
+            if ordem is not None:
+                ordem.append(indice_atual)
+            if indice_atual == indice_destino:
+                break  # Destino fixado: o restante da rede não interessa
 
-            for vizinho, custo_viagem in self.cidades[cidade_atual]:
-                novo_custo = custo_atual + custo_viagem
-                if novo_custo < custos[vizinho]:
-                    custos[vizinho] = novo_custo
-                    caminho_anterior[vizinho] = cidade_atual
-                    heapq.heappush(fila_prioridade, (novo_custo, vizinho))
+            for arco in range(inicio[indice_atual], inicio[indice_atual + 1]):
+                if perfil and restricoes[estradas[arco]] & perfil:
+                    continue  # Estrada fechada a este veículo
+                indice_vizinho = cabecas[arco]
+                novo_custo = custo_atual + pesos[arco]
+                if carimbos[indice_vizinho] != geracao or novo_custo < distancias[indice_vizinho]:
+                    distancias[indice_vizinho] = novo_custo
+                    anteriores[indice_vizinho] = indice_atual
+                    carimbos[indice_vizinho] = geracao
+                    heapq.heappush(fila_prioridade, (novo_custo, indice_vizinho))
 
-        return custos, caminho_anterior
+        return area
 
-    def rota_mais_barata(self, origem: str, destino: str):
+    def arvore_caminhos(self, origem: str, metrica="custo", perfil: int = 0):
+        """
+        Calcula a árvore de menores caminhos a partir da origem e a exporta em arrays compactos
+        (`ArvoreCaminhos`), de onde se extraem os caminhos até quaisquer destinos.
+        """
+        ordem = array('i')
+        area = self._buscar(origem, ordem=ordem, metrica=metrica, perfil=perfil)
+        return ArvoreCaminhos.da_area(self.nomes, self.indices, area, ordem)
+
+    def rota_mais_barata(self, origem: str, destino: str, metrica="custo", perfil: int = 0):
         """
         Retorna o menor caminho e o custo total entre duas cidades.
+        Com `metrica`, minimiza outra métrica das estradas ou uma combinação {nome: coeficiente};
+        com `perfil` (bits RESTRICAO_* do veículo), evita as estradas fechadas a ele.
+        """
+        area = self._buscar(origem, destino, metrica=metrica, perfil=perfil)
+        indice_destino = self.indices[destino]
+
+        if not area.alcancado(indice_destino):
+            return f"Não há rota entre {origem} e {destino}."
+
+        caminho = reconstruir_caminho(self.nomes, area.anteriores, indice_destino)
+
+        return caminho, area.distancias[indice_destino]
+
+    def rotas_pareto(self, origem: str, destino: str, criterios=("pedagio", "combustivel"), perfil: int = 0):
+        """
+        Retorna a fronteira de Pareto entre dois critérios (por padrão, pedágio e combustível):
+        as rotas [(caminho, (total_1, total_2))] em que nenhum critério pode melhorar sem piorar
+        o outro, em ordem crescente do primeiro critério.
+
+        Busca multirrótulo em ordem lexicográfica, guiada por limites inferiores das duas buscas
+        reversas de critério único a partir do destino. Como os rótulos saem da fila com o
+        primeiro critério (mais o seu limite) crescente, os rótulos fixados em cada cidade formam
+        uma lista ordenada em que o segundo critério decresce, e um novo rótulo é dominado se, e
+        só se, não melhorar o menor segundo critério da cidade (teste O(1)). O limite do segundo
+        critério poda os rótulos que não alcançariam a fronteira. Com `perfil`, as estradas
+        fechadas ao veículo ficam de fora.
+        """
+        primeiro, segundo = criterios
+        inicio, cabecas, pesos_primeiro, estradas = self._csr(primeiro, perfil)
+        pesos_segundo = self._csr(segundo, perfil)[2]
+        restricoes = self.restricoes_estradas
+        restantes_primeiro = self.arvore_caminhos(destino, primeiro, perfil).distancias  # Malha não-direcionada
+        restantes_segundo = self.arvore_caminhos(destino, segundo, perfil).distancias
+        indice_origem = self.indices[origem]
+        indice_destino = self.indices[destino]
+
+        if restantes_primeiro[indice_origem] == float('inf'):
+            return f"Não há rota entre {origem} e {destino}."
+
+        melhor_segundo = array('d', [float('inf')]) * len(self.nomes)  # menor segundo critério fixado
+        rotulos_cidade = array('i', [indice_origem])  # rótulo -> posição da cidade
+        rotulos_anterior = array('i', [-1])  # rótulo -> rótulo anterior
+        fila_prioridade = [(restantes_primeiro[indice_origem], 0, 0, 0)]  # (estimativa, segundo, primeiro, rótulo)
+        fronteira = []
+
+        while fila_prioridade:
+            _, valor_segundo, valor_primeiro, rotulo = heapq.heappop(fila_prioridade)
+            indice_atual = rotulos_cidade[rotulo]
+            if valor_segundo >= melhor_segundo[indice_atual]:
+                continue  # Dominado por um rótulo já fixado nesta cidade
+            if valor_segundo + restantes_segundo[indice_atual] >= melhor_segundo[indice_destino]:
+                continue  # Nenhuma extensão melhora a fronteira já encontrada
+            melhor_segundo[indice_atual] = valor_segundo
+
+            if indice_atual == indice_destino:
+                caminho = []
+                while rotulo != -1:
+                    caminho.append(self.nomes[rotulos_cidade[rotulo]])
+                    rotulo = rotulos_anterior[rotulo]
+                caminho.reverse()
+                fronteira.append((caminho, (valor_primeiro, valor_segundo)))
+                continue
+
+            for arco in range(inicio[indice_atual], inicio[indice_atual + 1]):
+                if perfil and restricoes[estradas[arco]] & perfil:
+                    continue
+                indice_vizinho = cabecas[arco]
+                novo_segundo = valor_segundo + pesos_segundo[arco]
+                if novo_segundo >= melhor_segundo[indice_vizinho] or \
+                        novo_segundo + restantes_segundo[indice_vizinho] >= melhor_segundo[indice_destino]:
+                    continue
+                novo_primeiro = valor_primeiro + pesos_primeiro[arco]
+                rotulos_cidade.append(indice_vizinho)
+                rotulos_anterior.append(rotulo)
+                heapq.heappush(fila_prioridade, (novo_primeiro + restantes_primeiro[indice_vizinho], novo_segundo,
+                                                 novo_primeiro, len(rotulos_cidade) - 1))
+
+        return fronteira
+
+    def fluxo_custo_minimo(self, ofertas, metrica="custo", capacidade="capacidade", perfil: int = 0):
+        """
+        Distribui cargas entre depósitos ao menor custo total respeitando a capacidade das
+        estradas. `ofertas` indica, por cidade, a quantidade disponível (positiva) ou pedida
+        (negativa); a capacidade de cada estrada vem da métrica `capacidade` e vale nos dois
+        sentidos. Estradas sem capacidade informada são ilimitadas; uma métrica de capacidade com
+        outro nome precisa ser declarada antes das estradas, com
+        `malha.estradas.declarar_metrica(nome, float('inf'))`, para ter o mesmo padrão.
+
+        Caminhos mínimos sucessivos com potenciais de Johnson sobre um grafo residual em arrays:
+        com os custos reduzidos, que nunca ficam negativos, cada aumento de fluxo é um Dijkstra
+        que para ao fixar o sumidouro. Envia o máximo possível quando ofertas e pedidos não se
+        equilibram. Retorna (fluxos, custo total, quantidade enviada), em que fluxos[e] é o fluxo
+        na estrada e, positivo no sentido em que ela foi cadastrada.
+        """
+        numero_cidades = len(self.nomes)
+        fonte = numero_cidades
+        sumidouro = numero_cidades + 1
+        custos_estrada = self.pesos_metrica(metrica)
+        capacidades_estrada = self.estradas.metricas.get(capacidade)
+        infinito = float('inf')
+
+        # Arcos residuais aos pares (arco, reverso): cada estrada aberta gera um par por sentido,
+        # e cada oferta ou pedido liga a cidade à fonte ou ao sumidouro
+        caudas = array('i')
+        cabecas_arco = array('i')
+        residuos_arco = array('d')
+        custos_arco = array('d')
+
+        def adicionar_par(de: int, para: int, limite: float, custo: float):
+            caudas.extend((de, para))
+            cabecas_arco.extend((para, de))
+            residuos_arco.extend((limite, 0.0))
+            custos_arco.extend((custo, -custo))
+
+        for estrada, restricoes in enumerate(self.restricoes_estradas):
+            if restricoes & perfil:
+                continue
+            u = self.estradas.origens[estrada]
+            v = self.estradas.destinos[estrada]
+            limite = capacidades_estrada[estrada] if capacidades_estrada is not None else infinito
+            adicionar_par(u, v, limite, custos_estrada[estrada])
+            adicionar_par(v, u, limite, custos_estrada[estrada])
+        for cidade, quantidade in ofertas.items():
+            if cidade not in self.indices:
+                raise ValueError(f"Cidade desconhecida: {cidade}.")
+            if quantidade > 0:
+                adicionar_par(fonte, self.indices[cidade], quantidade, 0.0)
+            elif quantidade < 0:
+                adicionar_par(self.indices[cidade], sumidouro, -quantidade, 0.0)
+
+        # Agrupa os arcos pela cauda (CSR), guardando a posição do reverso de cada um
+        inicio = array('i', [0]) * (numero_cidades + 3)
+        for de in caudas:
+            inicio[de + 1] += 1
+        for u in range(numero_cidades + 2):
+            inicio[u + 1] += inicio[u]
+        posicoes = array('i', [0]) * len(caudas)
+        livre = inicio[:-1]
+        for arco, de in enumerate(caudas):
+            posicoes[arco] = livre[de]
+            livre[de] += 1
+        cabecas = array('i', [0]) * len(caudas)
+        residuos = array('d', [0.0]) * len(caudas)
+        custos = array('d', [0.0]) * len(caudas)
+        reversos = array('i', [0]) * len(caudas)
+        for arco, posicao in enumerate(posicoes):
+            cabecas[posicao] = cabecas_arco[arco]
+            residuos[posicao] = residuos_arco[arco]
+            custos[posicao] = custos_arco[arco]
+            reversos[posicao] = posicoes[arco ^ 1]
+
+        potenciais = array('d', [0.0]) * (numero_cidades + 2)  # custos iniciais não-negativos
+        area = area_busca()
+        custo_total = 0.0
+        quantidade_enviada = 0.0
+
+        while True:
+            area.reiniciar(numero_cidades + 2)
+            distancias = area.distancias
+            anteriores = area.anteriores  # arco residual pelo qual cada posição foi alcançada
+            carimbos = area.carimbos
+            geracao = area.geracao
+            distancias[fonte] = 0
+            anteriores[fonte] = -1
+            carimbos[fonte] = geracao
+            fixadas = array('i')
+            fila_prioridade = [(0, fonte)]
+
+            while fila_prioridade:
+                distancia_atual, indice_atual = heapq.heappop(fila_prioridade)
+                if distancia_atual > distancias[indice_atual]:
+                    continue
+                fixadas.append(indice_atual)
+                if indice_atual == sumidouro:
+                    break
+                potencial_atual = potenciais[indice_atual]
+                for arco in range(inicio[indice_atual], inicio[indice_atual + 1]):
+                    if residuos[arco] <= 0:
+                        continue
+                    indice_vizinho = cabecas[arco]
+                    nova_distancia = distancia_atual + custos[arco] + potencial_atual - potenciais[indice_vizinho]
+                    if carimbos[indice_vizinho] != geracao or nova_distancia < distancias[indice_vizinho]:
+                        distancias[indice_vizinho] = nova_distancia
+                        anteriores[indice_vizinho] = arco
+                        carimbos[indice_vizinho] = geracao
+                        heapq.heappush(fila_prioridade, (nova_distancia, indice_vizinho))
+
+            if not fixadas or fixadas[-1] != sumidouro:
+                break  # Nenhuma oferta restante alcança um pedido restante
+
+            # Somar a distância do sumidouro a todos os potenciais não muda os custos reduzidos,
+            # então basta ajustar as posições fixadas (as demais ficam com essa distância)
+            distancia_sumidouro = distancias[sumidouro]
+            for indice in fixadas:
+                potenciais[indice] += distancias[indice] - distancia_sumidouro
+
+            gargalo = infinito
+            indice = sumidouro
+            while indice != fonte:
+                arco = anteriores[indice]
+                gargalo = min(gargalo, residuos[arco])
+                indice = cabecas[reversos[arco]]
+            indice = sumidouro
+            while indice != fonte:
+                arco = anteriores[indice]
+                residuos[arco] -= gargalo
+                residuos[reversos[arco]] += gargalo
+                custo_total += gargalo * custos[arco]
+                indice = cabecas[reversos[arco]]
+            quantidade_enviada += gargalo
+
+        # Fluxo da estrada = o que passou no sentido cadastrado menos o que passou no contrário
+        fluxos = array('d', [0.0]) * len(self.estradas)
+        abertas = 0  # os pares de cada estrada aberta vêm na ordem em que foram criados
+        for estrada, restricoes in enumerate(self.restricoes_estradas):
+            if restricoes & perfil:
+                continue
+            ida = residuos[posicoes[4 * abertas + 1]]
+            volta = residuos[posicoes[4 * abertas + 3]]
+            fluxos[estrada] = ida - volta
+            abertas += 1
+
+        return fluxos, custo_total, quantidade_enviada
+
+    def _custo_trecho(self, origem: int, destino: int, metrica="custo", perfil: int = 0):
+        """ Custo da estrada mais barata, aberta ao perfil, entre duas cidades vizinhas (dadas por posição). """
+        inicio, cabecas, pesos, estradas = self._csr(metrica, perfil)
+        restricoes = self.restricoes_estradas
+        return min(pesos[arco] for arco in range(inicio[origem], inicio[origem + 1])
+                   if cabecas[arco] == destino and not restricoes[estradas[arco]] & perfil)
+
+    def _desvio(self, desvio: int, destino: int, vertices_bloqueados, proximos_bloqueados,
+                restantes, proximos, limite: float, metrica="custo", perfil: int = 0):
+        """
+        Caminho mais barato de `desvio` até `destino` que não passa pelos vértices bloqueados nem
+        sai de `desvio` para os vizinhos em `proximos_bloqueados`, com custo até `limite`.
+
+        `restantes` e `proximos` vêm da árvore de menores caminhos até o destino (sem bloqueios):
+        se o caminho da árvore não toca nenhum bloqueio, ele já é o ótimo; caso contrário, um A*
+        usa `restantes` como heurística exata e consistente (bloquear só aumenta os custos).
+        Retorna (posições do caminho, custo) ou None.
+        """
+        if restantes[desvio] > limite:
+            return None
+
+        # Atalho: o caminho da árvore a partir do desvio evita todos os bloqueios?
+        caminho = [desvio]
+        indice = proximos[desvio]
+        livre = indice not in proximos_bloqueados
+        while livre and indice != -1:
+            if vertices_bloqueados[indice]:
+                livre = False
+            caminho.append(indice)
+            indice = proximos[indice]
+        if livre:
+            return caminho, restantes[desvio]
+
+        inicio, cabecas, pesos, estradas = self._csr(metrica, perfil)
+        restricoes = self.restricoes_estradas
+        area = area_busca()
+        area.reiniciar(len(self.nomes))
+        custos = area.distancias
+        anteriores = area.anteriores
+        carimbos = area.carimbos
+        geracao = area.geracao
+        custos[desvio] = 0
+        anteriores[desvio] = -1
+        carimbos[desvio] = geracao
+        fila_prioridade = [(restantes[desvio], 0, desvio)]  # (custo + estimativa, custo, posição)
+
+        while fila_prioridade:
+            _, custo_atual, indice_atual = heapq.heappop(fila_prioridade)
+            if custo_atual > custos[indice_atual]:
+                continue
+            if indice_atual == destino:
+                caminho = []
+                while indice_atual != -1:
+                    caminho.append(indice_atual)
+                    indice_atual = anteriores[indice_atual]
+                caminho.reverse()
+                return caminho, custo_atual
+
+            for arco in range(inicio[indice_atual], inicio[indice_atual + 1]):
+                if perfil and restricoes[estradas[arco]] & perfil:
+                    continue  # Estrada fechada a este veículo
+                indice_vizinho = cabecas[arco]
+                if vertices_bloqueados[indice_vizinho] or \
+                        (indice_atual == desvio and indice_vizinho in proximos_bloqueados):
+                    continue
+                novo_custo = custo_atual + pesos[arco]
+                estimativa = novo_custo + restantes[indice_vizinho]
+                if estimativa > limite:
+                    continue  # Não entraria entre as k melhores rotas
+                if carimbos[indice_vizinho] != geracao or novo_custo < custos[indice_vizinho]:
+                    custos[indice_vizinho] = novo_custo
+                    anteriores[indice_vizinho] = indice_atual
+                    carimbos[indice_vizinho] = geracao
+                    heapq.heappush(fila_prioridade, (estimativa, novo_custo, indice_vizinho))
+
+        return None
+
+    def k_rotas_mais_baratas(self, origem: str, destino: str, k: int, metrica="custo", perfil: int = 0):
+        """
+        Retorna as k rotas simples mais baratas entre duas cidades, como [(caminho, custo)] em
+        ordem crescente de custo (algoritmo de Yen), sem alterar a malha. Com `metrica`, o custo
+        é outra métrica das estradas ou uma combinação {nome: coeficiente}; com `perfil`, as
+        estradas fechadas ao veículo ficam de fora.
+
+        Uma única árvore de menores caminhos até o destino é reaproveitada em todos os desvios,
+        como atalho e como heurística do A*, e cada desvio é podado pelo custo da k-ésima melhor
+        candidata já conhecida.
+        """
+        arvore = self.arvore_caminhos(destino, metrica, perfil)  # Malha não-direcionada: árvore até o destino
+        restantes = arvore.distancias
+        proximos = arvore.anteriores
+        indice_origem = self.indices[origem]
+        indice_destino = self.indices[destino]
+
+        if restantes[indice_origem] == float('inf'):
+            return f"Não há rota entre {origem} e {destino}."
+
+        primeira = [indice_origem]
+        while primeira[-1] != indice_destino:
+            primeira.append(proximos[primeira[-1]])
+        rotas = [(restantes[indice_origem], primeira)]
+        candidatas = []  # heap de (custo, caminho)
+        vistas = {tuple(primeira)}
+        vertices_bloqueados = bytearray(len(self.nomes))
+
+        while len(rotas) < k:
+            _, ultima = rotas[-1]
+            custo_raiz = 0
+            for i in range(len(ultima) - 1):
+                desvio = ultima[i]
+                raiz = ultima[:i + 1]
+                proximos_bloqueados = {caminho[i + 1] for _, caminho in rotas if caminho[:i + 1] == raiz}
+
+                # Limite: custo da k-ésima melhor rota conhecida (rotas fixadas + candidatas)
+                faltam = k - len(rotas)
+                limite = float('inf')
+                if len(candidatas) >= faltam:
+                    limite = heapq.nsmallest(faltam, candidatas)[-1][0]
+
+                desvio_encontrado = self._desvio(desvio, indice_destino, vertices_bloqueados, proximos_bloqueados,
+                                                 restantes, proximos, limite - custo_raiz, metrica, perfil)
+                if desvio_encontrado is not None:
+                    trecho, custo_trecho = desvio_encontrado
+                    caminho = raiz[:-1] + trecho
+                    if tuple(caminho) not in vistas:
+                        vistas.add(tuple(caminho))
+                        heapq.heappush(candidatas, (custo_raiz + custo_trecho, caminho))
+
+                vertices_bloqueados[desvio] = 1  # A raiz não pode ser revisitada nos próximos desvios
+                custo_raiz += self._custo_trecho(desvio, ultima[i + 1], metrica, perfil)
+
+            for indice in ultima:
+                vertices_bloqueados[indice] = 0
+            if not candidatas:
+                break
+            rotas.append(heapq.heappop(candidatas))
+
+        return [([self.nomes[indice] for indice in caminho], custo) for custo, caminho in rotas]
+
+    def rotas_alternativas(self, origem: str, destino: str, quantidade: int = 3, esticamento: float = 0.25,
+                           compartilhamento: float = 0.8, otimalidade_local: float = 0.25,
+                           penalidade: float = 0.5, tentativas: int = 10, metrica="custo", perfil: int = 0):
+        """
+        Retorna até `quantidade` rotas significativamente diferentes entre duas cidades, como
+        [(caminho, custo)] em ordem crescente de custo. Uma alternativa só é aceita se custar no
+        máximo (1 + esticamento) vezes a rota ótima, se o custo das estradas que compartilha com
+        as rotas já escolhidas não passar de `compartilhamento` vezes o custo ótimo e se for
+        localmente ótima em trechos de `otimalidade_local` vezes o custo ótimo.
+
+        As candidatas vêm dos platôs: cadeias de estradas presentes tanto na árvore de menores
+        caminhos a partir da origem quanto na árvore até o destino. Cada platô define uma rota
+        pelos seus vértices, e um platô de comprimento L garante otimalidade local em trechos de
+        até L; depois das duas árvores, todo o processamento é linear. Se ainda faltarem rotas,
+        o método de penalidade encarece as estradas já usadas e repete a busca (até `tentativas`
+        vezes). Com `metrica`, o custo é outra métrica das estradas ou uma combinação delas; com
+        `perfil`, as estradas fechadas ao veículo ficam de fora.
+        """
+        inicio, cabecas, pesos, estradas = self._csr(metrica, perfil)
+        restricoes = self.restricoes_estradas
+        rotas = caminhos_alternativos(
+            self.arvore_caminhos(origem, metrica, perfil),
+            self.arvore_caminhos(destino, metrica, perfil),  # Malha não-direcionada: árvore até o destino
+            lambda indice: ((cabecas[arco], pesos[arco]) for arco in range(inicio[indice], inicio[indice + 1])
+                            if not restricoes[estradas[arco]] & perfil),
+            quantidade, esticamento, compartilhamento, otimalidade_local, penalidade, tentativas)
+        if rotas is None:
+            return f"Não há rota entre {origem} e {destino}."
+        return rotas
+
+class ArvoreCaminhos(ArvoreCaminhosComum):
+    """ Árvore de menores caminhos entre cidades, em que o valor acumulado é o custo. """
+
+    def custo(self, destino: str):
+        """ Retorna o custo mínimo da origem até o destino (infinito se não for alcançado). """
+        return self.distancias[self.indices[destino]]
+
+class HierarquiaContracao:
+    """
+    Hierarquia de contração personalizável (CCH) sobre uma `MalhaRodoviaria`, para malhas cuja
+    topologia é fixa mas cujos custos mudam com frequência (pedágios, preço do combustível).
+
+    O trabalho é dividido em três fases:
+    - Pré-processamento, independente dos custos: ordem de contração por dissecação aninhada
+      (separadores por níveis de BFS) e supergrafo cordal obtido pela eliminação dos vértices
+      nessa ordem. Os arcos sobem na ordem (CSR por posto) e os triângulos inferiores de cada
+      arco já ficam listados em arrays planos.
+    - Personalização (`personalizar`): recebe um vetor de custos, um por estrada da malha (ou
+      uma métrica da malha), e o perfil de veículo, cujas estradas fechadas ficam com custo
+      infinito; atualiza os arcos com uma única passada pelos triângulos.
+    - Consulta (`consultar`): sobe pela árvore de eliminação a partir da origem e do destino,
+      sem fila de prioridade, e desempacota os atalhos do caminho encontrado. Vale para o perfil
+      da última personalização.
+
+    Estradas ou cidades adicionadas depois da construção exigem uma nova hierarquia.
+    """
+
+    def __init__(self, malha: MalhaRodoviaria, tamanho_minimo: int = 16):
+        self.malha = malha
+        numero_cidades = len(malha.nomes)
+        vizinhos = [set() for _ in range(numero_cidades)]
+        for u, v in zip(malha.estradas.origens, malha.estradas.destinos):
+            if u != v:
+                vizinhos[u].add(v)
+                vizinhos[v].add(u)
+
+        ordem = self._ordem_dissecao(vizinhos, tamanho_minimo)
+        self.ordem = array('i', ordem)  # posto -> posição da cidade na malha
+        self.postos = array('i', [0]) * numero_cidades  # posição da cidade -> posto
+        for posto, cidade in enumerate(ordem):
+            self.postos[cidade] = posto
+
+        # Eliminação na ordem de contração: os vizinhos superiores de v (menos o mais baixo
+        # deles, que é o pai de v na árvore de eliminação) passam a ser vizinhos desse pai
+        superiores = [set() for _ in range(numero_cidades)]
+        for u in range(numero_cidades):
+            for v in vizinhos[u]:
+                if self.postos[u] < self.postos[v]:
+                    superiores[self.postos[u]].add(self.postos[v])
+        self.pais = array('i', [-1]) * numero_cidades
+        for posto in range(numero_cidades):
+            if superiores[posto]:
+                pai = min(superiores[posto])
+                self.pais[posto] = pai
+                superiores[pai].update(superiores[posto])
+                superiores[pai].discard(pai)
+
+        self.inicio_arcos = array('i', [0])
+        self.cabecas = array('i')
+        for posto in range(numero_cidades):
+            self.cabecas.extend(sorted(superiores[posto]))
+            self.inicio_arcos.append(len(self.cabecas))
+
+        # Triângulos inferiores: arcos (w, a) e (w, b) formam um caminho alternativo para (a, b)
+        self.triangulos_baixo = array('i')
+        self.triangulos_cima = array('i')
+        self.triangulos_alvo = array('i')
+        for posto in range(numero_cidades):
+            inicio = self.inicio_arcos[posto]
+            fim = self.inicio_arcos[posto + 1]
+            for arco_baixo in range(inicio, fim):
+                for arco_cima in range(arco_baixo + 1, fim):
+                    self.triangulos_baixo.append(arco_baixo)
+                    self.triangulos_cima.append(arco_cima)
+                    self.triangulos_alvo.append(self._arco(self.cabecas[arco_baixo], self.cabecas[arco_cima]))
+
+        self.arco_estrada = array('i')  # estrada -> arco (-1 para laços)
+        for origem, destino in zip(malha.estradas.origens, malha.estradas.destinos):
+            u = self.postos[origem]
+            v = self.postos[destino]
+            self.arco_estrada.append(self._arco(min(u, v), max(u, v)) if u != v else -1)
+        self.personalizar()
+
+    @staticmethod
+    def _ordem_dissecao(vizinhos, tamanho_minimo: int):
+        """
+        Ordem de contração por dissecação aninhada: cada bloco conexo maior que `tamanho_minimo`
+        é partido pelo nível central de uma BFS a partir de um vértice periférico; as partes são
+        ordenadas primeiro e o separador por último. Retorna as posições na ordem de contração.
+        """
+        grupos = array('i', [0]) * len(vizinhos)  # bloco atual de cada vértice (-1: já ordenado)
+        proximo_grupo = 1
+        ordem = []
+        pilha = [(False, list(range(len(vizinhos))))]  # (é separador?, vértices)
+
+        def bfs(inicio: int, grupo: int):
+            """ Níveis da BFS restrita ao grupo, como lista de listas de vértices. """
+            niveis = [[inicio]]
+            vistos = {inicio}
+            while True:
+                nivel = []
+                for u in niveis[-1]:
+                    for v in vizinhos[u]:
+                        if grupos[v] == grupo and v not in vistos:
+                            vistos.add(v)
+                            nivel.append(v)
+                if not nivel:
+                    return niveis
+                niveis.append(nivel)
+
+        while pilha:
+            separador, vertices = pilha.pop()
+            if separador:
+                ordem.extend(vertices)
+                continue
+
+            grupo = proximo_grupo
+            proximo_grupo += 1
+            for v in vertices:
+                grupos[v] = grupo
+
+            # Componentes conexas do bloco: cada uma é dissecada separadamente
+            componentes = []
+            for v in vertices:
+                if grupos[v] == grupo:
+                    componente = [u for nivel in bfs(v, grupo) for u in nivel]
+                    for u in componente:
+                        grupos[u] = proximo_grupo
+                    componentes.append(componente)
+                    proximo_grupo += 1
+            if len(componentes) > 1:
+                pilha.extend((False, componente) for componente in componentes)
+                continue
+
+            componente = componentes[0]
+            grupo = grupos[componente[0]]
+            if len(componente) <= tamanho_minimo:
+                componente.sort(key=lambda v: len(vizinhos[v]))  # Poucos vizinhos primeiro
+                ordem.extend(componente)
+                for v in componente:
+                    grupos[v] = -1
+                continue
+
+            periferico = bfs(componente[0], grupo)[-1][0]
+            niveis = bfs(periferico, grupo)
+            # Separador: o menor nível cujos dois lados ficam com ao menos um quarto do bloco
+            # (ou, se nenhum equilibrar tanto, o nível que contém a mediana)
+            acumulado = 0
+            central = -1
+            for i, nivel in enumerate(niveis):
+                if 4 * acumulado >= len(componente) and 4 * (acumulado + len(nivel)) <= 3 * len(componente):
+                    if central == -1 or len(nivel) < len(niveis[central]):
+                        central = i
+                elif central == -1 and 2 * (acumulado + len(nivel)) >= len(componente):
+                    central = i
+                acumulado += len(nivel)
+            separador = niveis[central]
+            for v in separador:
+                grupos[v] = -1
+            pilha.append((True, separador))
+            restantes = [v for i, nivel in enumerate(niveis) if i != central for v in nivel]
+            if restantes:
+                pilha.append((False, restantes))
+
+        return ordem
+
+    def _arco(self, baixo: int, alto: int):
+        """ Índice do arco entre dois postos (baixo < alto), por busca binária no CSR. """
+        return bisect_left(self.cabecas, alto, self.inicio_arcos[baixo], self.inicio_arcos[baixo + 1])
+
+    def personalizar(self, pesos="custo", perfil: int = 0):
+        """
+        Aplica um novo vetor de custos (um por estrada da malha, na ordem de inserção) e
+        recalcula os atalhos percorrendo os triângulos inferiores em ordem crescente de posto.
+        `pesos` também pode ser uma métrica da malha ou uma combinação {nome: coeficiente}; as
+        estradas fechadas ao `perfil` do veículo não entram nos arcos.
+        """
+        if isinstance(pesos, (str, dict)):
+            pesos = self.malha.pesos_metrica(pesos)
+        if len(pesos) != len(self.arco_estrada):
+            raise ValueError(f"São esperados {len(self.arco_estrada)} custos, um por estrada da malha.")
+
+        custos = array('d', [float('inf')]) * len(self.cabecas)
+        meios = array('i', [-1]) * len(self.cabecas)  # posto do vértice intermediário de cada atalho
+        for arco, peso, restricoes in zip(self.arco_estrada, pesos, self.malha.restricoes_estradas):
+            if arco != -1 and not restricoes & perfil and peso < custos[arco]:
+                custos[arco] = peso
+
+        for arco_baixo, arco_cima, alvo in zip(self.triangulos_baixo, self.triangulos_cima, self.triangulos_alvo):
+            novo_custo = custos[arco_baixo] + custos[arco_cima]
+            if novo_custo < custos[alvo]:
+                custos[alvo] = novo_custo
+                meios[alvo] = self._cauda(arco_baixo)
+
+        self.custos = custos
+        self.meios = meios
+        self.perfil = perfil
+
+    def _cauda(self, arco: int):
+        """ Posto de onde sai o arco (busca binária em `inicio_arcos`). """
+        return bisect_right(self.inicio_arcos, arco) - 1
+
+    def _subir(self, posto: int):
+        """ Busca ascendente pela árvore de eliminação a partir do posto: (custos, anteriores). """
+        custos = {posto: 0}
+        anteriores = {posto: -1}
+        while posto != -1:
+            if posto in custos:
+                custo_atual = custos[posto]
+                for arco in range(self.inicio_arcos[posto], self.inicio_arcos[posto + 1]):
+                    cabeca = self.cabecas[arco]
+                    novo_custo = custo_atual + self.custos[arco]
+                    if novo_custo < custos.get(cabeca, float('inf')):
+                        custos[cabeca] = novo_custo
+                        anteriores[cabeca] = posto
+            posto = self.pais[posto]
+        return custos, anteriores
+
+    def _desempacotar(self, de: int, para: int):
+        """ Postos do caminho representado pelo arco entre `de` e `para`, de `de` até `para`. """
+        caminho = [de]
+        pilha = [(de, para)]
+        while pilha:
+            a, b = pilha.pop()
+            meio = self.meios[self._arco(min(a, b), max(a, b))]
+            if meio == -1:
+                caminho.append(b)
+            else:
+                pilha.append((meio, b))
+                pilha.append((a, meio))
+        return caminho
+
+    def consultar(self, origem: str, destino: str, perfil: int = 0):
         """
-        custos, caminho_anterior = self.dijkstra(origem)
+        Retorna o caminho mais barato e o custo total entre duas cidades, como `rota_mais_barata`.
+        O `perfil` precisa ser o da última personalização, que é quem exclui as estradas fechadas.
+        """
+        if perfil != self.perfil:
+            raise ValueError(f"A hierarquia está personalizada para o perfil {self.perfil}; "
+                             f"chame personalizar(..., perfil={perfil}) antes de consultar.")
+        malha = self.malha
+        posto_origem = self.postos[malha.indices[origem]]
+        posto_destino = self.postos[malha.indices[destino]]
+        custos_origem, anteriores_origem = self._subir(posto_origem)
+        custos_destino, anteriores_destino = self._subir(posto_destino)
 
-        if custos[destino] == float('inf'):
+        melhor = float('inf')
+        encontro = -1
+        for posto, custo in custos_destino.items():
+            if posto in custos_origem and custos_origem[posto] + custo < melhor:
+                melhor = custos_origem[posto] + custo
+                encontro = posto
+        if encontro == -1:
             return f"Não há rota entre {origem} e {destino}."
 
-        caminho = []
-        cidade_atual = destino
-        while cidade_atual:
-            caminho.insert(0, cidade_atual)
-            cidade_atual = caminho_anterior[cidade_atual]
+        subida = []  # postos da origem até o encontro
+        posto = encontro
+        while posto != -1:
+            subida.append(posto)
+            posto = anteriores_origem[posto]
+        subida.reverse()
+        postos = [posto_origem]
+        for de, para in zip(subida, subida[1:]):
+            postos.extend(self._desempacotar(de, para)[1:])
+        posto = encontro
+        while anteriores_destino[posto] != -1:  # do encontro descendo até o destino
+            postos.extend(self._desempacotar(posto, anteriores_destino[posto])[1:])
+            posto = anteriores_destino[posto]
 
-        return caminho, custos[destino]
+        return [malha.nomes[self.ordem[posto]] for posto in postos], melhor
 
 # Teste do Algoritmo
 if __name__ == "__main__":
     malha = MalhaRodoviaria()
 
-    # Definição das cidades e custos de viagem (pedágios + combustível)
-    malha.adicionar_estrada("São Paulo", "Campinas", 50)
-    malha.adicionar_estrada("São Paulo", "Ribeirão Preto", 150)
-    malha.adicionar_estrada("Campinas", "Ribeirão Preto", 80)
-    malha.adicionar_estrada("Campinas", "Bauru", 120)
-    malha.adicionar_estrada("Ribeirão Preto", "Bauru", 90)
-    malha.adicionar_estrada("Bauru", "Presidente Prudente", 110)
-    malha.adicionar_estrada("Ribeirão Preto", "Presidente Prudente", 170)
+    # Definição das cidades e custos de viagem (pedágios + combustível), com a capacidade
+    # de cada estrada em carretas
+    malha.adicionar_estrada("São Paulo", "Campinas", 50, pedagio=20, combustivel=30, capacidade=30)
+    malha.adicionar_estrada("São Paulo", "Ribeirão Preto", 150, pedagio=60, combustivel=90, capacidade=20)
+    malha.adicionar_estrada("Campinas", "Ribeirão Preto", 80, pedagio=10, combustivel=70, capacidade=20)
+    malha.adicionar_estrada("Campinas", "Bauru", 120, pedagio=50, combustivel=70, restricoes=RESTRICAO_ALTURA, capacidade=15)
+    malha.adicionar_estrada("Ribeirão Preto", "Bauru", 90, pedagio=0, combustivel=90, capacidade=20)
+    malha.adicionar_estrada("Bauru", "Presidente Prudente", 110, pedagio=30, combustivel=80, capacidade=25)
+    malha.adicionar_estrada("Ribeirão Preto", "Presidente Prudente", 170, pedagio=20, combustivel=150, capacidade=10)
 
     # Encontrando a rota mais barata entre duas cidades
     origem = "São Paulo"
@@ -84,3 +847,66 @@ if __name__ == "__main__":
 
     print(f"\n🚛 **Melhor rota de {origem} até {destino}:** {caminho}")
     print(f"💰 **Custo total:** R$ {custo_total:.2f}")
+
+    # Árvore de menores caminhos exportada em arrays: todos os caminhos saem de uma única busca
+    arvore = malha.arvore_caminhos("São Paulo")
+    print("\n🌳 **Caminhos a partir de São Paulo (árvore exportada):**")
+    for destino_arvore, caminho_arvore in arvore.caminhos():
+        print(f"➡️ {destino_arvore}: {caminho_arvore}")
+
+    # As 3 rotas mais baratas (simples) entre São Paulo e Presidente Prudente
+    print(f"\n🔀 **3 rotas mais baratas de {origem} até {destino}:**")
+    for caminho_alternativo, custo_alternativo in malha.k_rotas_mais_baratas(origem, destino, 3):
+        print(f"➡️ R$ {custo_alternativo:.2f}: {caminho_alternativo}")
+
+    # Rotas alternativas significativamente diferentes (platôs e, se preciso, penalidades); na
+    # malha de exemplo, de poucas estradas longas, o teste de otimalidade local fica desligado
+    print(f"\n🗺 **Rotas alternativas de {origem} até {destino}:**")
+    for caminho_alternativo, custo_alternativo in malha.rotas_alternativas(origem, destino, esticamento=0.2,
+                                                                           otimalidade_local=0):
+        print(f"➡️ R$ {custo_alternativo:.2f}: {caminho_alternativo}")
+
+    # Hierarquia de contração personalizável: o pré-processamento é feito uma vez e cada
+    # mudança de preços só refaz a personalização (aqui, pedágios com o dobro do preço)
+    hierarquia = HierarquiaContracao(malha)
+    caminho_hierarquia, custo_hierarquia = hierarquia.consultar(origem, destino)
+    print(f"\n🏗 **Pela hierarquia de contração:** {caminho_hierarquia} (R$ {custo_hierarquia:.2f})")
+    hierarquia.personalizar({"pedagio": 2, "combustivel": 1})
+    caminho_hierarquia, custo_hierarquia = hierarquia.consultar(origem, destino)
+    print(f"💱 **Com os pedágios dobrados:** {caminho_hierarquia} (R$ {custo_hierarquia:.2f})")
+
+    # Várias métricas na mesma malha: cada consulta escolhe a métrica ou uma combinação delas
+    caminho_pedagio, pedagio_total = malha.rota_mais_barata(origem, destino, metrica="pedagio")
+    print(f"\n🧾 **Rota com menos pedágio:** {caminho_pedagio} (R$ {pedagio_total:.2f})")
+    caminho_combinado, custo_combinado = malha.rota_mais_barata(origem, destino, metrica={"pedagio": 1, "combustivel": 1.2})
+    print(f"⛽ **Com o combustível 20% mais caro:** {caminho_combinado} (R$ {custo_combinado:.2f})")
+
+    # Fronteira de Pareto entre pedágio e combustível, para frotas com orçamentos separados
+    print(f"\n⚖️ **Rotas de Pareto (pedágio x combustível) de {origem} até {destino}:**")
+    for caminho_pareto, (pedagio_pareto, combustivel_pareto) in malha.rotas_pareto(origem, destino):
+        print(f"➡️ pedágio R$ {pedagio_pareto:.2f}, combustível R$ {combustivel_pareto:.2f}: {caminho_pareto}")
+
+    # Caminhões altos não passam pelo viaduto entre Campinas e Bauru; o perfil é frequente,
+    # então ganha uma visão CSR própria, sem as estradas fechadas
+    malha.preparar_perfil(RESTRICAO_ALTURA)
+    caminho_alto, custo_alto = malha.rota_mais_barata(origem, destino, perfil=RESTRICAO_ALTURA)
+    print(f"\n🚚 **Rota para caminhão alto:** {caminho_alto} (R$ {custo_alto:.2f})")
+
+    # Distribuição de cargas: carretas de São Paulo e Campinas atendem os pedidos de Bauru e
+    # Presidente Prudente ao menor custo total, respeitando a capacidade das estradas
+    ofertas = {"São Paulo": 40, "Campinas": 10, "Bauru": -20, "Presidente Prudente": -30}
+    fluxos, custo_fluxo, carretas = malha.fluxo_custo_minimo(ofertas)
+    print(f"\n📦 **Distribuição de {carretas:.0f} carretas (custo total R$ {custo_fluxo:.2f}):**")
+    for estrada, fluxo in enumerate(fluxos):
+        if fluxo:
+            de, para = malha.estradas.origens[estrada], malha.estradas.destinos[estrada]
+            if fluxo < 0:
+                de, para = para, de
+            print(f"➡️ {malha.nomes[de]} → {malha.nomes[para]}: {abs(fluxo):.0f}")
+
+    # Estrada sem capacidade informada: é ilimitada, então só o trecho São Paulo-Jundiaí limita a carga
+    porto = MalhaRodoviaria()
+    porto.adicionar_estrada("Santos", "São Paulo", 40)
+    porto.adicionar_estrada("São Paulo", "Jundiaí", 30, capacidade=5)
+    _, custo_porto, carretas_porto = porto.fluxo_custo_minimo({"Santos": 3, "Jundiaí": -3})
+    print(f"\n🚢 **De Santos a Jundiaí (estrada sem capacidade informada):** {carretas_porto:.0f} carretas (R$ {custo_porto:.2f})")
@@ -1,80 +1,316 @@
 import heapq
+from array import array
+
+from busca_comum import IndicePontosInteresse as IndicePontosInteresseComum, TabelaArestas, area_busca, buscar_isocrona
 
 class CidadeInteligente:
     """ Representação da cidade como um grafo onde cada vértice é um cruzamento e cada aresta é uma rua. """
 
     def __init__(self):
-        self.cruzamentos = {}
+        # Ruas em estrutura de arrays: `tempo`, `distancia` e as demais métricas informadas são
+        # colunas da tabela, e as buscas percorrem a visão CSR da métrica pedida
+        self.ruas = TabelaArestas({"tempo": 0.0, "distancia": 0.0})
         self.estacoes_recarga = set()  # Conjunto de cruzamentos que possuem estações de recarga
+        self.indices = {}  # cruzamento -> posição nos arrays das buscas
+        self.nomes = []  # posição -> cruzamento
+
+    @property
+    def cruzamentos(self):
+        """ Lista de adjacência {cruzamento: [(vizinho, tempo, distancia)]} montada a partir das ruas, só para leitura. """
+        return self.ruas.adjacencias(self.nomes, ["tempo", "distancia"])
 
-    def adicionar_rua(self, origem: str, destino: str, tempo: float, distancia: float):
-        """ Adiciona uma rua bidirecional entre dois cruzamentos. """
-        if origem not in self.cruzamentos:
-            self.cruzamentos[origem] = []
-        if destino not in self.cruzamentos:
-            self.cruzamentos[destino] = []
+    def _registrar_cruzamento(self, cruzamento: str):
+        """ Cria o cruzamento, se ainda não existir, e lhe atribui uma posição nos arrays das buscas. """
+        if cruzamento not in self.indices:
+            self.indices[cruzamento] = len(self.nomes)
+            self.nomes.append(cruzamento)
+
+    def adicionar_rua(self, origem: str, destino: str, tempo: float, distancia: float, **metricas):
+        """
+        Adiciona uma rua bidirecional entre dois cruzamentos. Outras métricas da rua (por exemplo
+        `consumo=...`) podem ser informadas por nome; uma métrica omitida, ou nova para as ruas
+        anteriores, fica com valor 0.
+        """
+        self._registrar_cruzamento(origem)
+        self._registrar_cruzamento(destino)
         
-        self.cruzamentos[origem].append((destino, tempo, distancia))
-        self.cruzamentos[destino].append((origem, tempo, distancia))  # Grafo não-direcionado
+        self.ruas.adicionar(self.indices[origem], self.indices[destino], tempo=tempo, distancia=distancia, **metricas)
+
+    def _csr(self, metrica="tempo"):
+        """
+        Visão CSR das ruas para a métrica (o nome de uma métrica ou uma combinação {nome:
+        coeficiente}): (inicio, cabecas, pesos, ruas), com os arcos que saem da posição u em
+        [inicio[u], inicio[u + 1]). As visões de todas as métricas compartilham a topologia,
+        então o mesmo arco vale em todas.
+        """
+        return self.ruas.csr(len(self.nomes), metrica)
 
     def adicionar_estacao_recarga(self, cruzamento: str):
         """ Marca um cruzamento como tendo uma estação de recarga. """
         self.estacoes_recarga.add(cruzamento)
 
-    def dijkstra_modificado(self, origem: str, destino: str, autonomia: float):
+    def dijkstra_modificado(self, origem: str, destino: str, autonomia: float, metrica="tempo"):
         """
         Aplica o Algoritmo de Dijkstra modificado para encontrar a melhor rota considerando tempo e recarga.
+        `metrica` escolhe o que é minimizado (por padrão, o tempo); a bateria sempre gasta a distância.
+        """
+        area, _, _ = self._buscar(origem, destino, autonomia, metrica)
+        tempo_minimo = {}
+        caminho_anterior = {}
+        for cruzamento, indice in self.indices.items():
+            if area.alcancado(indice):
+                tempo_minimo[cruzamento] = area.distancias[indice]
+                anterior = area.anteriores[indice]
+                caminho_anterior[cruzamento] = self.nomes[anterior] if anterior >= 0 else None
+            else:
+                tempo_minimo[cruzamento] = float('inf')
+                caminho_anterior[cruzamento] = None
+
+        return tempo_minimo, caminho_anterior
+
+    def _buscar(self, origem: str, destino: str, autonomia: float, metrica="tempo", tempo_restante=None,
+                energia_minima=None):
+        """
+        Busca sobre rótulos (cruzamento, bateria), comum ao Dijkstra modificado e ao A*, parando
+        ao expandir o destino. A bateria gasta a distância de cada rua, que só pode ser
+        percorrida se a bateria na saída a cobrir; ao sair de um cruzamento com estação, a
+        bateria está cheia (a recarga não consome tempo no modelo). Rótulos de um mesmo
+        cruzamento saem da fila em ordem de tempo, então um rótulo novo só não é dominado se
+        tiver mais bateria que todos os já expandidos ali.
+
+        Com `tempo_restante` (limite inferior da métrica até o destino, por posição), a fila é
+        ordenada como no A*; com `energia_minima`, rótulos que não alcançam nem o destino nem uma
+        estação são descartados ao serem gerados. Nenhum dos dois muda a resposta para o destino.
+
+        Retorna (area, rotulos, rotulo_destino): na área, cada posição alcançada guarda o menor
+        valor da métrica e o cruzamento anterior do rótulo correspondente; `rotulos` guarda
+        (valor, posição, bateria, índice do rótulo anterior) e `rotulo_destino` é o rótulo que
+        chegou ao destino (-1 se não chegou).
         """
-        tempo_minimo = {cruzamento: float('inf') for cruzamento in self.cruzamentos}
-        tempo_minimo[origem] = 0
-        caminho_anterior = {cruzamento: None for cruzamento in self.cruzamentos}
-        bateria_restante = {cruzamento: 0 for cruzamento in self.cruzamentos}
-        bateria_restante[origem] = autonomia  # Início com bateria cheia
+        indices = self.indices
+        nomes = self.nomes
+        area = area_busca()
+        area.reiniciar(len(nomes))
+        tempo_minimo = area.distancias
+        anteriores = area.anteriores
+        carimbos = area.carimbos
+        geracao = area.geracao
+
+        indice_origem = indices[origem]
+        indice_destino = indices.get(destino, -1)  # Destino desconhecido: a busca não para antes
+        tempo_minimo[indice_origem] = 0
+        anteriores[indice_origem] = -1
+        carimbos[indice_origem] = geracao
 
-        fila_prioridade = [(0, origem, autonomia)]  # (tempo acumulado, cruzamento atual, bateria disponível)
+        inicio, cabecas, tempos_rua, _ = self._csr(metrica)
+        distancias_rua = self._csr("distancia")[2]
+        estacoes = bytearray(len(nomes))
+        for estacao in self.estacoes_recarga:
+            if estacao in indices:
+                estacoes[indices[estacao]] = 1
+
+        melhor_bateria = array('d', [-1.0]) * len(nomes)  # Maior bateria já expandida em cada posição
+        rotulos = [(0, indice_origem, autonomia, -1)]
+        estimativa = tempo_restante[indice_origem] if tempo_restante is not None else 0
+        fila_prioridade = [(estimativa, 0)]  # (valor + estimativa do restante, índice do rótulo)
 
         while fila_prioridade:
-            tempo_atual, cruzamento_atual, bateria_atual = heapq.heappop(fila_prioridade)
+            _, rotulo_atual = heapq.heappop(fila_prioridade)
+            tempo_atual, indice_atual, bateria_atual, _ = rotulos[rotulo_atual]
+
+            if bateria_atual <= melhor_bateria[indice_atual]:
+                continue  # Rótulo dominado
+            melhor_bateria[indice_atual] = bateria_atual
 
-            if cruzamento_atual == destino:
-                break  # Chegamos ao destino
+            if indice_atual == indice_destino:
+                return area, rotulos, rotulo_atual  # Chegamos ao destino
 
-            for vizinho, tempo_rua, distancia_rua in self.cruzamentos[cruzamento_atual]:
-                nova_bateria = bateria_atual - distancia_rua
+            if estacoes[indice_atual]:
+                bateria_atual = autonomia  # Recarga completa na estação
 
-                # Se não houver bateria suficiente, verificar estação de recarga
+            for arco in range(inicio[indice_atual], inicio[indice_atual + 1]):
+                nova_bateria = bateria_atual - distancias_rua[arco]
                 if nova_bateria < 0:
-                    if cruzamento_atual in self.estacoes_recarga:
-                        nova_bateria = autonomia  # Recarga completa
-                    else:
-                        continue  # Ignorar esse caminho porque não há bateria suficiente
+                    continue  # A bateria não cobre esta rua
+                indice_vizinho = cabecas[arco]
+                if energia_minima is not None and not estacoes[indice_vizinho] \
+                        and nova_bateria < energia_minima[indice_vizinho]:
+                    continue  # Não alcança destino nem estação: rótulo condenado
+                if nova_bateria <= melhor_bateria[indice_vizinho]:
+                    continue
 
-                novo_tempo = tempo_atual + tempo_rua
+                novo_tempo = tempo_atual + tempos_rua[arco]
+                rotulos.append((novo_tempo, indice_vizinho, nova_bateria, rotulo_atual))
+                if carimbos[indice_vizinho] != geracao or novo_tempo < tempo_minimo[indice_vizinho]:
+                    tempo_minimo[indice_vizinho] = novo_tempo
+                    anteriores[indice_vizinho] = indice_atual
+                    carimbos[indice_vizinho] = geracao
+                estimativa = tempo_restante[indice_vizinho] if tempo_restante is not None else 0
+                heapq.heappush(fila_prioridade, (novo_tempo + estimativa, len(rotulos) - 1))
 
-                if novo_tempo < tempo_minimo[vizinho]:
-                    tempo_minimo[vizinho] = novo_tempo
-                    caminho_anterior[vizinho] = cruzamento_atual
-                    bateria_restante[vizinho] = nova_bateria
-                    heapq.heappush(fila_prioridade, (novo_tempo, vizinho, nova_bateria))
+        return area, rotulos, -1
 
-        return tempo_minimo, caminho_anterior
+    def isocrona(self, origem: str, limite):
+        """
+        Busca limitada por tempo a partir da origem: para assim que o menor tempo na fila passa
+        do limite, sem considerar a bateria.
+
+        `limite` pode ser um número ou uma lista de faixas (por exemplo, [10, 20, 30]) calculadas
+        na mesma busca. Retorna (alcancados, tempos, faixas, fronteiras): os cruzamentos alcançados
+        em ordem de fixação, seus tempos, o índice da menor faixa que contém cada um e, para cada
+        faixa, as ruas (de, para) que saem de dentro dela. Uma lista de faixas vazia gera ValueError.
+        """
+        nomes = self.nomes
+        inicio, cabecas, tempos_rua, _ = self._csr("tempo")
+
+        def arcos(indice, _):
+            for arco in range(inicio[indice], inicio[indice + 1]):
+                yield cabecas[arco], tempos_rua[arco]
 
-    def melhor_rota(self, origem: str, destino: str, autonomia: float):
+        alcancados, tempos, faixas, fronteiras = buscar_isocrona(len(nomes), arcos, self.indices[origem], limite)
+        fronteiras = [[(nomes[de], nomes[para]) for de, para in fronteira] for fronteira in fronteiras]
+        return [nomes[indice] for indice in alcancados], tempos, faixas, fronteiras
+
+    def estacoes_mais_proximas(self, cruzamento: str, k: int, peso: str = "tempo"):
+        """
+        Retorna as k estações de recarga mais próximas do cruzamento, como [(estação, valor)],
+        medindo por `peso` ("tempo" ou "distancia"). A busca é incremental e para assim que k
+        estações são fixadas, sem percorrer a cidade toda.
+        """
+        inicio, cabecas, pesos, _ = self._csr(peso)
+        indices = self.indices
+        nomes = self.nomes
+        encontradas = []
+        area = area_busca()
+        area.reiniciar(len(nomes))
+        valores = area.distancias
+        carimbos = area.carimbos
+        geracao = area.geracao
+        indice_origem = indices[cruzamento]
+        valores[indice_origem] = 0
+        carimbos[indice_origem] = geracao
+        fila_prioridade = [(0, indice_origem)]
+
+        while fila_prioridade and len(encontradas) < k:
+            valor_atual, indice_atual = heapq.heappop(fila_prioridade)
+            if valor_atual > valores[indice_atual]:
+                continue
+            cruzamento_atual = nomes[indice_atual]
+            if cruzamento_atual in self.estacoes_recarga:
+                encontradas.append((cruzamento_atual, valor_atual))
+
+            for arco in range(inicio[indice_atual], inicio[indice_atual + 1]):
+                novo_valor = valor_atual + pesos[arco]
+                indice_vizinho = cabecas[arco]
+                if carimbos[indice_vizinho] != geracao or novo_valor < valores[indice_vizinho]:
+                    valores[indice_vizinho] = novo_valor
+                    carimbos[indice_vizinho] = geracao
+                    heapq.heappush(fila_prioridade, (novo_valor, indice_vizinho))
+
+        return encontradas
+
+    def _dijkstra_reverso(self, chegadas, metrica):
+        """
+        Calcula o menor valor acumulado da métrica (nome ou combinação) de cada cruzamento
+        até o mais próximo dos cruzamentos de chegada, como array indexado pela posição. Como
+        as ruas são bidirecionais, a busca reversa percorre os mesmos arcos.
+        """
+        inicio, cabecas, pesos, _ = self._csr(metrica)
+        limites = array('d', [float('inf')]) * len(self.nomes)
+        fila_prioridade = []
+        for chegada in chegadas:
+            if chegada in self.indices:
+                limites[self.indices[chegada]] = 0
+                fila_prioridade.append((0, self.indices[chegada]))
+        heapq.heapify(fila_prioridade)
+
+        while fila_prioridade:
+            valor_atual, indice_atual = heapq.heappop(fila_prioridade)
+
+            if valor_atual > limites[indice_atual]:
+                continue
+
+            for arco in range(inicio[indice_atual], inicio[indice_atual + 1]):
+                indice_vizinho = cabecas[arco]
+                novo_valor = valor_atual + pesos[arco]
+                if novo_valor < limites[indice_vizinho]:
+                    limites[indice_vizinho] = novo_valor
+                    heapq.heappush(fila_prioridade, (novo_valor, indice_vizinho))
+
+        return limites
+
+    def a_estrela_bateria(self, origem: str, destino: str, autonomia: float, metrica="tempo"):
+        """
+        Busca A* sobre rótulos (cruzamento, bateria) com heurística sensível à bateria, no mesmo
+        modelo de bateria e recarga do Dijkstra modificado (veja `_buscar`): as respostas são as
+        mesmas, só a ordem da busca muda.
+
+        A heurística é o menor valor restante da métrica minimizada (por padrão, o tempo) até o
+        destino, obtido por um Dijkstra reverso sobre ela. Um segundo Dijkstra reverso sobre
+        `distancia`, partindo do destino e de todas as estações de recarga, dá a energia mínima
+        para alcançar um desses pontos: rótulos com bateria abaixo desse limite nunca completam
+        a rota e são descartados ao serem gerados.
+
+        Retorna (caminho, tempo total) ou None se não houver rota viável.
+        """
+        if origem not in self.indices or destino not in self.indices:
+            return None
+
+        tempo_restante = self._dijkstra_reverso([destino], metrica)
+        energia_minima = self._dijkstra_reverso(self.estacoes_recarga | {destino}, "distancia")
+        indice_origem = self.indices[origem]
+
+        if autonomia < energia_minima[indice_origem] or tempo_restante[indice_origem] == float('inf'):
+            return None
+
+        _, rotulos, rotulo_destino = self._buscar(origem, destino, autonomia, metrica, tempo_restante, energia_minima)
+        return self._rota_dos_rotulos(rotulos, rotulo_destino)
+
+    def _rota_dos_rotulos(self, rotulos, rotulo_destino: int):
+        """ Reconstrói (caminho, valor total) seguindo os rótulos até a origem, ou None se o destino não foi alcançado. """
+        if rotulo_destino == -1:
+            return None
+        caminho = []
+        rotulo = rotulo_destino
+        while rotulo != -1:
+            caminho.append(self.nomes[rotulos[rotulo][1]])
+            rotulo = rotulos[rotulo][3]
+        caminho.reverse()
+        return caminho, rotulos[rotulo_destino][0]
+
+    def melhor_rota(self, origem: str, destino: str, autonomia: float, a_estrela: bool = False, metrica="tempo"):
         """
         Retorna a melhor rota e tempo total considerando o tempo de deslocamento e necessidade de recarga.
+        Com `a_estrela=True`, usa a busca A* com poda por bateria (`a_estrela_bateria`), que dá a
+        mesma resposta mais depressa. `metrica` escolhe o que é minimizado: o nome de uma métrica
+        das ruas ou uma combinação {nome: coeficiente}; o total retornado é o valor dela.
         """
-        tempo_minimo, caminho_anterior = self.dijkstra_modificado(origem, destino, autonomia)
+        if a_estrela:
+            resultado = self.a_estrela_bateria(origem, destino, autonomia, metrica)
+        else:
+            _, rotulos, rotulo_destino = self._buscar(origem, destino, autonomia, metrica)
+            resultado = self._rota_dos_rotulos(rotulos, rotulo_destino)
 
-        if tempo_minimo[destino] == float('inf'):
+        if resultado is None:
             return f"Não há rota viável entre {origem} e {destino} com essa autonomia."
+        return resultado
 
-        caminho = []
-        cruzamento_atual = destino
-        while cruzamento_atual:
-            caminho.insert(0, cruzamento_atual)
-            cruzamento_atual = caminho_anterior[cruzamento_atual]
+class IndicePontosInteresse(IndicePontosInteresseComum):
+    """
+    Índice dos pontos de interesse (por padrão, as estações de recarga) mais próximos de cada
+    cruzamento, medidos por `peso` ("tempo" ou "distancia").
+    """
 
-        return caminho, tempo_minimo[destino]
+    def __init__(self, cidade: CidadeInteligente, k_maximo: int, pontos=None, peso: str = "tempo"):
+        if pontos is None:
+            pontos = cidade.estacoes_recarga
+        inicio, cabecas, pesos, _ = cidade._csr(peso)
+        nomes = cidade.nomes
+        indices = cidade.indices
+        super().__init__(nomes,
+                         lambda cruzamento: ((nomes[cabecas[arco]], pesos[arco])
+                                             for arco in range(inicio[indices[cruzamento]], inicio[indices[cruzamento] + 1])),
+                         pontos, k_maximo)
 
 # Teste do Algoritmo
 if __name__ == "__main__":
@@ -107,3 +343,36 @@ if __name__ == "__main__":
 
     print(f"\n🚗 **Melhor rota de {origem} até {destino}:** {caminho}")
     print(f"⏱ **Tempo total estimado:** {tempo_total:.2f} min")
+
+    # Mesma consulta com a busca A* sensível à bateria
+    caminho, tempo_total = cidade.melhor_rota(origem, destino, autonomia, a_estrela=True)
+    print(f"\n⚡ **Melhor rota (A* com poda por bateria):** {caminho}")
+    print(f"⏱ **Tempo total estimado:** {tempo_total:.2f} min")
+
+    # O A* usa o mesmo modelo de bateria e recarga: em todos os pares de cruzamentos e
+    # autonomias, as duas buscas dão o mesmo tempo (ou ambas não encontram rota)
+    for par_origem in cidade.nomes:
+        for par_destino in cidade.nomes:
+            for par_autonomia in range(1, 7):
+                padrao = cidade.melhor_rota(par_origem, par_destino, par_autonomia)
+                acelerada = cidade.melhor_rota(par_origem, par_destino, par_autonomia, a_estrela=True)
+                assert (padrao[1] if isinstance(padrao, tuple) else padrao) == \
+                    (acelerada[1] if isinstance(acelerada, tuple) else acelerada)
+    print("✅ **A* e Dijkstra modificado concordam em todos os pares da cidade.**")
+
+    # Cruzamentos alcançáveis em até 5 e 10 minutos, calculados em uma única busca
+    limites = [5, 10]
+    alcancados, tempos, faixas, fronteiras = cidade.isocrona(origem, limites)
+    for indice, limite in enumerate(limites):
+        dentro = [cruzamento for cruzamento, faixa in zip(alcancados, faixas) if faixa <= indice]
+        print(f"\n🗺 **Até {limite} min:** {dentro} (ruas de saída: {fronteiras[indice]})")
+
+    # As 2 estações de recarga mais próximas de B, por busca incremental e pelo índice pré-computado
+    print(f"\n🔌 **Estações mais próximas de B:** {cidade.estacoes_mais_proximas('B', 2)}")
+    indice = IndicePontosInteresse(cidade, k_maximo=2)
+    print(f"🗂 **Pelo índice:** {indice.consultar('B', 2)}")
+
+    # Uma estação cadastrada antes de qualquer rua chegar até ela fica fora do índice
+    cidade.adicionar_estacao_recarga("F")
+    indice = IndicePontosInteresse(cidade, k_maximo=2)
+    print(f"🗂 **Pelo índice, com a estação isolada F:** {indice.consultar('B', 2)}")
@@ -1,78 +1,139 @@
 import heapq
 
+from busca_comum import TabelaArestas, area_busca, reconstruir_caminho
+
 class RedeAereaInternacional:
     """ Representação do sistema de voos internacionais como um grafo ponderado. """
 
     def __init__(self):
-        self.aeroportos = {}
+        # Voos em estrutura de arrays: `custo`, `tempo_conexao` e as demais métricas informadas
+        # são colunas da tabela, e as buscas percorrem a visão CSR da métrica pedida
+        self.voos = TabelaArestas({"custo": 0.0, "tempo_conexao": 0.0})
         self.escalas_obrigatorias = {}  # Dicionário para armazenar custos extras de escalas
         self.tempos_de_conexao = {}  # Dicionário com tempos de conexão entre aeroportos
+        self.indices = {}  # aeroporto -> posição nos arrays das buscas
+        self.nomes = []  # posição -> aeroporto
+
+    @property
+    def aeroportos(self):
+        """ Lista de adjacência {aeroporto: [(vizinho, custo, tempo_conexao)]} montada a partir dos voos, só para leitura. """
+        return self.voos.adjacencias(self.nomes, ["custo", "tempo_conexao"])
+
+    def _registrar_aeroporto(self, aeroporto: str):
+        """ Cria o aeroporto, se ainda não existir, e lhe atribui uma posição nos arrays das buscas. """
+        if aeroporto not in self.indices:
+            self.indices[aeroporto] = len(self.nomes)
+            self.nomes.append(aeroporto)
 
-    def adicionar_voo(self, origem: str, destino: str, custo: float, tempo_conexao: float):
-        """ Adiciona um voo entre aeroportos com custo e tempo de conexão. """
-        if origem not in self.aeroportos:
-            self.aeroportos[origem] = []
-        if destino not in self.aeroportos:
-            self.aeroportos[destino] = []
+    def adicionar_voo(self, origem: str, destino: str, custo: float, tempo_conexao: float, **metricas):
+        """
+        Adiciona um voo entre aeroportos com custo e tempo de conexão. Outras métricas do voo
+        (por exemplo `duracao=...`, `emissoes=...`) podem ser informadas por nome; uma métrica
+        omitida, ou nova para os voos anteriores, fica com valor 0.
+        """
+        self._registrar_aeroporto(origem)
+        self._registrar_aeroporto(destino)
 
-        self.aeroportos[origem].append((destino, custo, tempo_conexao))
-        self.aeroportos[destino].append((origem, custo, tempo_conexao))  # Grafo não-direcionado
+        self.voos.adicionar(self.indices[origem], self.indices[destino], custo=custo, tempo_conexao=tempo_conexao,
+                            **metricas)
 
     def adicionar_escala_obrigatoria(self, aeroporto: str, custo_extra: float):
         """ Adiciona um custo fixo para escalas obrigatórias em um aeroporto específico. """
         self.escalas_obrigatorias[aeroporto] = custo_extra
 
-    def dijkstra_modificado(self, origem: str, destino: str, tempo_maximo_conexao: float):
+    def dijkstra_modificado(self, origem: str, destino: str, tempo_maximo_conexao: float, metrica="custo"):
         """
         Aplica o Algoritmo de Dijkstra modificado para encontrar a rota de menor custo,
         considerando escalas obrigatórias e tempo máximo de conexão.
+        `metrica` escolhe o que é minimizado (por padrão, o custo); veja `menor_rota`.
         """
-        custos_minimos = {aeroporto: float('inf') for aeroporto in self.aeroportos}
-        custos_minimos[origem] = 0
-        caminho_anterior = {aeroporto: None for aeroporto in self.aeroportos}
+        area = self._buscar(origem, destino, tempo_maximo_conexao, metrica)
+        custos_minimos = {}
+        caminho_anterior = {}
+        for aeroporto, indice in self.indices.items():
+            if area.alcancado(indice):
+                custos_minimos[aeroporto] = area.distancias[indice]
+                anterior = area.anteriores[indice]
+                caminho_anterior[aeroporto] = self.nomes[anterior] if anterior >= 0 else None
+            else:
+                custos_minimos[aeroporto] = float('inf')
+                caminho_anterior[aeroporto] = None
 
-        fila_prioridade = [(0, origem)]  # (custo acumulado, aeroporto atual)
+        return custos_minimos, caminho_anterior
+
+    def _buscar(self, origem: str, destino: str, tempo_maximo_conexao: float, metrica="custo"):
+        """
+        Executa o Dijkstra modificado sobre a área de trabalho da thread, parando ao chegar ao
+        destino. Retorna a área: as posições alcançadas guardam o valor da métrica e o anterior.
+        """
+        indices = self.indices
+        nomes = self.nomes
+        area = area_busca()
+        area.reiniciar(len(nomes))
+        custos_minimos = area.distancias
+        anteriores = area.anteriores
+        carimbos = area.carimbos
+        geracao = area.geracao
+
+        indice_origem = indices[origem]
+        indice_destino = indices.get(destino, -1)  # Destino desconhecido: a busca não para antes
+        custos_minimos[indice_origem] = 0
+        anteriores[indice_origem] = -1
+        carimbos[indice_origem] = geracao
+
+        # Visões CSR da métrica e do tempo de conexão, com a mesma topologia: o arco vale nas duas
+        inicio, cabecas, custos_voo, _ = self.voos.csr(len(nomes), metrica)
+        tempos_conexao = self.voos.csr(len(nomes), "tempo_conexao")[2]
+        # A escala obrigatória é um custo: entra com o coeficiente do custo na métrica
+        if isinstance(metrica, str):
+            coeficiente_escala = 1 if metrica == "custo" else 0
+        else:
+            coeficiente_escala = metrica.get("custo", 0)
+        fila_prioridade = [(0, indice_origem)]  # (custo acumulado, posição do aeroporto atual)
 
         while fila_prioridade:
-            custo_atual, aeroporto_atual = heapq.heappop(fila_prioridade)
+            custo_atual, indice_atual = heapq.heappop(fila_prioridade)
 
-            if aeroporto_atual == destino:
+            if indice_atual == indice_destino:
                 break  # Chegamos ao destino
 
-            for vizinho, custo_voo, tempo_conexao in self.aeroportos[aeroporto_atual]:
+            for arco in range(inicio[indice_atual], inicio[indice_atual + 1]):
                 # Ignorar voos que excedem o tempo máximo de conexão permitido
-                if tempo_conexao > tempo_maximo_conexao:
+                if tempos_conexao[arco] > tempo_maximo_conexao:
                     continue
 
-                custo_total = custo_atual + custo_voo
+                custo_total = custo_atual + custos_voo[arco]
 
                 # Adicionar custo extra se for uma escala obrigatória
-                if vizinho in self.escalas_obrigatorias:
-                    custo_total += self.escalas_obrigatorias[vizinho]
+                indice_vizinho = cabecas[arco]
+                vizinho = nomes[indice_vizinho]
+                if coeficiente_escala and vizinho in self.escalas_obrigatorias:
+                    custo_total += coeficiente_escala * self.escalas_obrigatorias[vizinho]
 
-                if custo_total < custos_minimos[vizinho]:
-                    custos_minimos[vizinho] = custo_total
-                    caminho_anterior[vizinho] = aeroporto_atual
-                    heapq.heappush(fila_prioridade, (custo_total, vizinho))
+                if carimbos[indice_vizinho] != geracao or custo_total < custos_minimos[indice_vizinho]:
+                    custos_minimos[indice_vizinho] = custo_total
+                    anteriores[indice_vizinho] = indice_atual
+                    carimbos[indice_vizinho] = geracao
+                    heapq.heappush(fila_prioridade, (custo_total, indice_vizinho))
 
-        return custos_minimos, caminho_anterior
+        return area
 
-    def menor_rota(self, origem: str, destino: str, tempo_maximo_conexao: float):
+    def menor_rota(self, origem: str, destino: str, tempo_maximo_conexao: float, metrica="custo"):
         """
         Retorna a menor rota considerando o custo total e as restrições de escalas.
+        `metrica` escolhe o que é minimizado: o nome de uma métrica dos voos ou uma combinação
+        {nome: coeficiente}. O custo extra das escalas obrigatórias entra com o coeficiente do
+        custo (inteiro para "custo", nenhum para as demais métricas).
         """
-        custos_minimos, caminho_anterior = self.dijkstra_modificado(origem, destino, tempo_maximo_conexao)
+        area = self._buscar(origem, destino, tempo_maximo_conexao, metrica)
+        indice_destino = self.indices[destino]
 
-        if custos_minimos[destino] == float('inf'):
+        if not area.alcancado(indice_destino):
             return f"Não há rota viável entre {origem} e {destino} respeitando o tempo máximo de conexão."
 
-        caminho = []
-        aeroporto_atual = destino
-        while aeroporto_atual:
-            caminho.insert(0, aeroporto_atual)
-            aeroporto_atual = caminho_anterior[aeroporto_atual]
+        caminho = reconstruir_caminho(self.nomes, area.anteriores, indice_destino)
 
-        return caminho, custos_minimos[destino]
+        return caminho, area.distancias[indice_destino]
 
 # Teste do Algoritmo
 if __name__ == "__main__":
@@ -0,0 +1,547 @@
+"""
+Estruturas de busca compartilhadas pelos exercícios, que indexam os vértices por posição
+(atributos `indices` e `nomes` de cada grafo).
+"""
+import heapq
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+# Carimbos de geração em inteiros sem sinal de 32 bits; ao esgotá-los, a área zera todos uma única vez
+_TIPO_CARIMBO = 'I'
+_GERACAO_MAXIMA = 2 ** (8 * array(_TIPO_CARIMBO).itemsize) - 1
+
+class AreaBusca:
+    """
+    Área de trabalho reutilizável das buscas: arrays pré-alocados de distâncias e de vértices
+    anteriores, indexados pela posição de cada vértice, com um carimbo de geração por
+    posição. Uma entrada só vale se o seu carimbo for o da busca atual, então reiniciar a área
+    custa O(1) e cada busca escreve apenas as posições que toca.
+    """
+
+    def __init__(self):
+        self.distancias = array('d')
+        self.anteriores = array('i')
+        self.carimbos = array(_TIPO_CARIMBO)
+        self.geracao = 0
+
+    def reiniciar(self, tamanho: int):
+        """ Garante espaço para `tamanho` posições e inicia uma nova geração. """
+        if len(self.carimbos) < tamanho:
+            faltam = tamanho - len(self.carimbos)
+            self.distancias.extend(array('d', [0.0]) * faltam)
+            self.anteriores.extend(array('i', [-1]) * faltam)
+            self.carimbos.extend(array(_TIPO_CARIMBO, [0]) * faltam)
+        self.geracao += 1
+        if self.geracao > _GERACAO_MAXIMA:
+            self.carimbos = array(_TIPO_CARIMBO, [0]) * len(self.carimbos)
+            self.geracao = 1
+
+    def alcancado(self, indice: int):
+        """ Indica se a posição foi alcançada na busca atual. """
+        return self.carimbos[indice] == self.geracao
+
+_areas_busca = threading.local()
+
+def area_busca():
+    """
+    Retorna a área de trabalho de buscas da thread atual (cada thread tem a sua). A próxima
+    busca da thread reaproveita a mesma área, então o resultado deve ser lido antes dela.
+    """
+    area = getattr(_areas_busca, "area", None)
+    if area is None:
+        area = _areas_busca.area = AreaBusca()
+    return area
+
+class TabelaArestas:
+    """
+    Arestas não-direcionadas em estrutura de arrays: a aresta e liga as posições origens[e] e
+    destinos[e], e cada métrica (custo, tempo, distância...) é uma coluna com um valor por
+    aresta. Cada métrica tem um valor padrão (0, se não for declarada), usado nas arestas que
+    não a informam e nas que já existiam quando ela apareceu.
+
+    As visões CSR ficam em cache até a próxima aresta: a topologia de cada visão e os pesos por
+    arco de cada métrica; os pesos de combinações {nome: coeficiente} ficam num cache LRU de
+    `combinacoes_em_cache` entradas, para que consultas com pesos sempre novos não o façam crescer.
+    """
+
+    def __init__(self, padroes=None, combinacoes_em_cache: int = 8):
+        self.origens = array('i')
+        self.destinos = array('i')
+        self.metricas = {}  # nome da métrica -> valor de cada aresta
+        self.padroes = {}  # nome da métrica -> valor das arestas que não a informam
+        for nome, padrao in (padroes or {}).items():
+            self.declarar_metrica(nome, padrao)
+        self.combinacoes_em_cache = combinacoes_em_cache
+        self._topologias = {}  # visão -> (inicio, cabecas, arestas de cada arco)
+        self._pesos_metrica = {}  # (visão, métrica) -> peso de cada arco
+        self._pesos_combinacao = OrderedDict()  # (visão, combinação) -> peso de cada arco, do menos ao mais recente
+
+    def __len__(self):
+        return len(self.origens)
+
+    def declarar_metrica(self, nome: str, padrao: float = 0.0):
+        """ Cria a coluna da métrica, se ainda não existir, com o valor padrão das arestas. """
+        if nome not in self.metricas:
+            self.metricas[nome] = array('d', [padrao]) * len(self.origens)
+            self.padroes[nome] = padrao
+
+    def adicionar(self, origem: int, destino: int, **valores):
+        """ Adiciona a aresta entre as duas posições, com o valor de cada métrica, e retorna o seu índice. """
+        for nome in valores:
+            self.declarar_metrica(nome)
+        for nome, coluna in self.metricas.items():
+            coluna.append(valores.get(nome, self.padroes[nome]))
+        self.origens.append(origem)
+        self.destinos.append(destino)
+        self._topologias.clear()
+        self._pesos_metrica.clear()
+        self._pesos_combinacao.clear()
+        return len(self.origens) - 1
+
+    def pesos(self, metrica="custo"):
+        """
+        Retorna o peso de cada aresta para a métrica pedida: o nome de uma métrica (a própria
+        coluna, sem cópia) ou uma combinação linear {nome: coeficiente}, calculada coluna a coluna.
+        """
+        if isinstance(metrica, str):
+            if metrica not in self.metricas:
+                raise ValueError(f"Métrica desconhecida: {metrica}.")
+            return self.metricas[metrica]
+        pesos = array('d', [0.0]) * len(self.origens)
+        for nome, coeficiente in metrica.items():
+            if nome not in self.metricas:
+                raise ValueError(f"Métrica desconhecida: {nome}.")
+            pesos = array('d', map(lambda peso, valor: peso + coeficiente * valor, pesos, self.metricas[nome]))
+        return pesos
+
+    def adjacencias(self, nomes, metricas):
+        """
+        Monta, a partir das colunas, a lista de adjacência {vértice: [(vizinho, valor, ...)]}
+        com o valor de cada métrica pedida, na ordem em que as arestas foram adicionadas. É uma
+        cópia para leitura: alterá-la não altera a tabela.
+        """
+        colunas = [self.pesos(metrica) for metrica in metricas]
+        vizinhos = {nome: [] for nome in nomes}
+        for aresta, (u, v) in enumerate(zip(self.origens, self.destinos)):
+            valores = tuple(coluna[aresta] for coluna in colunas)
+            vizinhos[nomes[u]].append((nomes[v],) + valores)
+            vizinhos[nomes[v]].append((nomes[u],) + valores)  # Grafo não-direcionado
+        return vizinhos
+
+    def csr(self, numero_vertices: int, metrica="custo", visao=0, aberta=None):
+        """
+        Visão CSR das arestas: (inicio, cabecas, pesos, arestas), em que os arcos que saem da
+        posição u ocupam [inicio[u], inicio[u + 1]) e arestas[arco] é a aresta de cada arco. Cada
+        aresta gera um arco em cada sentido. `visao` identifica no cache um subconjunto fixo de
+        arestas, dado na primeira montagem por `aberta(aresta)` (todas, se omitido).
+        """
+        topologia = self._topologias.get(visao)
+        if topologia is None or len(topologia[0]) != numero_vertices + 1:
+            topologia = self._topologias[visao] = self._montar_topologia(numero_vertices, aberta)
+            for cache in (self._pesos_metrica, self._pesos_combinacao):
+                for chave in [chave for chave in cache if chave[0] == visao]:
+                    del cache[chave]
+        inicio, cabecas, arestas = topologia
+
+        if isinstance(metrica, str):
+            chave = (visao, metrica)
+            if chave not in self._pesos_metrica:
+                pesos_aresta = self.pesos(metrica)
+                self._pesos_metrica[chave] = array('d', [pesos_aresta[aresta] for aresta in arestas])
+            return inicio, cabecas, self._pesos_metrica[chave], arestas
+
+        chave = (visao, tuple(sorted(metrica.items())))
+        if chave in self._pesos_combinacao:
+            self._pesos_combinacao.move_to_end(chave)
+        else:
+            pesos_aresta = self.pesos(metrica)
+            self._pesos_combinacao[chave] = array('d', [pesos_aresta[aresta] for aresta in arestas])
+            if len(self._pesos_combinacao) > self.combinacoes_em_cache:
+                self._pesos_combinacao.popitem(last=False)  # Descarta a combinação usada há mais tempo
+        return inicio, cabecas, self._pesos_combinacao[chave], arestas
+
+    def _montar_topologia(self, numero_vertices: int, aberta):
+        """ Monta (inicio, cabecas, arestas) do CSR com as arestas abertas, por contagem. """
+        origens = self.origens
+        destinos = self.destinos
+        abertas = [aresta for aresta in range(len(origens)) if aberta is None or aberta(aresta)]
+        inicio = array('i', [0]) * (numero_vertices + 1)
+        for aresta in abertas:
+            inicio[origens[aresta] + 1] += 1
+            inicio[destinos[aresta] + 1] += 1
+        for u in range(numero_vertices):
+            inicio[u + 1] += inicio[u]
+        cabecas = array('i', [0]) * inicio[-1]
+        arestas = array('i', [0]) * inicio[-1]
+        livre = inicio[:-1]
+        for aresta in abertas:
+            u = origens[aresta]
+            v = destinos[aresta]
+            for de, para in ((u, v), (v, u)):  # Grafo não-direcionado
+                cabecas[livre[de]] = para
+                arestas[livre[de]] = aresta
+                livre[de] += 1
+        return inicio, cabecas, arestas
+
+def reconstruir_caminho(nomes, anteriores, indice: int):
+    """
+    Reconstrói o caminho até a posição `indice` seguindo o array de anteriores (-1 na origem).
+    Os vértices são acumulados do fim para o início e invertidos uma única vez, em tempo linear.
+    """
+    caminho = []
+    while indice != -1:
+        caminho.append(nomes[indice])
+        indice = anteriores[indice]
+    caminho.reverse()
+    return caminho
+
+class ArvoreCaminhos:
+    """
+    Árvore de menores caminhos a partir de uma origem, guardada em arrays paralelos indexados
+    pela posição de cada vértice: `distancias`, `anteriores` (posição do pai; -1 na raiz e nos
+    vértices não alcançados) e `profundidades` (número de trechos até a origem; -1 se não
+    alcançado). `ordem` lista as posições alcançadas na ordem em que foram fixadas, de modo que
+    todo pai aparece antes dos filhos e a árvore pode ser percorrida sem recursão.
+    """
+
+    def __init__(self, nomes, indices, distancias, anteriores, profundidades, ordem):
+        self.nomes = nomes
+        self.indices = indices
+        self.distancias = distancias
+        self.anteriores = anteriores
+        self.profundidades = profundidades
+        self.ordem = ordem
+
+    @classmethod
+    def da_area(cls, nomes, indices, area: AreaBusca, ordem):
+        """
+        Exporta a busca que acabou de rodar na área (posições fixadas listadas em `ordem`) para
+        arrays próprios, que continuam válidos depois das próximas buscas da thread.
+        """
+        tamanho = len(nomes)
+        distancias = array('d', [float('inf')]) * tamanho
+        anteriores = array('i', [-1]) * tamanho
+        profundidades = array('i', [-1]) * tamanho
+        for indice in ordem:  # Cada pai é fixado antes dos filhos
+            anterior = area.anteriores[indice]
+            distancias[indice] = area.distancias[indice]
+            anteriores[indice] = anterior
+            profundidades[indice] = profundidades[anterior] + 1 if anterior >= 0 else 0
+
+        return cls(nomes[:], dict(indices), distancias, anteriores, profundidades, ordem)
+
+    def distancia(self, destino: str):
+        """ Retorna a distância mínima da origem até o destino (infinito se não for alcançado). """
+        return self.distancias[self.indices[destino]]
+
+    def caminho(self, destino: str):
+        """
+        Retorna o caminho da origem até o destino, ou None se ele não for alcançado. A profundidade
+        dá o tamanho exato da lista, preenchida do fim para o início sem inserções nem inversão.
+        """
+        indice = self.indices[destino]
+        profundidade = self.profundidades[indice]
+        if profundidade < 0:
+            return None
+
+        caminho = [None] * (profundidade + 1)
+        for posicao in range(profundidade, -1, -1):
+            caminho[posicao] = self.nomes[indice]
+            indice = self.anteriores[indice]
+        return caminho
+
+    def caminho_reverso(self, destino: str):
+        """
+        Gera os vértices do caminho do destino até a origem lendo direto os arrays da árvore,
+        sem montar lista (nada é gerado se o destino não for alcançado).
+        """
+        indice = self.indices[destino]
+        if self.profundidades[indice] < 0:
+            return
+        while indice != -1:
+            yield self.nomes[indice]
+            indice = self.anteriores[indice]
+
+    def caminhos(self, destinos=None):
+        """
+        Gera (destino, caminho) para os destinos informados, ou para todos os alcançados. Cada
+        caminho é uma lista nova, do tamanho da profundidade do destino, que pode ser guardada
+        pelo chamador; para só percorrer os trechos, `caminho_reverso` não aloca nada.
+        """
+        if destinos is None:
+            destinos = [self.nomes[indice] for indice in self.ordem]
+        for destino in destinos:
+            yield destino, self.caminho(destino)
+
+def buscar_posicoes(tamanho: int, vizinhos, origem: int, destino: int, fatores=None):
+    """
+    Dijkstra por posições na área de trabalho da thread, parando assim que o destino é fixado.
+    `vizinhos(indice)` gera (posição do vizinho, peso); com `fatores`, o peso de cada aresta
+    {u, v} (chave (menor, maior)) é multiplicado pelo seu fator. Retorna a área.
+    """
+    area = area_busca()
+    area.reiniciar(tamanho)
+    distancias = area.distancias
+    anteriores = area.anteriores
+    carimbos = area.carimbos
+    geracao = area.geracao
+    distancias[origem] = 0
+    anteriores[origem] = -1
+    carimbos[origem] = geracao
+    fila_prioridade = [(0, origem)]
+
+    while fila_prioridade:
+        distancia_atual, indice_atual = heapq.heappop(fila_prioridade)
+        if distancia_atual > distancias[indice_atual]:
+            continue
+        if indice_atual == destino:
+            break
+
+        for indice_vizinho, peso in vizinhos(indice_atual):
+            if fatores:
+                peso *= fatores.get((min(indice_atual, indice_vizinho), max(indice_atual, indice_vizinho)), 1)
+            distancia_nova = distancia_atual + peso
+            if carimbos[indice_vizinho] != geracao or distancia_nova < distancias[indice_vizinho]:
+                distancias[indice_vizinho] = distancia_nova
+                anteriores[indice_vizinho] = indice_atual
+                carimbos[indice_vizinho] = geracao
+                heapq.heappush(fila_prioridade, (distancia_nova, indice_vizinho))
+
+    return area
+
+def buscar_isocrona(tamanho: int, arcos, origem: int, limite, partida: float = 0):
+    """
+    Busca limitada a partir da posição `origem`, na área de trabalho da thread: para assim que
+    o menor tempo na fila passa do limite. `arcos(indice, horario)` gera (posição do vizinho,
+    tempo de percurso saindo no horário); a busca sai da origem no horário `partida`.
+
+    `limite` pode ser um número ou uma lista de faixas (por exemplo, [10, 20, 30]) calculadas
+    na mesma busca. Retorna (alcancados, tempos, faixas, fronteiras): as posições alcançadas em
+    ordem de fixação, seus tempos, o índice da menor faixa que contém cada uma e, para cada
+    faixa, os arcos (de, para) que saem de dentro dela.
+    """
+    limites = sorted(limite) if isinstance(limite, (list, tuple)) else [limite]
+    if not limites:
+        raise ValueError("É preciso informar ao menos uma faixa de tempo para a isócrona.")
+    limite_maximo = limites[-1]
+
+    area = area_busca()
+    area.reiniciar(tamanho)
+    horarios = area.distancias
+    carimbos = area.carimbos
+    geracao = area.geracao
+    horarios[origem] = partida
+    carimbos[origem] = geracao
+
+    alcancados = array('i')
+    tempos = array('d')
+    faixas = array('i')
+    fila_prioridade = [(partida, origem)]
+
+    while fila_prioridade:
+        horario_atual, indice_atual = heapq.heappop(fila_prioridade)
+        tempo_atual = horario_atual - partida
+        if tempo_atual > limite_maximo:
+            break
+        if horario_atual > horarios[indice_atual]:
+            continue
+
+        alcancados.append(indice_atual)
+        tempos.append(tempo_atual)
+        faixas.append(bisect_left(limites, tempo_atual))
+
+        for indice_vizinho, peso in arcos(indice_atual, horario_atual):
+            novo_horario = horario_atual + peso
+            if carimbos[indice_vizinho] != geracao or novo_horario < horarios[indice_vizinho]:
+                horarios[indice_vizinho] = novo_horario
+                carimbos[indice_vizinho] = geracao
+                heapq.heappush(fila_prioridade, (novo_horario, indice_vizinho))
+
+    # Toda posição com horário dentro do limite foi fixada; as demais ficam fora de todas as faixas
+    fronteiras = [[] for _ in limites]
+    for indice, faixa_indice in zip(alcancados, faixas):
+        for indice_vizinho, _ in arcos(indice, horarios[indice]):
+            tempo_vizinho = horarios[indice_vizinho] - partida if carimbos[indice_vizinho] == geracao else float('inf')
+            # O arco sai de toda faixa que contém a posição mas não contém o vizinho
+            for faixa in range(faixa_indice, bisect_left(limites, tempo_vizinho)):
+                fronteiras[faixa].append((indice, indice_vizinho))
+
+    return alcancados, tempos, faixas, fronteiras
+
+def caminhos_alternativos(ida: ArvoreCaminhos, volta: ArvoreCaminhos, vizinhos, quantidade: int = 3,
+                          esticamento: float = 0.25, compartilhamento: float = 0.8,
+                          otimalidade_local: float = 0.25, penalidade: float = 0.5, tentativas: int = 10):
+    """
+    Até `quantidade` caminhos significativamente diferentes entre a raiz de `ida` (árvore a
+    partir da origem) e a raiz de `volta` (árvore até o destino), como [(caminho, valor)] em
+    ordem crescente de valor, ou None se o destino não for alcançado. `vizinhos(indice)` gera
+    (posição do vizinho, peso) com os mesmos pesos das árvores.
+
+    Uma alternativa só é aceita se valer no máximo (1 + esticamento) vezes o ótimo, se as
+    arestas que compartilha com os caminhos já escolhidos não somarem mais que
+    `compartilhamento` vezes o ótimo e se for localmente ótima em trechos de
+    `otimalidade_local` vezes o ótimo. As candidatas vêm dos platôs (cadeias de arestas
+    presentes nas duas árvores), com processamento linear; um platô de comprimento L garante
+    otimalidade local em trechos de até L. Se faltarem caminhos, o método de penalidade
+    alonga as arestas já usadas e repete a busca, até `tentativas` vezes.
+    """
+    nomes = ida.nomes
+    valores_ida = ida.distancias
+    anteriores = ida.anteriores
+    valores_volta = volta.distancias
+    proximos = volta.anteriores
+    indice_origem = ida.ordem[0]
+    indice_destino = volta.ordem[0]
+    otimo = valores_ida[indice_destino]
+
+    if otimo == float('inf'):
+        return None
+
+    alternativas = []
+    escolhidos = []  # caminhos (em posições) das alternativas escolhidas
+    vistas = set()
+    usados = set()  # arestas (pares de posições) dos caminhos escolhidos
+
+    def avaliar(caminho, valores_trechos, localmente_otima):
+        """ Aplica os filtros de esticamento, compartilhamento e otimalidade local. """
+        if tuple(caminho) in vistas:
+            return
+        vistas.add(tuple(caminho))
+        trechos = [(min(u, v), max(u, v)) for u, v in zip(caminho, caminho[1:])]
+        valor = float(sum(valores_trechos))
+        if alternativas:
+            if valor > (1 + esticamento) * otimo:
+                return
+            if sum(c for trecho, c in zip(trechos, valores_trechos) if trecho in usados) > compartilhamento * otimo:
+                return
+            if not localmente_otima():
+                return
+        usados.update(trechos)
+        escolhidos.append(caminho)
+        alternativas.append(([nomes[indice] for indice in caminho], valor))
+
+    def caminho_via(vertice: int):
+        """ Caminho origem -> vértice pela árvore de ida e vértice -> destino pela de volta. """
+        caminho = []
+        indice = vertice
+        while indice != -1:
+            caminho.append(indice)
+            indice = anteriores[indice]
+        caminho.reverse()
+        while caminho[-1] != indice_destino:
+            caminho.append(proximos[caminho[-1]])
+        return caminho
+
+    def valores_do_caminho(caminho, vertice: int):
+        """ Pesos das arestas do caminho via `vertice`, tirados das próprias árvores. """
+        posicao = caminho.index(vertice)
+        return [valores_ida[v] - valores_ida[u] if i < posicao else valores_volta[u] - valores_volta[v]
+                for i, (u, v) in enumerate(zip(caminho, caminho[1:]))]
+
+    def localmente_otimo(caminho, valores_trechos):
+        """
+        Teste T de otimalidade local: o trecho do caminho com cerca de `otimalidade_local`
+        vezes o ótimo em torno do seu ponto médio precisa ser um menor caminho entre as pontas.
+        """
+        comprimento = otimalidade_local * otimo
+        acumulados = [0]
+        for valor in valores_trechos:
+            acumulados.append(acumulados[-1] + valor)
+        meio = acumulados[-1] / 2
+        inicio = max(0, bisect_right(acumulados, meio - comprimento / 2) - 1)
+        fim = min(len(caminho) - 1, bisect_left(acumulados, meio + comprimento / 2))
+        if fim - inicio < 2:
+            return True  # Trecho de uma única aresta (a mais curta entre as pontas)
+
+        area = buscar_posicoes(len(nomes), vizinhos, caminho[inicio], caminho[fim])
+        return area.distancias[caminho[fim]] >= acumulados[fim] - acumulados[inicio] - 1e-9
+
+    avaliar(caminho_via(indice_destino), valores_do_caminho(caminho_via(indice_destino), indice_destino), None)
+
+    # Platôs: cadeias de arestas u -> v presentes nas duas árvores, do maior para o menor
+    platos = []
+    for v in ida.ordem:
+        u = anteriores[v]
+        if u == -1 or proximos[u] != v or valores_volta[u] == float('inf'):
+            continue  # A aresta u -> v não pertence às duas árvores
+        if anteriores[u] != -1 and proximos[anteriores[u]] == u:
+            continue  # u está no meio de um platô que começa antes
+        fim = v
+        while proximos[fim] != -1 and anteriores[proximos[fim]] == fim:
+            fim = proximos[fim]
+        platos.append((valores_ida[fim] - valores_ida[u], u))
+    platos.sort(reverse=True)
+
+    for comprimento, inicio in platos:
+        if len(alternativas) >= quantidade:
+            break
+        if comprimento < otimalidade_local * otimo or valores_ida[inicio] + valores_volta[inicio] > (1 + esticamento) * otimo:
+            continue
+        caminho = caminho_via(inicio)
+        if len(set(caminho)) < len(caminho):
+            continue  # As duas metades se cruzam: o caminho não é simples
+        avaliar(caminho, valores_do_caminho(caminho, inicio), lambda: True)
+
+    # Método de penalidade para completar os caminhos que os platôs não forneceram
+    fatores = {}
+    penalizar = list(escolhidos)
+    for _ in range(tentativas):
+        if len(alternativas) >= quantidade:
+            break
+        for caminho in penalizar:
+            for u, v in zip(caminho, caminho[1:]):
+                trecho = (min(u, v), max(u, v))
+                fatores[trecho] = fatores.get(trecho, 1) * (1 + penalidade)
+        area = buscar_posicoes(len(nomes), vizinhos, indice_origem, indice_destino, fatores)
+        caminho = []
+        indice = indice_destino
+        while indice != -1:
+            caminho.append(indice)
+            indice = area.anteriores[indice]
+        caminho.reverse()
+        # Peso real de cada trecho: a aresta mais curta entre as pontas
+        valores_trechos = [min(peso for w, peso in vizinhos(u) if w == v) for u, v in zip(caminho, caminho[1:])]
+        avaliar(caminho, valores_trechos, lambda: localmente_otimo(caminho, valores_trechos))
+        penalizar = [caminho]  # Cada caminho encontrado, aceito ou não, fica mais longo na próxima busca
+
+    alternativas.sort(key=lambda alternativa: alternativa[1])
+    return alternativas
+
+class IndicePontosInteresse:
+    """
+    Índice pré-computado dos pontos de interesse mais próximos de cada vértice, para consultas
+    repetidas sobre um conjunto fixo de pontos. `vizinhos(vertice)` gera (vizinho, peso).
+
+    Cada vértice guarda sua lista de candidatos: os `k_maximo` pontos mais próximos, calculados
+    em uma única busca de múltiplas origens em que cada vértice aceita no máximo `k_maximo`
+    rótulos. A poda é exata: se um vértice no caminho já tem `k_maximo` pontos mais próximos
+    que p, os vértices adiante também têm, e p não entra na lista deles. Pontos que não são
+    vértices do grafo (uma estação ainda sem ruas, por exemplo) são ignorados, como nas
+    consultas incrementais.
+    """
+
+    def __init__(self, vertices, vizinhos, pontos, k_maximo: int):
+        self.k_maximo = k_maximo
+        self.candidatos = {vertice: [] for vertice in vertices}  # vértice -> [(ponto, valor)]
+        fixados = {vertice: set() for vertice in self.candidatos}
+        fila_prioridade = [(0, ponto, ponto) for ponto in set(pontos) if ponto in fixados]
+        heapq.heapify(fila_prioridade)
+
+        while fila_prioridade:
+            valor_atual, ponto, vertice_atual = heapq.heappop(fila_prioridade)
+            if ponto in fixados[vertice_atual] or len(self.candidatos[vertice_atual]) >= k_maximo:
+                continue
+            fixados[vertice_atual].add(ponto)
+            self.candidatos[vertice_atual].append((ponto, valor_atual))
+
+            for vizinho, peso in vizinhos(vertice_atual):
+                if ponto not in fixados[vizinho] and len(self.candidatos[vizinho]) < k_maximo:
+                    heapq.heappush(fila_prioridade, (valor_atual + peso, ponto, vizinho))
+
+    def consultar(self, vertice: str, k: int):
+        """ Retorna os k pontos mais próximos do vértice (k não pode passar de `k_maximo`). """
+        if k > self.k_maximo:
+            raise ValueError(f"O índice guarda no máximo {self.k_maximo} pontos por vértice.")
+        return self.candidatos[vertice][:k]